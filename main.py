@@ -1,7 +1,76 @@
-from src import read_resource_geodes
+import argparse
+import json
+from src import instrumentation, iter_resource_geodes, read_resource_geodes
+from src.algorithms.batch import Solver, default_solver, solve_corpus
+from src.algorithms.cache import CachedSolver, solver_namespace
+from src.algorithms.results import DEFAULT_SOLVER_VERSION, solve_resumable
 
 
-if __name__ == '__main__':
-    for g in read_resource_geodes():
+def print_geodes():
+    for g in iter_resource_geodes():
         r = repr(g)
         print(r, '\n')
+
+
+def cached_solver(path: str, solver_version: str) -> Solver:
+    # the default solver is a heuristic, its cached layouts are reused until the solver version changes
+    return CachedSolver(default_solver, path, namespace=f'{solver_namespace(default_solver)}|{solver_version}',
+                        rerun_unproven=False)
+
+
+def solve_geodes(workers: int, timeout: float, report: str = None, trace: str = None,
+                 solver: Solver = default_solver):
+    if report is None and trace is None:
+        results = solve_corpus(read_resource_geodes(), solver, workers=workers, timeout=timeout)
+    else:
+        # the counters live in this process, so everything is solved here
+        with instrumentation.recording() as recorder:
+            results = solve_corpus(read_resource_geodes(), solver, workers=1, timeout=timeout)
+        if report is not None:
+            recorder.write_report(report)
+        if trace is not None:
+            recorder.write_chrome_trace(trace)
+    for result in results:
+        if result.solution is None:
+            print(f'{result.index}: {"timeout" if result.timed_out else result.error} after {result.elapsed:.2f}s')
+        else:
+            score = result.solution.score
+            print(f'{result.index}: {score.groups_count=} {score.sticky_material=} '
+                  f'{result.solution.optimal=} in {result.elapsed:.2f}s')
+
+
+def solve_geodes_resumable(results: str, solver_version: str, workers: int, timeout: float,
+                           solver: Solver = default_solver):
+    # every result is printed as a JSON line as soon as it is written to `results`
+    def on_record(record: dict):
+        print(json.dumps(record), flush=True)
+
+    solve_resumable(read_resource_geodes(), results, solver=solver, solver_version=solver_version, workers=workers,
+                    timeout=timeout, on_record=on_record)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest='command')
+    solve_parser = subparsers.add_parser('solve', help='solve all geodes of resources/geodes.txt')
+    solve_parser.add_argument('--workers', type=int, default=None, help='worker processes, default: all cores')
+    solve_parser.add_argument('--timeout', type=float, default=None, help='seconds per geode')
+    solve_parser.add_argument('--report', help='write counters and phase times to this JSON file (single process)')
+    solve_parser.add_argument('--trace', help='write a Chrome trace to this file (single process)')
+    solve_parser.add_argument('--results', help='append JSONL results to this file and skip the geodes it already '
+                                                'has results for, streams the new results to stdout')
+    solve_parser.add_argument('--solver-version', default=DEFAULT_SOLVER_VERSION,
+                              help='results of other solver versions are solved again')
+    solve_parser.add_argument('--cache', help='reuse the layouts of earlier runs of the same solver version from '
+                                              'this sqlite file, symmetric geodes included')
+    args = parser.parse_args()
+    if args.command == 'solve' and args.results is not None and (args.report or args.trace):
+        parser.error('--results can not be combined with --report or --trace')
+    if args.command == 'solve':
+        solver = default_solver if args.cache is None else cached_solver(args.cache, args.solver_version)
+    if args.command == 'solve' and args.results is not None:
+        solve_geodes_resumable(args.results, args.solver_version, args.workers, args.timeout, solver)
+    elif args.command == 'solve':
+        solve_geodes(args.workers, args.timeout, args.report, args.trace, solver)
+    else:
+        print_geodes()
@@ -0,0 +1,18 @@
+import argparse
+import asyncio
+from src.server import DEFAULT_DEADLINE, DEFAULT_QUEUE_SIZE, serve
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='solve projections sent as JSON lines, see src/server.py')
+    parser.add_argument('--socket', help='listen on this Unix socket instead of stdin/stdout')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes, default: all cores')
+    parser.add_argument('--queue', type=int, default=DEFAULT_QUEUE_SIZE,
+                        help='requests waiting for a worker before new ones are answered with busy')
+    parser.add_argument('--deadline', type=float, default=DEFAULT_DEADLINE,
+                        help='seconds per request if the request has no deadline')
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.socket, args.workers, args.queue, args.deadline))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,2 @@
+from src.v1.classes import GeodesyProjectionType, StickyType, Group, GroupManager, Cluster, StickyScore, GeodesyProjection
+from src.v1.resources_utils import iter_resource_geodes, read_resource_geodes
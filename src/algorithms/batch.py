@@ -0,0 +1,121 @@
+import os
+import signal
+import threading
+import time
+import typing as t
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from src.v1.classes import Cluster, GeodesyProjection, StickyScore, StickyType
+from src import instrumentation
+from src.algorithms import local_search
+from src.algorithms.solution import Solution
+
+
+Solver = t.Callable[[GeodesyProjection], Solution]
+
+
+class SolveTimeout(Exception):
+    pass
+
+
+class BatchResult:
+    def __init__(self, index: int, solution: t.Optional[Solution], elapsed: float,
+                 timed_out: bool = False, error: str = None):
+        self.index = index  # position of the projection in the input
+        self.solution = solution  # None if the solve timed out or failed
+        self.elapsed = elapsed
+        self.timed_out = timed_out
+        self.error = error
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.index=} {self.solution=} {self.elapsed=:.3f} ' \
+               f'{self.timed_out=} {self.error=})'
+
+
+def default_solver(gp: GeodesyProjection) -> Solution:
+    return local_search.solve(gp)
+
+
+def _raise_timeout(signum, frame):
+    raise SolveTimeout()
+
+
+def _solve_one(solver: Solver, index: int, gp: GeodesyProjection, timeout: t.Optional[float]) -> tuple:
+    # runs in the worker, the cluster goes back as flat cells instead of a pickled GroupManager. The alarm
+    # only works in the main thread, elsewhere (solve_corpus with workers<=1 called from a thread) the
+    # timeout is not applied.
+    start = time.perf_counter()
+    use_alarm = timeout is not None and hasattr(signal, 'SIGALRM') \
+        and threading.current_thread() is threading.main_thread()
+    previous_handler = None
+    solution, timed_out, error = None, False, None
+    try:
+        if use_alarm:
+            previous_handler = signal.signal(signal.SIGALRM, _raise_timeout)
+            signal.setitimer(signal.ITIMER_REAL, timeout)
+        try:
+            with instrumentation.current().phase(instrumentation.SOLVE, geode=index):
+                solution = solver(gp)
+        finally:
+            # disarmed before anything else, an alarm can only interrupt the solve itself
+            if use_alarm:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+    except SolveTimeout:
+        solution, timed_out = None, True
+    except Exception as e:
+        error = f'{type(e).__name__}: {e}'
+    finally:
+        if previous_handler is not None:
+            signal.signal(signal.SIGALRM, previous_handler)
+    elapsed = time.perf_counter() - start
+    if solution is None:
+        return index, None, None, False, None, elapsed, timed_out, error
+    return index, bytes(solution.cluster.grid.cells), solution.score.groups_count, solution.optimal, \
+        solution.solver, elapsed, False, None
+
+
+def _to_result(gp: GeodesyProjection, raw: tuple) -> BatchResult:
+    index, cells, groups_count, optimal, solver_name, elapsed, timed_out, error = raw
+    solution = None
+    if cells is not None:
+        cluster = Cluster.of_cells(gp.height, gp.width, cells)
+        score = StickyScore.of_values(groups_count, cells.count(StickyType.SLIME.value),
+                                      cells.count(StickyType.HONEY.value))
+        solution = Solution(cluster, score, optimal=optimal, solver=solver_name)
+    return BatchResult(index, solution, elapsed, timed_out=timed_out, error=error)
+
+
+def largest_first(projections: t.Sequence[GeodesyProjection]) -> t.List[int]:
+    # the biggest geodes start first, so that they do not leave the other workers idle at the end
+    return sorted(range(len(projections)), key=lambda i: -len(projections[i].shards_coordinates))
+
+
+def solve_corpus(projections: t.Iterable[GeodesyProjection],
+                 solver: Solver = default_solver,
+                 workers: t.Optional[int] = None,
+                 timeout: t.Optional[float] = None,
+                 on_result: t.Callable[[BatchResult], None] = None) -> t.List[BatchResult]:
+    # Solves every projection in a process pool and returns the results in input order.
+    # `solver` must be picklable (a module level function or a functools.partial of one). A solve that
+    # runs longer than `timeout` seconds is interrupted inside its worker and reported as timed out.
+    # on_result is called in the parent as soon as a result arrives, in completion order.
+    projections = list(projections)
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    results: t.List[t.Optional[BatchResult]] = [None] * len(projections)
+
+    def collect(raw: tuple):
+        result = _to_result(projections[raw[0]], raw)
+        results[result.index] = result
+        if on_result is not None:
+            on_result(result)
+
+    order = largest_first(projections)
+    if workers <= 1:
+        for index in order:
+            collect(_solve_one(solver, index, projections[index], timeout))
+        return results
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_solve_one, solver, index, projections[index], timeout) for index in order]
+        for future in as_completed(futures):
+            collect(future.result())
+    return results
@@ -0,0 +1,99 @@
+import typing as t
+from src.bitboard import BoardShape, board_shape, popcount
+from src.v1.classes import Cluster, GeodesyProjection, GeodesyProjectionType, StickyScore, StickyType
+
+
+SLIME = StickyType.SLIME.value
+HONEY = StickyType.HONEY.value
+
+
+class BitBoard:
+    # Search state of a cluster on a projection as four bitboards (see src.bitboard): the SLIME and HONEY
+    # cells of the cluster and the BUD and SHARD cells of the projection. Copies are four ints, so a search
+    # can keep one per node. Validation is two mask tests and the groups are flood fills over whole rings
+    # of cells instead of a per cell search.
+    __slots__ = ('shape', 'bud', 'shard', 'slime', 'honey')
+
+    def __init__(self, shape: BoardShape, bud: int, shard: int, slime: int = 0, honey: int = 0):
+        self.shape = shape
+        self.bud = bud
+        self.shard = shard
+        self.slime = slime
+        self.honey = honey
+
+    @classmethod
+    def of_projection(cls, gp: GeodesyProjection, cluster: Cluster = None) -> 'BitBoard':
+        board = cls(gp.board_shape, gp.bud_mask, gp.shard_mask)
+        if cluster is not None:
+            board.slime = board.shape.mask_of(cluster.grid.cells, SLIME)
+            board.honey = board.shape.mask_of(cluster.grid.cells, HONEY)
+        return board
+
+    @classmethod
+    def of_cells(cls, height: int, width: int, projection: t.ByteString, cells: t.ByteString) -> 'BitBoard':
+        # both layouts flat and row major, the projection with GeodesyProjectionType values
+        shape = board_shape(height, width)
+        return cls(shape, shape.mask_of(projection, GeodesyProjectionType.BUD.value),
+                   shape.mask_of(projection, GeodesyProjectionType.SHARD.value),
+                   shape.mask_of(cells, SLIME), shape.mask_of(cells, HONEY))
+
+    def copy(self) -> 'BitBoard':
+        return BitBoard(self.shape, self.bud, self.shard, self.slime, self.honey)
+
+    @property
+    def sticky(self) -> int:
+        return self.slime | self.honey
+
+    def get(self, h: int, w: int) -> StickyType:
+        bit = self.shape.bit(h, w)
+        if self.slime & bit:
+            return StickyType.SLIME
+        if self.honey & bit:
+            return StickyType.HONEY
+        return StickyType.EMTPY
+
+    def set(self, h: int, w: int, st: StickyType):
+        bit = self.shape.bit(h, w)
+        self.slime &= ~bit
+        self.honey &= ~bit
+        if st is StickyType.SLIME:
+            self.slime |= bit
+        elif st is StickyType.HONEY:
+            self.honey |= bit
+
+    def is_valid(self) -> bool:
+        sticky = self.slime | self.honey
+        return not sticky & self.bud and not self.shard & ~sticky
+
+    def groups(self) -> t.Iterator[t.Tuple[StickyType, int]]:
+        # (sticky type, cells of the group) for every group
+        for group in self.shape.components(self.slime):
+            yield StickyType.SLIME, group
+        for group in self.shape.components(self.honey):
+            yield StickyType.HONEY, group
+
+    def group_sizes(self) -> t.List[int]:
+        return [popcount(group) for _, group in self.groups()]
+
+    def groups_count(self) -> int:
+        return sum(1 for _ in self.groups())
+
+    def within_punch_limit(self, punch_limit: t.Optional[int]) -> bool:
+        return punch_limit is None or all(size <= punch_limit for size in self.group_sizes())
+
+    def score(self) -> StickyScore:
+        return StickyScore.of_values(self.groups_count(), popcount(self.slime), popcount(self.honey))
+
+    def cells(self) -> bytearray:
+        return self.shape.cells_of(((self.slime, SLIME), (self.honey, HONEY)))
+
+    def to_cluster(self) -> Cluster:
+        return Cluster.of_cells(self.shape.height, self.shape.width, self.cells())
+
+    def __eq__(self, other):
+        return isinstance(other, BitBoard) and self.shape is other.shape \
+               and (self.bud, self.shard, self.slime, self.honey) == (other.bud, other.shard, other.slime, other.honey)
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.shape.height}x{self.shape.width} ' \
+               f'slime={popcount(self.slime)} honey={popcount(self.honey)})'
@@ -0,0 +1,128 @@
+import math
+import typing as t
+from src.v1.classes import Cluster, GeodesyProjection, GeodesyProjectionType, StickyType
+from src.v1.constants import PUNCH_LIMIT
+from src.algorithms.solution import Solution
+from src.algorithms.utils import find_connectors, neighbour_indexes
+
+
+EMPTY = StickyType.EMTPY.value
+SLIME = StickyType.SLIME.value
+HONEY = StickyType.HONEY.value
+INFEASIBLE = (math.inf, math.inf)
+
+
+def _ceil_div(a: int, b: int) -> int:
+    return -(-a // b)
+
+
+def region_groups_bound(slime: int, honey: int, free_shards: int, punch_limit: t.Optional[int]) -> int:
+    # groups needed by one region that still holds `slime` and `honey` cells of open groups and
+    # `free_shards` shards without a type
+    if slime + honey + free_shards == 0:
+        return 0
+    if punch_limit is None:
+        return max(1, (slime > 0) + (honey > 0))
+    return max(_ceil_div(slime, punch_limit) + _ceil_div(honey, punch_limit),
+               _ceil_div(slime + honey + free_shards, punch_limit))
+
+
+def lower_bound(gp: GeodesyProjection, cluster: Cluster = None,
+                punch_limit: t.Optional[int] = PUNCH_LIMIT,
+                connector_reach: t.Optional[int] = None) -> t.Tuple[float, float]:
+    # Admissible (groups_count, sticky_material) bound for every valid completion of `cluster`, or of the
+    # empty cluster. The EMTPY cells of the cluster that are not BUD are taken as undecided.
+    #   closed groups, the ones without an undecided neighbour, can not change any more and count as they are,
+    #   the other cells fall apart into regions separated by BUD cells (and, with a connector_reach, by the
+    #   cells that are too far from any shard to be used), which never share a group. Every region needs
+    #   at least ceil(cells / punch_limit) groups, and the SLIME and HONEY cells it already has need
+    #   ceil(slime / punch_limit) + ceil(honey / punch_limit) groups of their own,
+    #   an undecided shard next to groups of one type that would go over the punch limit together is forced
+    #   to the other type, next to such groups of both types the branch is infeasible.
+    # connector_reach=None bounds the real problem, a reach bounds only the solvers restricted to it.
+    # Returns INFEASIBLE when no valid completion exists.
+    size = gp.height * gp.width
+    projection = gp.grid.cells
+    cells = cluster.grid.cells if cluster is not None else bytes(size)
+    neighbours = neighbour_indexes(gp.height, gp.width)
+    bud = GeodesyProjectionType.BUD.value
+    shard = GeodesyProjectionType.SHARD.value
+    if connector_reach is None:
+        usable = [v != bud for v in projection]
+    else:
+        is_connector = find_connectors(gp, connector_reach, neighbours)
+        usable = [v == shard or is_connector[i] for i, v in enumerate(projection)]
+    for i in range(size):
+        if cells[i] != EMPTY and not usable[i]:
+            return INFEASIBLE
+    free = [usable[i] and cells[i] == EMPTY for i in range(size)]
+
+    # the groups of the cluster
+    group_of = [-1] * size
+    group_sizes: t.List[int] = list()
+    group_open: t.List[bool] = list()
+    for seed in range(size):
+        if cells[seed] == EMPTY or group_of[seed] != -1:
+            continue
+        group_id = len(group_sizes)
+        group_of[seed] = group_id
+        stack = [seed]
+        count = 0
+        is_open = False
+        while stack:
+            i = stack.pop()
+            count += 1
+            for n in neighbours[i]:
+                if free[n]:
+                    is_open = True
+                elif cells[n] == cells[seed] and group_of[n] == -1:
+                    group_of[n] = group_id
+                    stack.append(n)
+        if punch_limit is not None and count > punch_limit:
+            return INFEASIBLE
+        group_sizes.append(count)
+        group_open.append(is_open)
+
+    # undecided shards whose type is forced by full groups around them
+    forced = dict()
+    if punch_limit is not None:
+        for i in range(size):
+            if not free[i] or projection[i] != shard:
+                continue
+            allowed = list()
+            for value in (SLIME, HONEY):
+                joined = {group_of[n] for n in neighbours[i] if cells[n] == value}
+                if sum(group_sizes[g] for g in joined) + 1 <= punch_limit:
+                    allowed.append(value)
+            if not allowed:
+                return INFEASIBLE
+            if len(allowed) == 1:
+                forced[i] = allowed[0]
+
+    groups = sum(1 for is_open in group_open if not is_open)
+    material = size - cells.count(EMPTY)
+    seen = [False] * size
+    for seed in range(size):
+        if seen[seed] or not (free[seed] or cells[seed] != EMPTY and group_open[group_of[seed]]):
+            continue
+        seen[seed] = True
+        stack = [seed]
+        counts = {SLIME: 0, HONEY: 0, EMPTY: 0}
+        while stack:
+            i = stack.pop()
+            if cells[i] != EMPTY:
+                counts[cells[i]] += 1
+            elif projection[i] == shard:
+                counts[forced.get(i, EMPTY)] += 1
+            for n in neighbours[i]:
+                if not seen[n] and (free[n] or cells[n] != EMPTY and group_open[group_of[n]]):
+                    seen[n] = True
+                    stack.append(n)
+        groups += region_groups_bound(counts[SLIME], counts[HONEY], counts[EMPTY], punch_limit)
+    material += sum(1 for i in range(size) if free[i] and projection[i] == shard)
+    return groups, material
+
+
+def proves_optimal(gp: GeodesyProjection, solution: Solution, punch_limit: t.Optional[int] = PUNCH_LIMIT) -> bool:
+    # a solution that reaches the bound of the real problem can not be improved
+    return solution.key() <= lower_bound(gp, punch_limit=punch_limit)
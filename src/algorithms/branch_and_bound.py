@@ -0,0 +1,297 @@
+import math
+import time
+import typing as t
+from src.v1.classes import Cluster, GeodesyProjection, GeodesyProjectionType, StickyScore, StickyType
+from src.v1.constants import PUNCH_LIMIT
+from src import instrumentation
+from src.algorithms import greedy
+from src.algorithms.bounds import lower_bound
+from src.algorithms.solution import Solution
+from src.algorithms.utils import find_connectors, neighbour_indexes
+
+
+EMPTY = StickyType.EMTPY.value
+SLIME = StickyType.SLIME.value
+HONEY = StickyType.HONEY.value
+TIME_CHECK_INTERVAL = 1024
+DEFAULT_TIME_LIMIT = 5.0  # seconds, the best layout found so far is returned with optimal=False
+
+
+class BranchAndBoundSolver:
+    # Depth first search over the cells that actually have a choice:
+    #   BUD cells are fixed to EMTPY, SHARD cells branch on SLIME/HONEY and EMPTY cells within connector_reach
+    #   steps of a shard ("connectors") branch on EMTPY/SLIME/HONEY. Every other cell stays EMTPY.
+    #   connector_reach=None makes every EMPTY cell a connector, which is exact but much slower. With a reach
+    #   the result is only claimed optimal if it reaches the lower bound of the whole projection.
+    # The search starts from `initial` (greedy by default) as the incumbent and only looks for improvements.
+    # The cells are assigned in row major order, so a group is closed (final) as soon as none of its cells
+    # has an unassigned neighbour. A branch is cut when
+    #   closed groups + lower bound for the open groups and the remaining shards,
+    #   assigned material + remaining shards
+    # can not beat the incumbent under StickyScore.is_better_than, or when a group exceeds the punch limit.
+    # With propagate=True the punch limit is also enforced ahead of the search (forward checking): after every
+    # assignment the unassigned cells around the changed group lose the sticky type that would merge them
+    # into a group over the limit. A connector left without sticky types is forced to EMTPY, a shard left
+    # without any is a dead branch, and the search never tries the removed values.
+    # All the state changes are written to a trail and undone when backtracking, no copies are made.
+    # An `incumbent` shared with other solvers (see portfolio.SharedIncumbent) gets every improvement and its
+    # key is read every TIME_CHECK_INTERVAL nodes, branches are cut against the better of both.
+
+    def __init__(self, gp: GeodesyProjection,
+                 punch_limit: t.Optional[int] = PUNCH_LIMIT,
+                 connector_reach: t.Optional[int] = 1,
+                 node_limit: t.Optional[int] = None,
+                 time_limit: t.Optional[float] = DEFAULT_TIME_LIMIT,
+                 propagate: bool = True,
+                 initial: Solution = None,
+                 incumbent=None):
+        self.gp = gp
+        self.height = gp.height
+        self.width = gp.width
+        self.punch_limit = punch_limit
+        self.node_limit = node_limit
+        self.time_limit = time_limit
+        self.propagate = propagate and punch_limit is not None
+        self.initial = initial
+        self.incumbent = incumbent
+        self.exact = connector_reach is None  # a finished search proves the optimum
+        self.nodes = 0
+        self.pruned_by_limit = 0
+        self.pruned_by_bound = 0
+        self.pruned_by_propagation = 0
+        self.exhausted = False
+        self.proven = False  # an incumbent reached the bound of the whole projection
+        self.deadline: t.Optional[float] = None
+
+        size = self.height * self.width
+        projection = gp.grid.cells
+        self.neighbours: t.List[t.Tuple[int, ...]] = neighbour_indexes(self.height, self.width)
+        is_shard = [v == GeodesyProjectionType.SHARD.value for v in projection]
+        is_connector = find_connectors(gp, connector_reach, self.neighbours)
+        self.order: t.List[int] = [i for i in range(size) if is_shard[i] or is_connector[i]]
+        self.is_shard = is_shard
+        position = {cell: k for k, cell in enumerate(self.order)}
+        self.position: t.List[int] = [position.get(i, -1) for i in range(size)]
+        self.earlier: t.List[t.Tuple[int, ...]] = [tuple(n for n in self.neighbours[cell] if position.get(n, k) < k)
+                                                    for k, cell in enumerate(self.order)]
+        self.later_count: t.List[int] = [sum(1 for n in self.neighbours[cell] if position.get(n, k) > k)
+                                         for k, cell in enumerate(self.order)]
+
+        # search state, every change goes through the trail
+        self.cells = bytearray(size)
+        self.parent = list(range(size))
+        self.group_size = [0] * size
+        self.open_edges = [0] * size  # for a root: number of (cell, unassigned neighbour) pairs in its group
+        self.next_member = list(range(size))  # the cells of a group form a cycle, merging two splices them
+        every = 1 << EMPTY | 1 << SLIME | 1 << HONEY
+        # bit set of the values a cell can still take
+        self.domain = [every & ~(1 << EMPTY) if is_shard[i] else every for i in range(size)]
+        # closed groups, open slime cells, open honey cells, material, unassigned shards,
+        # unassigned shards forced to slime, unassigned shards forced to honey
+        self.stats = [0, 0, 0, 0, sum(is_shard), 0, 0]
+        self.trail: t.List[t.Tuple[t.Union[list, bytearray], int, int]] = list()
+
+        self.best_cells: t.Optional[bytes] = None
+        self.best_key: t.Tuple[float, float] = (math.inf, math.inf)
+        self.cutoff: t.Tuple[float, float] = (math.inf, math.inf)  # best key known, found here or elsewhere
+        self.target: t.Tuple[float, float] = (-math.inf, -math.inf)
+
+    def find(self, i: int) -> int:
+        # no path compression, so that unions can be undone
+        parent = self.parent
+        while parent[i] != i:
+            i = parent[i]
+        return i
+
+    def _write(self, array: t.Union[list, bytearray], index: int, value: int):
+        self.trail.append((array, index, array[index]))
+        array[index] = value
+
+    def _undo(self, mark: int):
+        trail = self.trail
+        while len(trail) > mark:
+            array, index, value = trail.pop()
+            array[index] = value
+
+    def lower_bound(self) -> t.Tuple[int, int]:
+        closed, open_slime, open_honey, material, remaining, forced_slime, forced_honey = self.stats
+        if self.punch_limit is None:
+            open_groups = (open_slime > 0) + (open_honey > 0)
+            if open_groups == 0 and remaining > 0:
+                open_groups = 1
+        else:
+            limit = self.punch_limit
+            # a shard forced to a type ends up in a group of that type that is not closed yet
+            open_groups = max(-(-(open_slime + forced_slime) // limit) - (-(open_honey + forced_honey) // limit),
+                              -(-(open_slime + open_honey + remaining) // limit))
+        return closed + open_groups, material + remaining
+
+    def _values(self, k: int) -> t.List[int]:
+        cell = self.order[k]
+        joined = {SLIME: 0, HONEY: 0}
+        for n in self.earlier[k]:
+            if self.cells[n] != EMPTY:
+                joined[self.cells[n]] += 1
+        # prefer the sticky type that joins existing groups
+        sticky = sorted((SLIME, HONEY), key=lambda v: -joined[v])
+        if self.stats[3] == 0:
+            # symmetry: swapping SLIME and HONEY everywhere gives the same score
+            sticky = [SLIME]
+        values = sticky if self.is_shard[cell] else [EMPTY] + sticky
+        domain = self.domain[cell]
+        return [v for v in values if domain >> v & 1]
+
+    def _assign(self, k: int, value: int) -> bool:
+        # returns False if the assignment breaks the punch limit
+        cell = self.order[k]
+        cells, open_edges, group_size, stats = self.cells, self.open_edges, self.group_size, self.stats
+        touched = list()
+        for n in self.earlier[k]:
+            if cells[n] != EMPTY:
+                root = self.find(n)
+                self._write(open_edges, root, open_edges[root] - 1)
+                touched.append(root)
+        if self.is_shard[cell]:
+            self._write(stats, 4, stats[4] - 1)
+            forced = self.domain[cell]
+            if forced == 1 << SLIME or forced == 1 << HONEY:
+                forced_index = 5 if forced == 1 << SLIME else 6
+                self._write(stats, forced_index, stats[forced_index] - 1)
+        if value != EMPTY:
+            self._write(cells, cell, value)
+            self._write(group_size, cell, 1)
+            self._write(open_edges, cell, self.later_count[k])
+            self._write(stats, 3, stats[3] + 1)
+            self._write(stats, value, stats[value] + 1)  # p is open until proven closed below
+            root = cell
+            for n_root in touched:
+                if cells[n_root] != value:
+                    continue
+                n_root = self.find(n_root)
+                if n_root == root:
+                    continue
+                if group_size[n_root] < group_size[root]:
+                    n_root, root = root, n_root
+                self._write(self.parent, root, n_root)
+                next_root, next_n_root = self.next_member[root], self.next_member[n_root]
+                self._write(self.next_member, root, next_n_root)
+                self._write(self.next_member, n_root, next_root)
+                self._write(group_size, n_root, group_size[n_root] + group_size[root])
+                self._write(open_edges, n_root, open_edges[n_root] + open_edges[root])
+                root = n_root
+                if self.punch_limit is not None and group_size[root] > self.punch_limit:
+                    return False
+            touched.append(root)
+        for root in set(self.find(r) for r in touched):
+            if open_edges[root] == 0:
+                self._write(stats, 0, stats[0] + 1)
+                value_of_root = cells[root]
+                self._write(stats, value_of_root, stats[value_of_root] - group_size[root])
+                # mark as accounted, an open_edges of -1 never matches 0 again
+                self._write(open_edges, root, -1)
+        if value != EMPTY and self.propagate:
+            root = self.find(cell)
+            if open_edges[root] > 0 and not self._propagate(k, root, value):
+                self.pruned_by_propagation += 1
+                return False
+        return True
+
+    def _propagate(self, k: int, root: int, value: int) -> bool:
+        # Removes `value` from the unassigned neighbours of the group that could only take it by going over
+        # the punch limit. Groups only grow deeper in the search, so a removed value stays impossible.
+        # Returns False if a shard has no value left.
+        cells, group_size, domain, position, neighbours = \
+            self.cells, self.group_size, self.domain, self.position, self.neighbours
+        limit = self.punch_limit
+        bit = 1 << value
+        size = group_size[root]
+        member = root
+        while True:
+            for u in neighbours[member]:
+                if position[u] <= k or not domain[u] & bit:
+                    continue
+                joined = size
+                if size < limit:
+                    # other groups of the type next to u would be merged as well
+                    roots = {self.find(n) for n in neighbours[u] if cells[n] == value}
+                    roots.discard(root)
+                    joined += sum(group_size[r] for r in roots)
+                if joined + 1 > limit:
+                    self._write(domain, u, domain[u] & ~bit)
+                    if not self.is_shard[u]:
+                        continue
+                    if domain[u] == 0:
+                        return False
+                    # the shard is forced to the other type
+                    forced_index = 5 if domain[u] == 1 << SLIME else 6
+                    self._write(self.stats, forced_index, self.stats[forced_index] + 1)
+            member = self.next_member[member]
+            if member == root:
+                return True
+
+    def _budget_exhausted(self) -> bool:
+        if self.exhausted:
+            return True
+        if self.node_limit is not None and self.nodes >= self.node_limit:
+            self.exhausted = True
+        elif self.nodes % TIME_CHECK_INTERVAL == 0:
+            if self.incumbent is not None:
+                self.cutoff = min(self.cutoff, self.incumbent.key())
+            if self.deadline is not None and time.perf_counter() > self.deadline:
+                self.exhausted = True
+        return self.exhausted
+
+    def _search(self, k: int):
+        if k == len(self.order):
+            key = (self.stats[0], self.stats[3])
+            if key < self.best_key:
+                self.best_key = key
+                self.best_cells = bytes(self.cells)
+                self.proven = key <= self.target
+                self.cutoff = min(self.cutoff, key)
+                if self.incumbent is not None:
+                    self.incumbent.offer(key, self.best_cells)
+            return
+        for value in self._values(k):
+            self.nodes += 1
+            if self.proven or self._budget_exhausted():
+                return
+            mark = len(self.trail)
+            if not self._assign(k, value):
+                self.pruned_by_limit += 1
+            elif self.lower_bound() < self.cutoff:
+                self._search(k + 1)
+            else:
+                self.pruned_by_bound += 1
+            self._undo(mark)
+
+    def solve(self) -> Solution:
+        recorder = instrumentation.current()
+        self.deadline = None if self.time_limit is None else time.perf_counter() + self.time_limit
+        with recorder.phase(instrumentation.PRESOLVE, solver='branch_and_bound'):
+            self.target = lower_bound(self.gp, punch_limit=self.punch_limit)
+            initial = self.initial if self.initial is not None else greedy.solve(self.gp, self.punch_limit)
+            self.best_key = self.cutoff = initial.key()
+            self.best_cells = bytes(initial.cluster.grid.cells)
+            self.proven = self.best_key <= self.target
+        if self.incumbent is not None:
+            self.incumbent.offer(self.best_key, self.best_cells)
+            self.cutoff = min(self.cutoff, self.incumbent.key())
+        with recorder.phase(instrumentation.SEARCH, solver='branch_and_bound'):
+            self._search(0)
+        recorder.count(instrumentation.NODES_EXPANDED, self.nodes)
+        recorder.prune('punch_limit', self.pruned_by_limit)
+        recorder.prune('bound', self.pruned_by_bound)
+        recorder.prune('propagation', self.pruned_by_propagation)
+        cells = self.best_cells if self.best_cells is not None else bytes(self.cells)
+        cluster = Cluster.of_cells(self.height, self.width, cells)
+        score = StickyScore.of_values(self.best_key[0], cluster.get_slime_count(), cluster.get_honey_count()) \
+            if self.best_cells is not None else StickyScore(cluster)
+        # a cutoff from the incumbent below best_key means that a better layout exists elsewhere
+        finished = self.exact and not self.exhausted and self.best_key <= self.cutoff
+        optimal = self.best_cells is not None and (self.proven or finished)
+        return Solution(cluster, score, optimal=optimal, solver='branch_and_bound')
+
+
+def solve(gp: GeodesyProjection, **kwargs) -> Solution:
+    return BranchAndBoundSolver(gp, **kwargs).solve()
@@ -0,0 +1,224 @@
+import functools
+import hashlib
+import os
+import sqlite3
+import typing as t
+from operator import itemgetter
+from src.v1.classes import Cluster, GeodesyProjection, StickyScore, StickyType
+from src.v1.constants import PUNCH_LIMIT
+from src import instrumentation
+from src.algorithms.solution import Solution
+
+
+DEFAULT_CACHE_PATH = '.cache/solutions.sqlite'
+DEFAULT_MAX_ENTRIES = 100_000
+TOUCH_FLUSH_INTERVAL = 256  # hits whose last_used is kept in memory before it is written
+
+# the 8 symmetries of a rectangle: (transpose first, then flip rows, then flip columns)
+SYMMETRIES: t.Tuple[t.Tuple[bool, bool, bool], ...] = tuple(
+    (transpose, flip_rows, flip_columns)
+    for transpose in (False, True) for flip_rows in (False, True) for flip_columns in (False, True))
+
+
+@functools.lru_cache(maxsize=None)
+def symmetry_permutation(height: int, width: int, symmetry: t.Tuple[bool, bool, bool]) -> t.Tuple[int, int, t.Tuple[int, ...]]:
+    # (new height, new width, perm) with transformed[j] = cells[perm[j]]
+    transpose, flip_rows, flip_columns = symmetry
+    new_height, new_width = (width, height) if transpose else (height, width)
+    perm = list()
+    for h in range(new_height):
+        for w in range(new_width):
+            src_h = new_height - 1 - h if flip_rows else h
+            src_w = new_width - 1 - w if flip_columns else w
+            if transpose:
+                src_h, src_w = src_w, src_h
+            perm.append(src_h * width + src_w)
+    return new_height, new_width, tuple(perm)
+
+
+def _take(cells: t.ByteString, perm: t.Tuple[int, ...]) -> bytes:
+    if len(perm) < 2:
+        return bytes(cells[i] for i in perm)
+    return bytes(itemgetter(*perm)(cells))
+
+
+def transform_cells(cells: t.ByteString, height: int, width: int,
+                    symmetry: t.Tuple[bool, bool, bool]) -> t.Tuple[int, int, bytes]:
+    new_height, new_width, perm = symmetry_permutation(height, width, symmetry)
+    return new_height, new_width, _take(cells, perm)
+
+
+def inverse_transform_cells(cells: t.ByteString, height: int, width: int,
+                            symmetry: t.Tuple[bool, bool, bool]) -> bytes:
+    # height and width are the ones of the original (not transformed) grid
+    _, _, perm = symmetry_permutation(height, width, symmetry)
+    original = bytearray(len(perm))
+    for j, i in enumerate(perm):
+        original[i] = cells[j]
+    return bytes(original)
+
+
+def canonical_form(gp: GeodesyProjection) -> t.Tuple[t.Tuple[bool, bool, bool], int, int, bytes]:
+    # the smallest (height, width, cells) over the 8 symmetries and the symmetry that gives it
+    best = None
+    for symmetry in SYMMETRIES:
+        height, width, cells = transform_cells(gp.grid.cells, gp.height, gp.width, symmetry)
+        if best is None or (height, width, cells) < best[1:]:
+            best = (symmetry, height, width, cells)
+    return best
+
+
+def _digest(namespace: str, height: int, width: int, cells: bytes) -> str:
+    digest = hashlib.sha256(f'{namespace}|{height}x{width}|'.encode())
+    digest.update(cells)
+    return digest.hexdigest()
+
+
+def solver_namespace(solver: t.Callable[[GeodesyProjection], Solution]) -> str:
+    # the solver function and the settings given to it, so that solvers (or the same solver with another
+    # connector_reach or punch_limit) sharing a cache file do not share entries. Defaults are the ones of
+    # the code, a change of the code needs a namespace of its own (see CachedSolver).
+    func, args, keywords = solver, (), dict()
+    while isinstance(func, functools.partial):
+        args, keywords = func.args + args, {**func.keywords, **keywords}
+        func = func.func
+    name = f'{getattr(func, "__module__", None)}.{getattr(func, "__qualname__", type(func).__qualname__)}'
+    settings = ','.join(f'{k}={v!r}' for k, v in sorted(keywords.items()))
+    return f'punch_limit={PUNCH_LIMIT}|{name}{args!r}|{settings}'
+
+
+def canonical_key(gp: GeodesyProjection, namespace: str = '') -> str:
+    # equal for projections that are rotations or reflections of each other
+    _, height, width, cells = canonical_form(gp)
+    return _digest(namespace, height, width, cells)
+
+
+class SolutionCache:
+    # Best known layout per canonical projection in a local sqlite file. Entries are stored in the
+    # canonical frame and mapped back through the inverse symmetry on a hit. When the file holds more
+    # than max_entries, the least recently used entries are evicted.
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 namespace: str = f'punch_limit={PUNCH_LIMIT}'):
+        self.path = path
+        self.max_entries = max_entries
+        # everything besides the projection that changes the answer: the solver and its settings, see
+        # solver_namespace. Solutions stored under other namespaces are never returned.
+        self.namespace = namespace
+        self.touched: t.Dict[str, int] = dict()  # key -> last_used of the hits not written yet
+        self.hits = 0
+        self.misses = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('CREATE TABLE IF NOT EXISTS solutions ('
+                                'key TEXT PRIMARY KEY, height INTEGER, width INTEGER, cells BLOB, '
+                                'groups_count INTEGER, optimal INTEGER, solver TEXT, last_used INTEGER)')
+        self.connection.execute('CREATE INDEX IF NOT EXISTS solutions_last_used ON solutions (last_used)')
+        self.connection.commit()
+        self.clock = self.connection.execute('SELECT COALESCE(MAX(last_used), 0) FROM solutions').fetchone()[0]
+
+    def _tick(self) -> int:
+        self.clock += 1
+        return self.clock
+
+    def get(self, gp: GeodesyProjection) -> t.Optional[Solution]:
+        symmetry, height, width, cells = canonical_form(gp)
+        key = _digest(self.namespace, height, width, cells)
+        row = self.connection.execute('SELECT cells, groups_count, optimal, solver FROM solutions WHERE key = ?',
+                                      (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            instrumentation.current().count(instrumentation.CACHE_MISSES)
+            return None
+        self.hits += 1
+        instrumentation.current().count(instrumentation.CACHE_HITS)
+        self.touched[key] = self._tick()
+        if len(self.touched) >= TOUCH_FLUSH_INTERVAL:
+            self.flush()
+            self.connection.commit()
+        stored_cells, groups_count, optimal, solver = row
+        cluster_cells = inverse_transform_cells(stored_cells, gp.height, gp.width, symmetry)
+        cluster = Cluster.of_cells(gp.height, gp.width, cluster_cells)
+        score = StickyScore.of_values(groups_count, cluster.get_slime_count(), cluster.get_honey_count())
+        return Solution(cluster, score, optimal=bool(optimal), solver=solver)
+
+    def put(self, gp: GeodesyProjection, solution: Solution) -> bool:
+        # keeps the better of the stored and the new solution, returns True if the new one was stored. A
+        # strictly better key replaces a stored solution, an equal one only if it proves an unproven entry.
+        symmetry, height, width, cells = canonical_form(gp)
+        key = _digest(self.namespace, height, width, cells)
+        row = self.connection.execute('SELECT groups_count, cells, optimal FROM solutions WHERE key = ?',
+                                      (key,)).fetchone()
+        if row is not None:
+            stored = (row[0], len(row[1]) - row[1].count(StickyType.EMTPY.value))
+            if stored < solution.key() or (stored == solution.key() and (row[2] or not solution.optimal)):
+                return False
+        _, _, stored_cells = transform_cells(solution.cluster.grid.cells, gp.height, gp.width, symmetry)
+        self.connection.execute('INSERT OR REPLACE INTO solutions VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                                (key, height, width, stored_cells, solution.score.groups_count,
+                                 int(solution.optimal), solution.solver, self._tick()))
+        self.evict()
+        self.connection.commit()
+        return True
+
+    def flush(self):
+        # writes the last_used of the hits, the caller commits
+        if self.touched:
+            self.connection.executemany('UPDATE solutions SET last_used = ? WHERE key = ?',
+                                        [(tick, key) for key, tick in self.touched.items()])
+            self.touched.clear()
+
+    def evict(self):
+        self.flush()
+        count = self.connection.execute('SELECT COUNT(*) FROM solutions').fetchone()[0]
+        if count > self.max_entries:
+            self.connection.execute('DELETE FROM solutions WHERE key IN '
+                                    '(SELECT key FROM solutions ORDER BY last_used LIMIT ?)',
+                                    (count - self.max_entries,))
+
+    def __len__(self):
+        return self.connection.execute('SELECT COUNT(*) FROM solutions').fetchone()[0]
+
+    def close(self):
+        self.flush()
+        self.connection.commit()
+        self.connection.close()
+
+
+class CachedSolver:
+    # Wraps a solver with a cache. Used as the solver of presolve.solve_decomposed, equal regions (up to
+    # symmetry) of one or many geodes are solved once. Only the path is pickled, so it works in a process pool.
+    # A hit that is not proven optimal is solved again and the better of both is kept, unless rerun_unproven
+    # is False: then every hit is reused as it is, for heuristic solvers that would not find better anyway.
+    # The namespace defaults to solver_namespace(solver), so different solvers can share the cache file. Add
+    # a version to it when the solver code changes its answers.
+
+    def __init__(self, solver: t.Callable[[GeodesyProjection], Solution], path: str = DEFAULT_CACHE_PATH,
+                 max_entries: int = DEFAULT_MAX_ENTRIES, namespace: str = None, rerun_unproven: bool = True):
+        self.solver = solver
+        self.path = path
+        self.max_entries = max_entries
+        self.namespace = solver_namespace(solver) if namespace is None else namespace
+        self.rerun_unproven = rerun_unproven
+        self._cache: t.Optional[SolutionCache] = None
+
+    @property
+    def cache(self) -> SolutionCache:
+        if self._cache is None:
+            self._cache = SolutionCache(self.path, self.max_entries, self.namespace)
+        return self._cache
+
+    def __call__(self, gp: GeodesyProjection) -> Solution:
+        hit = self.cache.get(gp)
+        if hit is not None and (hit.optimal or not self.rerun_unproven):
+            return hit
+        solution = self.solver(gp)
+        self.cache.put(gp, solution)
+        return hit if hit is not None and hit.key() < solution.key() else solution
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state['_cache'] = None
+        return state
@@ -0,0 +1,175 @@
+import random
+import typing as t
+from collections import deque
+from src.v1.classes import Cluster, GeodesyProjection, GeodesyProjectionType, StickyType
+from src.v1.constants import PUNCH_LIMIT
+from src.algorithms.greedy import checkerboard_cells
+from src.algorithms.solution import Solution
+from src.algorithms.utils import neighbour_indexes
+
+
+SLIME = StickyType.SLIME.value
+HONEY = StickyType.HONEY.value
+DEFAULT_ATTEMPTS = 16
+
+Partition = t.List[t.List[int]]  # groups of flat cell indexes
+
+
+class Colouring:
+    def __init__(self, types: t.List[int], conflicts: t.List[t.Tuple[int, int]], exact: bool):
+        self.types = types  # SLIME or HONEY value per group of the partition
+        # adjacent groups of the same type whose merged group is over the punch limit, the partition has to
+        # change around them
+        self.conflicts = conflicts
+        self.exact = exact  # True if the adjacency graph was 2-colourable, no group merged with another
+
+    def cells(self, size: int, groups: Partition) -> bytearray:
+        cells = bytearray(size)
+        for group, value in zip(groups, self.types):
+            for i in group:
+                cells[i] = value
+        return cells
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.exact=} conflicts={len(self.conflicts)})'
+
+
+def adjacency(height: int, width: int, groups: Partition) -> t.List[t.Set[int]]:
+    # the groups that touch each group
+    neighbours = neighbour_indexes(height, width)
+    group_of = dict()
+    for g, group in enumerate(groups):
+        for i in group:
+            group_of[i] = g
+    ret = [set() for _ in groups]
+    for g, group in enumerate(groups):
+        for i in group:
+            for n in neighbours[i]:
+                other = group_of.get(n)
+                if other is not None and other != g:
+                    ret[g].add(other)
+    return ret
+
+
+def two_colour(graph: t.List[t.Set[int]]) -> t.Optional[t.List[int]]:
+    # exact 2-colouring by breadth first search, None if the graph has an odd cycle
+    types = [0] * len(graph)
+    for start in range(len(graph)):
+        if types[start]:
+            continue
+        types[start] = SLIME
+        queue = deque([start])
+        while queue:
+            g = queue.popleft()
+            other = HONEY if types[g] == SLIME else SLIME
+            for n in graph[g]:
+                if not types[n]:
+                    types[n] = other
+                    queue.append(n)
+                elif types[n] != other:
+                    return None
+    return types
+
+
+def dsatur_colour(graph: t.List[t.Set[int]], sizes: t.List[int],
+                  punch_limit: t.Optional[int]) -> t.Tuple[t.List[int], t.List[t.Tuple[int, int]]]:
+    # DSATUR with two colours: the most constrained group (most distinct neighbour colours, then most
+    # neighbours) is coloured next. A group that sees both colours takes the one whose neighbours merge with
+    # it into the smallest group, merges within the punch limit are fine (they even save groups), the others
+    # are reported as conflicts.
+    count = len(graph)
+    types = [0] * count
+    parent = list(range(count))
+    merged_size = list(sizes)
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    conflicts = list()
+    uncoloured = set(range(count))
+    while uncoloured:
+        g = max(uncoloured, key=lambda v: (len({types[n] for n in graph[v] if types[n]}), len(graph[v]), -v))
+        uncoloured.remove(g)
+        options = list()
+        for value in (SLIME, HONEY):
+            roots = {find(n) for n in graph[g] if types[n] == value}
+            options.append((sizes[g] + sum(merged_size[r] for r in roots), value, roots))
+        total, value, roots = min(options)
+        types[g] = value
+        for root in roots:
+            parent[root] = g
+            merged_size[g] += merged_size[root]
+        if punch_limit is not None and total > punch_limit:
+            conflicts.extend((g, n) for n in graph[g] if types[n] == value)
+    return types, conflicts
+
+
+def colour_partition(gp: GeodesyProjection, groups: Partition,
+                     punch_limit: t.Optional[int] = PUNCH_LIMIT) -> Colouring:
+    # second phase: SLIME/HONEY for every group, so that adjacent groups do not stick together
+    graph = adjacency(gp.height, gp.width, groups)
+    types = two_colour(graph)
+    if types is not None:
+        return Colouring(types, [], exact=True)
+    types, conflicts = dsatur_colour(graph, [len(group) for group in groups], punch_limit)
+    return Colouring(types, conflicts, exact=False)
+
+
+def partition(gp: GeodesyProjection, covered: t.Iterable[int] = None, punch_limit: t.Optional[int] = PUNCH_LIMIT,
+              rng: random.Random = None) -> Partition:
+    # First phase: cuts every connected region of the covered cells (flat indexes, the shards by default)
+    # into breadth first pieces of at most punch_limit cells. Whether an EMPTY cell is covered is the only
+    # choice left to a search, the sticky types come from the colouring.
+    neighbours = neighbour_indexes(gp.height, gp.width)
+    if covered is None:
+        shard = GeodesyProjectionType.SHARD.value
+        covered = [i for i, v in enumerate(gp.grid.cells) if v == shard]
+    seeds = sorted(covered)
+    is_covered = set(seeds)
+    if rng is not None:
+        rng.shuffle(seeds)
+    taken = set()
+    groups = list()
+    for seed in seeds:
+        if seed in taken:
+            continue
+        group = list()
+        queue = deque([seed])
+        taken.add(seed)
+        while queue and (punch_limit is None or len(group) < punch_limit):
+            cell = queue.popleft()
+            group.append(cell)
+            candidates = [n for n in neighbours[cell] if n in is_covered and n not in taken]
+            if rng is not None:
+                rng.shuffle(candidates)
+            for n in candidates:
+                taken.add(n)
+                queue.append(n)
+        taken.difference_update(queue)  # reached but not taken, a later group starts there
+        groups.append(group)
+    return groups
+
+
+def solve(gp: GeodesyProjection, punch_limit: t.Optional[int] = PUNCH_LIMIT, covered: t.Iterable[int] = None,
+          attempts: int = DEFAULT_ATTEMPTS, seed: int = 0) -> Solution:
+    # Partitions and colours `attempts` times, a conflict makes the next attempt repartition with another
+    # order. The best conflict free layout wins, the checkerboard is the fallback.
+    rng = random.Random(seed)
+    covered = None if covered is None else list(covered)
+    best: t.Optional[Solution] = None
+    for attempt in range(attempts):
+        groups = partition(gp, covered, punch_limit, None if attempt == 0 else rng)
+        colouring = colour_partition(gp, groups, punch_limit)
+        if colouring.conflicts:
+            continue
+        cluster = Cluster.of_cells(gp.height, gp.width, colouring.cells(gp.height * gp.width, groups))
+        solution = Solution(cluster, cluster.get_score(), solver='colouring')
+        if solution.is_better_than(best):
+            best = solution
+    if best is None:
+        cluster = Cluster.of_cells(gp.height, gp.width, checkerboard_cells(gp))
+        best = Solution(cluster, cluster.get_score(), solver='colouring')
+    return best
@@ -1,7 +1,19 @@
-def solve(gp: GeodesyProjection):
-    cluster = Cluster(height=gp.height, width=gp.width)
-    for h in range(gp.height):
-        for w in range(gp.width):
-            gp_elem = gp.get_elem(h, w)
-            if gp_elem == GeodesyProjectionType.SHARD:
-                cluster.set_elem_tuple((h, w), StickyType.SLIME)
+from src.v1.classes import Cluster, GeodesyProjection, GeodesyProjectionType, StickyType
+from src import instrumentation
+
+
+def solve(gp: GeodesyProjection) -> Cluster:
+    recorder = instrumentation.current()
+    with recorder.phase(instrumentation.SEARCH, solver='earthquake'):
+        cluster = Cluster(height=gp.height, width=gp.width)
+        for h in range(gp.height):
+            for w in range(gp.width):
+                gp_elem = gp.get_elem(h, w)
+                if gp_elem == GeodesyProjectionType.SHARD:
+                    cluster.set_elem_tuple((h, w), StickyType.SLIME)
+    recorder.count(instrumentation.NODES_EXPANDED, gp.height * gp.width)
+    if recorder.enabled:
+        with recorder.phase(instrumentation.VERIFY, solver='earthquake'):
+            if not gp.is_valid_cluster(cluster):
+                recorder.count(instrumentation.INVALID_RESULTS)
+    return cluster
@@ -0,0 +1,188 @@
+import time
+import typing as t
+from src.v1.classes import Cluster, GeodesyProjection, GeodesyProjectionType, StickyScore, StickyType
+from src.v1.constants import PUNCH_LIMIT
+from src.algorithms import greedy
+from src.algorithms.solution import Solution
+from src.algorithms.utils import find_connectors, neighbour_indexes
+
+
+EMPTY = StickyType.EMTPY.value
+SLIME = StickyType.SLIME.value
+HONEY = StickyType.HONEY.value
+NEW_LABEL = -1
+
+# frontier labels (0 = empty cell), sticky type per label, open group size per label
+State = t.Tuple[t.Tuple[int, ...], t.Tuple[int, ...], t.Tuple[int, ...]]
+
+
+class FrontierDPSolver:
+    # Sweeps the grid one cell at a time in row major order. After cell (h, w) the frontier holds the last
+    # `width` cells: (h, 0..w) and (h-1, w+1..width-1). The state is the frontier in canonical form:
+    # which frontier cells share an open group (labels by first appearance), the type of every open group
+    # and its size so far. SLIME and HONEY are interchangeable, so the first label is always SLIME.
+    # Everything behind the frontier only matters through (closed groups, material), so keeping the best
+    # of those per state is exact. States with a group over the punch limit are dropped, states whose lower
+    # bound can not beat the incumbent are pruned, and optionally only the max_states most promising states
+    # are kept per step (which gives up the optimality proof).
+    # Only connector_reach=None is exact. With the default reach of 1 the result is optimal only among the
+    # layouts that use EMPTY cells next to a shard, and it is not claimed optimal.
+
+    def __init__(self, gp: GeodesyProjection,
+                 punch_limit: t.Optional[int] = PUNCH_LIMIT,
+                 connector_reach: t.Optional[int] = 1,
+                 initial: Solution = None,
+                 max_states: t.Optional[int] = None,
+                 time_limit: t.Optional[float] = None):
+        self.gp = gp
+        self.height = gp.height
+        self.width = gp.width
+        self.punch_limit = punch_limit
+        self.max_states = max_states
+        self.time_limit = time_limit
+        self.initial = initial
+        self.exact = connector_reach is None
+        self.truncated = False
+        self.states_expanded = 0
+        self.max_layer_states = 0
+
+        is_connector = find_connectors(gp, connector_reach, neighbour_indexes(self.height, self.width))
+        shard = GeodesyProjectionType.SHARD.value
+        self.domains: t.List[t.Tuple[int, ...]] = [
+            (SLIME, HONEY) if v == shard else (EMPTY, SLIME, HONEY) if is_connector[i] else (EMPTY,)
+            for i, v in enumerate(gp.grid.cells)]
+        # shards after cell i
+        self.remaining_shards = [0] * (len(self.domains) + 1)
+        for i in range(len(self.domains) - 1, -1, -1):
+            self.remaining_shards[i] = self.remaining_shards[i + 1] + (gp.grid.cells[i] == shard)
+
+    def open_groups_bound(self, types: t.Tuple[int, ...], sizes: t.Tuple[int, ...], remaining: int) -> int:
+        open_slime = sum(s for tp, s in zip(types, sizes) if tp == SLIME)
+        open_honey = sum(s for tp, s in zip(types, sizes) if tp == HONEY)
+        if self.punch_limit is None:
+            bound = (open_slime > 0) + (open_honey > 0)
+            return bound if bound or not remaining else 1
+        limit = self.punch_limit
+        return max(-(-open_slime // limit) - (-open_honey // limit),
+                   -(-(open_slime + open_honey + remaining) // limit))
+
+    def beam_key(self, state: State, value: t.Tuple[int, ...], remaining: int) -> t.Tuple[float, int]:
+        # estimate used to pick the states kept by the beam: every open group is counted as a group
+        # and the remaining shards as full groups
+        limit = self.punch_limit or len(self.domains)
+        return value[0] + len(state[1]) + remaining / limit, value[1]
+
+    @staticmethod
+    def canonical(frontier: t.List[int], types: t.Dict[int, int], sizes: t.Dict[int, int]) -> t.Tuple[State, bool]:
+        # returns the state and whether SLIME and HONEY were swapped to get it
+        mapping: t.Dict[int, int] = dict()
+        new_types = list()
+        new_sizes = list()
+        labels = list()
+        for label in frontier:
+            if label == 0:
+                labels.append(0)
+                continue
+            new_label = mapping.get(label)
+            if new_label is None:
+                new_label = mapping[label] = len(mapping) + 1
+                new_types.append(types[label])
+                new_sizes.append(sizes[label])
+            labels.append(new_label)
+        swapped = bool(new_types) and new_types[0] == HONEY
+        if swapped:
+            new_types = [SLIME if tp == HONEY else HONEY for tp in new_types]
+        return (tuple(labels), tuple(new_types), tuple(new_sizes)), swapped
+
+    def transitions(self, i: int, state: State) -> t.Iterator[t.Tuple[int, State, bool, int]]:
+        # yields (value, next state, whether the next state swapped the types, groups closed by the step)
+        frontier, types, sizes = state
+        w = i % self.width
+        up = frontier[w]
+        left = frontier[w - 1] if w > 0 else 0
+        type_of = {label + 1: tp for label, tp in enumerate(types)}
+        size_of = {label + 1: s for label, s in enumerate(sizes)}
+        for value in self.domains[i]:
+            next_frontier = list(frontier)
+            if value == EMPTY:
+                next_frontier[w] = 0
+                merged = ()
+            else:
+                merged = {n for n in (up, left) if n and type_of[n] == value}
+                size = 1 + sum(size_of[n] for n in merged)
+                if self.punch_limit is not None and size > self.punch_limit:
+                    continue
+                if merged:
+                    next_frontier = [NEW_LABEL if label in merged else label for label in next_frontier]
+                next_frontier[w] = NEW_LABEL
+                type_of[NEW_LABEL] = value
+                size_of[NEW_LABEL] = size
+            closed = 1 if up and up not in merged and up not in next_frontier else 0
+            next_state, swapped = self.canonical(next_frontier, type_of, size_of)
+            yield value, next_state, swapped, closed
+
+    def solve(self) -> Solution:
+        deadline = None if self.time_limit is None else time.perf_counter() + self.time_limit
+        incumbent = self.initial if self.initial is not None else greedy.solve(self.gp, self.punch_limit)
+        incumbent_key = incumbent.key()
+
+        size = self.height * self.width
+        start: State = ((0,) * self.width, (), ())
+        layer: t.Dict[State, t.Tuple[int, int]] = {start: (0, 0)}  # state to (closed groups, material)
+        # per cell: (parent index, value, swapped), the value is in the frame of the parent state
+        back_pointers: t.List[t.List[t.Tuple[int, int, bool]]] = list()
+        for i in range(size):
+            if deadline is not None and time.perf_counter() > deadline:
+                self.truncated = True
+                break
+            remaining = self.remaining_shards[i + 1]
+            next_layer: t.Dict[State, t.Tuple[int, int, int, int, bool]] = dict()
+            for parent_index, (state, (closed, material)) in enumerate(layer.items()):
+                self.states_expanded += 1
+                for value, next_state, swapped, closed_add in self.transitions(i, state):
+                    score = (closed + closed_add, material + (value != EMPTY))
+                    bound = (score[0] + self.open_groups_bound(next_state[1], next_state[2], remaining),
+                             score[1] + remaining)
+                    if bound >= incumbent_key:
+                        continue
+                    current = next_layer.get(next_state)
+                    if current is None or score < current[:2]:
+                        next_layer[next_state] = (score[0], score[1], parent_index, value, swapped)
+            if self.max_states is not None and len(next_layer) > self.max_states:
+                self.truncated = True
+                kept = sorted(next_layer.items(), key=lambda item: self.beam_key(item[0], item[1], remaining))
+                next_layer = dict(kept[:self.max_states])
+            self.max_layer_states = max(self.max_layer_states, len(next_layer))
+            back_pointers.append([v[2:] for v in next_layer.values()])
+            layer = {state: (v[0], v[1]) for state, v in next_layer.items()}
+            if not layer:
+                break
+
+        best_index, best_key = None, incumbent_key
+        if len(back_pointers) == size:
+            for index, (state, (closed, material)) in enumerate(layer.items()):
+                key = (closed + len(state[1]), material)
+                if key < best_key:
+                    best_index, best_key = index, key
+        if best_index is None:
+            # nothing beats the incumbent, which is optimal if no state was dropped
+            return Solution(incumbent.cluster, incumbent.score, optimal=self.exact and not self.truncated,
+                            solver='frontier_dp')
+
+        steps = [None] * size
+        index = best_index
+        for i in range(size - 1, -1, -1):
+            index, value, swapped = back_pointers[i][index]
+            steps[i] = (value, swapped)
+        cells = bytearray(size)
+        flipped = False
+        for i, (value, swapped) in enumerate(steps):
+            cells[i] = (HONEY if value == SLIME else SLIME) if flipped and value != EMPTY else value
+            flipped ^= swapped
+        cluster = Cluster.of_cells(self.height, self.width, cells)
+        score = StickyScore.of_values(best_key[0], cluster.get_slime_count(), cluster.get_honey_count())
+        return Solution(cluster, score, optimal=self.exact and not self.truncated, solver='frontier_dp')
+
+
+def solve(gp: GeodesyProjection, **kwargs) -> Solution:
+    return FrontierDPSolver(gp, **kwargs).solve()
@@ -0,0 +1,74 @@
+import random
+import typing as t
+from collections import deque
+from src.v1.classes import Cluster, GeodesyProjection, GeodesyProjectionType, StickyType
+from src.v1.constants import PUNCH_LIMIT
+from src.algorithms.solution import Solution
+from src.algorithms.utils import neighbour_indexes
+
+
+SLIME = StickyType.SLIME.value
+HONEY = StickyType.HONEY.value
+
+
+def greedy_cells(gp: GeodesyProjection, punch_limit: t.Optional[int] = PUNCH_LIMIT,
+                 rng: random.Random = None) -> bytearray:
+    # Covers the shards in breadth first order. Every shard takes the sticky type that joins the most
+    # neighbouring groups without going over the punch limit, so groups grow until they are full.
+    # If both types would break the limit, the smaller group wins and the layout is over the limit.
+    neighbours = neighbour_indexes(gp.height, gp.width)
+    shard = GeodesyProjectionType.SHARD.value
+    shards = [i for i, v in enumerate(gp.grid.cells) if v == shard]
+    if rng is not None:
+        rng.shuffle(shards)
+    cells = bytearray(len(gp.grid.cells))
+    parent: t.Dict[int, int] = dict()
+    size: t.Dict[int, int] = dict()
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    visited = set()
+    for seed in shards:
+        if seed in visited:
+            continue
+        visited.add(seed)
+        queue = deque([seed])
+        while queue:
+            cell = queue.popleft()
+            options = list()
+            for value in (SLIME, HONEY):
+                roots = {find(n) for n in neighbours[cell] if cells[n] == value}
+                merged = 1 + sum(size[r] for r in roots)
+                fits = punch_limit is None or merged <= punch_limit
+                options.append((not fits, -len(roots) if fits else merged, -merged, value, roots))
+            _, _, merged, value, roots = min(options)
+            cells[cell] = value
+            parent[cell] = cell
+            size[cell] = 1
+            for root in roots:
+                parent[root] = cell
+                size[cell] += size[root]
+            for n in neighbours[cell]:
+                if gp.grid.cells[n] == shard and n not in visited:
+                    visited.add(n)
+                    queue.append(n)
+    return cells
+
+
+def checkerboard_cells(gp: GeodesyProjection) -> bytearray:
+    # every shard alone, alternating types, always valid under any punch limit
+    shard = GeodesyProjectionType.SHARD.value
+    return bytearray((SLIME if sum(divmod(i, gp.width)) % 2 == 0 else HONEY) if v == shard else 0
+                     for i, v in enumerate(gp.grid.cells))
+
+
+def solve(gp: GeodesyProjection, punch_limit: t.Optional[int] = PUNCH_LIMIT, seed: int = None) -> Solution:
+    rng = None if seed is None else random.Random(seed)
+    cluster = Cluster.of_cells(gp.height, gp.width, greedy_cells(gp, punch_limit, rng))
+    if punch_limit is not None and any(g.size > punch_limit for g in cluster.group_manager.id_2_group.values()):
+        cluster = Cluster.of_cells(gp.height, gp.width, checkerboard_cells(gp))
+    return Solution(cluster, cluster.get_score(), solver='greedy')
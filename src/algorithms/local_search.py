@@ -0,0 +1,201 @@
+import math
+import random
+import time
+import typing as t
+from src.v1.classes import Cluster, GeodesyProjection, GeodesyProjectionType, StickyScore, StickyType
+from src.v1.constants import PUNCH_LIMIT
+from src.algorithms.bounds import lower_bound
+from src.algorithms.solution import Solution
+from src.algorithms.greedy import checkerboard_cells, greedy_cells
+from src.algorithms.utils import find_connectors, neighbour_indexes
+
+
+DEFAULT_TIME_LIMIT = 0.5  # seconds, shared by all the restarts
+TIME_CHECK_INTERVAL = 256
+OVER_LIMIT_PENALTY = 1.0  # per cell over the punch limit, about the price of a group
+
+Move = t.List[t.Tuple[t.Tuple[int, int], StickyType]]
+
+
+class LocalSearchSolver:
+    # Simulated annealing on a Cluster. The moves are
+    #   flip: give a free cell (a shard or a connector EMPTY cell) another allowed type, this splits, joins
+    #         or bridges groups,
+    #   swap: switch a whole group between SLIME and HONEY, merging it with the groups of the other type
+    #         around it.
+    # The GroupManager keeps the groups exact after every set, so a move is scored by its delta:
+    # groups and material come straight from the cluster, the cells over the punch limit are recounted
+    # only for the groups around the changed cells. Layouts over the limit are allowed during the walk
+    # but penalised, only layouts within the limit become the incumbent. Every new incumbent is also offered
+    # to a shared `incumbent` (see portfolio.SharedIncumbent) if there is one.
+
+    def __init__(self, gp: GeodesyProjection,
+                 punch_limit: t.Optional[int] = PUNCH_LIMIT,
+                 connector_reach: t.Optional[int] = 1,
+                 initial: Cluster = None,
+                 iterations: t.Optional[int] = None,
+                 time_limit: t.Optional[float] = DEFAULT_TIME_LIMIT,
+                 restarts: int = 4,
+                 seed: int = 0,
+                 start_temperature: float = 1.0,
+                 end_temperature: float = 0.02,
+                 swap_rate: float = 0.2,
+                 incumbent=None):
+        if iterations is None and time_limit is None:
+            raise ValueError('Local search needs an iteration or a time budget')
+        self.gp = gp
+        self.height = gp.height
+        self.width = gp.width
+        self.punch_limit = punch_limit
+        self.initial = initial
+        self.iterations = iterations
+        self.time_limit = time_limit
+        self.restarts = max(1, restarts)
+        self.rng = random.Random(seed)
+        self.start_temperature = start_temperature
+        self.end_temperature = end_temperature
+        self.swap_rate = swap_rate
+        self.incumbent = incumbent
+        self.material_weight = 1 / (self.height * self.width + 1)  # material only breaks ties between group counts
+
+        neighbours = neighbour_indexes(self.height, self.width)
+        is_connector = find_connectors(gp, connector_reach, neighbours)
+        sticky = (StickyType.SLIME, StickyType.HONEY)
+        self.domains: t.Dict[t.Tuple[int, int], t.Tuple[StickyType, ...]] = dict()
+        for i, v in enumerate(gp.grid.cells):
+            if v == GeodesyProjectionType.SHARD.value:
+                self.domains[divmod(i, self.width)] = sticky
+            elif is_connector[i]:
+                self.domains[divmod(i, self.width)] = (StickyType.EMTPY,) + sticky
+        self.free_cells = sorted(self.domains)
+        self.iterations_done = 0
+
+        self.best_cells: t.Optional[bytes] = None
+        self.best_key: t.Tuple[float, float] = (math.inf, math.inf)
+        self.target: t.Tuple[float, float] = (-math.inf, -math.inf)  # set by solve, a proven optimum stops it
+
+    def excess(self, cluster: Cluster, coords: t.Iterable[t.Tuple[int, int]]) -> int:
+        # cells over the punch limit in the groups that contain any of the coordinates
+        if self.punch_limit is None:
+            return 0
+        groups = {id(g): g for g in map(cluster.group_manager.get_group_by_coordinate_tuple, coords) if g is not None}
+        return sum(max(0, g.size - self.punch_limit) for g in groups.values())
+
+    def total_excess(self, cluster: Cluster) -> int:
+        if self.punch_limit is None:
+            return 0
+        return sum(max(0, g.size - self.punch_limit) for g in cluster.group_manager.id_2_group.values())
+
+    def energy(self, cluster: Cluster, excess: int) -> float:
+        score = cluster.get_score()
+        return score.groups_count + score.sticky_material * self.material_weight + excess * OVER_LIMIT_PENALTY
+
+    def random_move(self, cluster: Cluster) -> Move:
+        groups = cluster.group_manager.id_2_group
+        if groups and self.rng.random() < self.swap_rate:
+            group = self.rng.choice(list(groups.values()))
+            other = StickyType.HONEY if group.sticky_type is StickyType.SLIME else StickyType.SLIME
+            return [(coord, other) for coord in group.coordinates]
+        coord = self.rng.choice(self.free_cells)
+        current = cluster.get_elem_tuple(coord)
+        return [(coord, self.rng.choice([st for st in self.domains[coord] if st is not current]))]
+
+    def apply(self, cluster: Cluster, move: Move) -> Move:
+        # returns the move that undoes it
+        undo = [(coord, cluster.get_elem_tuple(coord)) for coord, _ in move]
+        for coord, st in move:
+            cluster.set_elem_tuple(coord, st)
+        undo.reverse()
+        return undo
+
+    def affected(self, cluster: Cluster, move: Move) -> t.Set[t.Tuple[int, int]]:
+        ret = set()
+        for coord, _ in move:
+            ret.add(coord)
+            ret.update(cluster.group_manager.get_neighbours(coord))
+        return ret
+
+    def record(self, cluster: Cluster):
+        score = cluster.get_score()
+        key = (score.groups_count, score.sticky_material)
+        if key < self.best_key:
+            self.best_key = key
+            self.best_cells = bytes(cluster.grid.cells)
+            if self.incumbent is not None:
+                self.incumbent.offer(key, self.best_cells)
+
+    def start_cluster(self, restart: int) -> Cluster:
+        if restart == 0 and self.initial is not None:
+            cells = self.initial.grid.cells
+        else:
+            cells = greedy_cells(self.gp, self.punch_limit, None if restart == 0 else self.rng)
+        return Cluster.of_cells(self.height, self.width, cells)
+
+    def anneal(self, cluster: Cluster, iterations: t.Optional[int], deadline: t.Optional[float]):
+        if not self.free_cells:
+            return
+        excess = self.total_excess(cluster)
+        energy = self.energy(cluster, excess)
+        if excess == 0:
+            self.record(cluster)
+        start = time.perf_counter()
+        progress = 0.0
+        ratio = self.end_temperature / self.start_temperature
+        i = 0
+        while True:
+            if iterations is not None:
+                if i >= iterations:
+                    break
+                progress = i / iterations
+            if i % TIME_CHECK_INTERVAL == 0 and self.best_key <= self.target:
+                break
+            if deadline is not None and i % TIME_CHECK_INTERVAL == 0:
+                now = time.perf_counter()
+                if now >= deadline:
+                    break
+                if iterations is None:
+                    progress = (now - start) / (deadline - start)
+            i += 1
+            temperature = self.start_temperature * ratio ** progress
+
+            move = self.random_move(cluster)
+            affected = self.affected(cluster, move)
+            excess_before = self.excess(cluster, affected)
+            checkpoint = cluster.checkpoint()
+            self.apply(cluster, move)
+            new_excess = excess - excess_before + self.excess(cluster, affected)
+            new_energy = self.energy(cluster, new_excess)
+            delta = new_energy - energy
+            if delta <= 0 or self.rng.random() < math.exp(-delta / temperature):
+                energy = new_energy
+                excess = new_excess
+                if excess == 0:
+                    self.record(cluster)
+                cluster.commit(checkpoint)
+            else:
+                cluster.rollback(checkpoint)
+        self.iterations_done += i
+
+    def solve(self) -> Solution:
+        deadline_total = None if self.time_limit is None else time.perf_counter() + self.time_limit
+        self.target = lower_bound(self.gp, punch_limit=self.punch_limit)
+        for restart in range(self.restarts):
+            if self.best_key <= self.target:
+                break
+            iterations = None if self.iterations is None else self.iterations // self.restarts
+            deadline = None
+            if deadline_total is not None:
+                deadline = time.perf_counter() + (deadline_total - time.perf_counter()) / (self.restarts - restart)
+            self.anneal(self.start_cluster(restart), iterations, deadline)
+
+        if self.best_cells is None:
+            # nothing within the punch limit was found, single cell groups always are
+            cluster = Cluster.of_cells(self.height, self.width, checkerboard_cells(self.gp))
+            return Solution(cluster, cluster.get_score(), solver='local_search')
+        cluster = Cluster.of_cells(self.height, self.width, self.best_cells)
+        score = StickyScore.of_values(self.best_key[0], cluster.get_slime_count(), cluster.get_honey_count())
+        return Solution(cluster, score, optimal=self.best_key <= self.target, solver='local_search')
+
+
+def solve(gp: GeodesyProjection, **kwargs) -> Solution:
+    return LocalSearchSolver(gp, **kwargs).solve()
@@ -0,0 +1,116 @@
+import functools
+import typing as t
+from src.grid import CompactGrid
+from src.v1.classes import GeodesyProjection, GeodesyProjectionType
+from src.v1.constants import PUNCH_LIMIT
+from src.v1.mock_geodes import MockGeode
+from src.v1.utils import Axis
+from src.algorithms import greedy
+from src.algorithms.batch import Solver, solve_corpus
+from src.algorithms.bounds import lower_bound
+from src.algorithms.solution import Solution
+
+
+Coordinate3D = t.Tuple[int, int, int]
+
+
+class AxisResult:
+    def __init__(self, axis: Axis, projection: GeodesyProjection, bound: t.Tuple[float, float],
+                 solution: t.Optional[Solution] = None):
+        self.axis = axis
+        self.projection = projection
+        self.bound = bound  # admissible (groups, material), no solution of this axis can be below it
+        self.solution = solution  # None if the axis was not solved
+
+    def key(self) -> t.Tuple[float, float]:
+        return self.solution.key() if self.solution is not None else (float('inf'), float('inf'))
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.axis} {self.bound=} {self.solution=})'
+
+
+@functools.lru_cache(maxsize=None)
+def _column_masks(height: int, width: int) -> t.Tuple[int, int, int]:
+    # one byte per cell: every cell, every cell but the first column, every cell but the last column
+    cells = height * width
+    every = int.from_bytes(b'\x01' * cells, 'little')
+    not_first = int.from_bytes(bytes(int(i % width != 0) for i in range(cells)), 'little')
+    not_last = int.from_bytes(bytes(int(i % width != width - 1) for i in range(cells)), 'little')
+    return every, not_first, not_last
+
+
+def projection_of_buds(height: int, width: int, buds: t.ByteString) -> GeodesyProjection:
+    # `buds` has a 1 byte for every BUD cell. Shards grow on the faces of the buds, the faces along the
+    # projection axis land on the bud itself, so the SHARD cells are the manhattan neighbours of the BUD
+    # cells that are not BUD. The neighbours of all the cells are taken at once by shifting one big int.
+    every, not_first, not_last = _column_masks(height, width)
+    bud = int.from_bytes(buds, 'little')
+    row = 8 * width
+    near = (bud << row) | (bud >> row) | ((bud << 8) & not_first) | ((bud >> 8) & not_last)
+    shard = near & every & ~bud
+    cells = bytearray((bud * GeodesyProjectionType.BUD.value + shard * GeodesyProjectionType.SHARD.value)
+                      .to_bytes(height * width, 'little'))
+    return GeodesyProjection(grid=CompactGrid(height, width, GeodesyProjectionType, cells))
+
+
+def project_buds(shape: t.Tuple[int, int, int], buds: t.Iterable[Coordinate3D]) -> t.Dict[Axis, GeodesyProjection]:
+    # the projections along the three axes, laid out like GeodeMockUtils.get_projection
+    x_size, y_size, z_size = shape
+    px = bytearray(y_size * z_size)
+    py = bytearray(x_size * z_size)
+    pz = bytearray(x_size * y_size)
+    for x, y, z in buds:
+        px[y * z_size + z] = 1
+        py[x * z_size + z] = 1
+        pz[x * y_size + y] = 1
+    return {
+        Axis.X: projection_of_buds(y_size, z_size, px),
+        Axis.Y: projection_of_buds(x_size, z_size, py),
+        Axis.Z: projection_of_buds(x_size, y_size, pz),
+    }
+
+
+def project_geode(geode: MockGeode) -> t.Dict[Axis, GeodesyProjection]:
+    return project_buds(geode.shape, geode.buds)
+
+
+def greedy_estimator(gp: GeodesyProjection, punch_limit: t.Optional[int] = PUNCH_LIMIT) -> Solution:
+    return greedy.solve(gp, punch_limit=punch_limit, seed=0)
+
+
+def estimate_axes(projections: t.Dict[Axis, GeodesyProjection],
+                  estimator: Solver = greedy_estimator,
+                  punch_limit: t.Optional[int] = PUNCH_LIMIT,
+                  workers: t.Optional[int] = 1,
+                  timeout: t.Optional[float] = None) -> t.List[AxisResult]:
+    # Bounds every axis and runs the (fast) estimator, called with punch_limit, on all of them, the cheapest
+    # axis comes first. Three greedy solves take less than starting a process pool, so the axes run in this
+    # process unless more workers are asked for (None: all cores).
+    axes = list(projections)
+    estimator = functools.partial(estimator, punch_limit=punch_limit)
+    results = solve_corpus([projections[axis] for axis in axes], estimator, workers=workers, timeout=timeout)
+    ret = [AxisResult(axis, projections[axis], lower_bound(projections[axis], punch_limit=punch_limit),
+                      result.solution) for axis, result in zip(axes, results)]
+    return sorted(ret, key=lambda r: (r.key(), r.bound))
+
+
+def solve_best_axis(projections: t.Dict[Axis, GeodesyProjection],
+                    solver: Solver,
+                    estimator: Solver = greedy_estimator,
+                    punch_limit: t.Optional[int] = PUNCH_LIMIT,
+                    workers: t.Optional[int] = 1,
+                    timeout: t.Optional[float] = None) -> AxisResult:
+    # Solves the axis with the cheapest estimate with `solver`. Another axis is only solved as well if its
+    # bound is below the best solution so far, the axes that can not win are never solved.
+    candidates = estimate_axes(projections, estimator, punch_limit, workers, timeout)
+    best: t.Optional[AxisResult] = None
+    for candidate in candidates:
+        if best is not None and candidate.bound >= best.key():
+            continue
+        solution = solver(candidate.projection)
+        if candidate.solution is not None and candidate.solution.is_better_than(solution):
+            solution = candidate.solution
+        result = AxisResult(candidate.axis, candidate.projection, candidate.bound, solution)
+        if best is None or result.key() < best.key():
+            best = result
+    return best
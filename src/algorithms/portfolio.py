@@ -0,0 +1,157 @@
+import math
+import multiprocessing
+import os
+import struct
+import time
+import typing as t
+from multiprocessing import connection, shared_memory
+from src.v1.classes import Cluster, GeodesyProjection, StickyScore, StickyType
+from src.v1.constants import PUNCH_LIMIT
+from src.algorithms import greedy
+from src.algorithms.branch_and_bound import BranchAndBoundSolver
+from src.algorithms.local_search import LocalSearchSolver
+from src.algorithms.solution import Solution
+
+
+# Races several solvers on one projection, one process each. The best layout found so far lives in shared
+# memory: every solver offers its improvements there and the exact ones cut their branches against it, so a
+# good layout found by local search prunes the branch and bound of another process. As soon as a solver
+# proves the shared incumbent optimal (it reached the lower bound, or a branch and bound with
+# connector_reach=None ended within its budget) the other processes are terminated.
+
+DEFAULT_TIME_LIMIT = 5.0  # seconds per solver
+WAIT_INTERVAL = 0.05
+Strategy = t.Tuple[str, dict]  # solver name, keyword arguments
+
+# groups count, sticky material (-1 while there is no incumbent), index of the strategy that found it,
+# proven flag, followed by the cells of the layout
+HEADER = struct.Struct('<qqqq')
+
+
+class SharedIncumbent:
+    def __init__(self, size: int, lock, memory: shared_memory.SharedMemory = None):
+        self.size = size
+        self.lock = lock
+        self.owner = memory is None
+        self.memory = shared_memory.SharedMemory(create=True, size=HEADER.size + size) if memory is None else memory
+        self.strategy = -1  # index of the strategy of this process, set in the workers
+        if self.owner:
+            HEADER.pack_into(self.memory.buf, 0, -1, -1, -1, 0)
+
+    def __getstate__(self):
+        # for the spawn start method, forked workers inherit the object
+        return self.size, self.lock, self.memory, self.strategy
+
+    def __setstate__(self, state):
+        self.size, self.lock, self.memory, self.strategy = state
+        self.owner = False
+
+    def _header(self) -> t.Tuple[int, int, int, int]:
+        return HEADER.unpack_from(self.memory.buf, 0)
+
+    def key(self) -> t.Tuple[float, float]:
+        with self.lock:
+            groups_count, material, _, _ = self._header()
+        return (math.inf, math.inf) if groups_count < 0 else (groups_count, material)
+
+    def offer(self, key: t.Tuple[int, int], cells: t.ByteString) -> bool:
+        # returns True if the layout became the incumbent
+        with self.lock:
+            groups_count, material, _, proven = self._header()
+            if groups_count >= 0 and (groups_count, material) <= tuple(key):
+                return False
+            HEADER.pack_into(self.memory.buf, 0, key[0], key[1], self.strategy, proven)
+            self.memory.buf[HEADER.size:HEADER.size + self.size] = bytes(cells)
+            return True
+
+    def prove(self):
+        with self.lock:
+            groups_count, material, strategy, _ = self._header()
+            HEADER.pack_into(self.memory.buf, 0, groups_count, material, strategy, 1)
+
+    @property
+    def proven(self) -> bool:
+        return self._header()[3] == 1
+
+    def read(self) -> t.Tuple[t.Tuple[float, float], int, bool, t.Optional[bytes]]:
+        # (key, strategy index, proven, cells), without the lock: only once the workers are gone
+        groups_count, material, strategy, proven = self._header()
+        if groups_count < 0:
+            return (math.inf, math.inf), strategy, bool(proven), None
+        cells = bytes(self.memory.buf[HEADER.size:HEADER.size + self.size])
+        return (groups_count, material), strategy, bool(proven), cells
+
+    def close(self):
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+
+def default_strategies(workers: t.Optional[int] = None) -> t.List[Strategy]:
+    # one process per worker: local search, the exact search (which starts from greedy itself), greedy for
+    # a quick first incumbent, then local search with other seeds
+    workers = max(1, (os.cpu_count() or 1) if workers is None else workers)
+    strategies = [('local_search', {'seed': 0}), ('branch_and_bound', {}), ('greedy', {})]
+    strategies += [('local_search', {'seed': seed}) for seed in range(1, workers - len(strategies) + 1)]
+    return strategies[:workers]
+
+
+def _run_strategy(gp: GeodesyProjection, incumbent: SharedIncumbent, index: int, strategy: Strategy,
+                  punch_limit: t.Optional[int], time_limit: t.Optional[float]):
+    incumbent.strategy = index
+    name, kwargs = strategy
+    if name == 'greedy':
+        solution = greedy.solve(gp, punch_limit=punch_limit, **kwargs)
+        incumbent.offer(solution.key(), solution.cluster.grid.cells)
+        return
+    if name == 'local_search':
+        solver = LocalSearchSolver(gp, punch_limit=punch_limit, time_limit=time_limit, incumbent=incumbent, **kwargs)
+        if solver.solve().optimal:
+            incumbent.prove()
+        return
+    if name == 'branch_and_bound':
+        solver = BranchAndBoundSolver(gp, punch_limit=punch_limit, time_limit=time_limit, incumbent=incumbent,
+                                      **kwargs)
+        solver.solve()
+        # an exact search that ran to the end found nothing better than the shared incumbent, whoever found it,
+        # with a connector reach only the lower bound proves it
+        if solver.proven or (solver.exact and not solver.exhausted):
+            incumbent.prove()
+        return
+    raise ValueError(f'Unknown portfolio strategy {name!r}')
+
+
+def solve(gp: GeodesyProjection, punch_limit: t.Optional[int] = PUNCH_LIMIT,
+          strategies: t.Sequence[Strategy] = None, workers: t.Optional[int] = None,
+          time_limit: t.Optional[float] = DEFAULT_TIME_LIMIT) -> Solution:
+    strategies = default_strategies(workers) if strategies is None else list(strategies)
+    context = multiprocessing.get_context()
+    incumbent = SharedIncumbent(gp.height * gp.width, context.Lock())
+    processes = [context.Process(target=_run_strategy, args=(gp, incumbent, i, strategy, punch_limit, time_limit),
+                                 daemon=True)
+                 for i, strategy in enumerate(strategies)]
+    try:
+        for process in processes:
+            process.start()
+        # the solvers check their own time limit, this only catches one that does not return
+        deadline = None if time_limit is None else time.perf_counter() + time_limit + 5.0
+        running = list(processes)
+        while running and not incumbent.proven:
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+            connection.wait([p.sentinel for p in running], timeout=WAIT_INTERVAL)
+            running = [p for p in running if p.is_alive()]
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+        key, index, proven, cells = incumbent.read()
+    finally:
+        incumbent.close()
+    solver = f'portfolio:{strategies[index][0]}' if index >= 0 else 'portfolio'
+    if cells is None:
+        cluster = Cluster.of_cells(gp.height, gp.width, greedy.checkerboard_cells(gp))
+        return Solution(cluster, cluster.get_score(), solver=solver)
+    cluster = Cluster.of_cells(gp.height, gp.width, cells)
+    score = StickyScore.of_values(key[0], cells.count(StickyType.SLIME.value), cells.count(StickyType.HONEY.value))
+    return Solution(cluster, score, optimal=proven, solver=solver)
@@ -0,0 +1,104 @@
+import typing as t
+from src.grid import CompactGrid
+from src import instrumentation
+from src.v1.classes import Cluster, GeodesyProjection, GeodesyProjectionType, StickyScore
+from src.algorithms.solution import Solution
+from src.algorithms.utils import find_connectors, neighbour_indexes
+
+
+class Region:
+    # a part of a projection that can be solved on its own, placed at (h_offset, w_offset) of the original
+    def __init__(self, projection: GeodesyProjection, h_offset: int, w_offset: int):
+        self.projection = projection
+        self.h_offset = h_offset
+        self.w_offset = w_offset
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.projection.height}x{self.projection.width} ' \
+               f'at {self.h_offset=} {self.w_offset=})'
+
+
+def crop(gp: GeodesyProjection, margin: int = 1) -> Region:
+    # drops the empty border, keeping `margin` empty cells around the rest for connectors
+    cells = gp.grid.cells
+    empty = GeodesyProjectionType.EMPTY.value
+    rows = [h for h in range(gp.height) if cells[h * gp.width:(h + 1) * gp.width].count(empty) != gp.width]
+    columns = [w for w in range(gp.width) if cells[w::gp.width].count(empty) != gp.height]
+    if not rows:
+        return Region(GeodesyProjection(grid=CompactGrid(0, 0, GeodesyProjectionType)), 0, 0)
+    top, bottom = max(0, rows[0] - margin), min(gp.height, rows[-1] + 1 + margin)
+    left, right = max(0, columns[0] - margin), min(gp.width, columns[-1] + 1 + margin)
+    return Region(GeodesyProjection(grid=gp.grid.crop(top, bottom, left, right)), top, left)
+
+
+def split_regions(gp: GeodesyProjection, connector_reach: t.Optional[int] = 1) -> t.List[Region]:
+    # Groups can only grow through SHARD cells and connector EMPTY cells, so the connected components of
+    # those cells never interact. Every component becomes a region cropped to its bounding box, the cells of
+    # the box that belong to other components are turned into BUD cells so that they stay EMTPY.
+    neighbours = neighbour_indexes(gp.height, gp.width)
+    is_connector = find_connectors(gp, connector_reach, neighbours)
+    shard = GeodesyProjectionType.SHARD.value
+    usable = [v == shard or is_connector[i] for i, v in enumerate(gp.grid.cells)]
+    component = [-1] * len(usable)
+    regions = list()
+    for seed in range(len(usable)):
+        if not usable[seed] or component[seed] != -1 or gp.grid.cells[seed] != shard:
+            continue
+        component_id = len(regions)
+        component[seed] = component_id
+        members = [seed]
+        stack = [seed]
+        while stack:
+            for n in neighbours[stack.pop()]:
+                if usable[n] and component[n] == -1:
+                    component[n] = component_id
+                    members.append(n)
+                    stack.append(n)
+        regions.append(members)
+
+    ret = list()
+    bud = GeodesyProjectionType.BUD.value
+    for component_id, members in enumerate(regions):
+        coordinates = [divmod(i, gp.width) for i in members]
+        top = min(h for h, _ in coordinates)
+        bottom = max(h for h, _ in coordinates) + 1
+        left = min(w for _, w in coordinates)
+        right = max(w for _, w in coordinates) + 1
+        cells = gp.grid.crop(top, bottom, left, right).cells
+        for h in range(top, bottom):
+            for w in range(left, right):
+                if component[h * gp.width + w] != component_id:
+                    cells[(h - top) * (right - left) + (w - left)] = bud
+        grid = CompactGrid(bottom - top, right - left, GeodesyProjectionType, cells)
+        ret.append(Region(GeodesyProjection(grid=grid), top, left))
+    return ret
+
+
+def stitch(gp: GeodesyProjection, regions: t.Sequence[Region], clusters: t.Sequence[Cluster]) -> Cluster:
+    # places the cluster of every region back into one cluster of the size of the projection
+    cells = bytearray(gp.height * gp.width)
+    for region, cluster in zip(regions, clusters):
+        for h in range(cluster.height):
+            start = (region.h_offset + h) * gp.width + region.w_offset
+            row = cluster.grid.cells[h * cluster.width:(h + 1) * cluster.width]
+            for w, value in enumerate(row):
+                if value:
+                    cells[start + w] = value
+    return Cluster.of_cells(gp.height, gp.width, cells)
+
+
+def solve_decomposed(gp: GeodesyProjection,
+                     solver: t.Callable[[GeodesyProjection], Solution],
+                     connector_reach: t.Optional[int] = 1) -> Solution:
+    # Solves every region with `solver` (which should use the same connector_reach) and stitches the results.
+    # With a reach the regions only split the restricted problem, so their proofs do not carry over.
+    recorder = instrumentation.current()
+    with recorder.phase(instrumentation.PRESOLVE):
+        regions = split_regions(gp, connector_reach)
+    solutions = [solver(region.projection) for region in regions]
+    with recorder.phase(instrumentation.PRESOLVE, step='stitch'):
+        cluster = stitch(gp, regions, [s.cluster for s in solutions])
+    score = StickyScore.of_values(sum(s.score.groups_count for s in solutions),
+                                  cluster.get_slime_count(), cluster.get_honey_count())
+    return Solution(cluster, score, optimal=connector_reach is None and all(s.optimal for s in solutions),
+                    solver=solutions[0].solver if solutions else None)
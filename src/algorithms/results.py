@@ -0,0 +1,104 @@
+import hashlib
+import json
+import os
+import typing as t
+from src.v1.classes import GeodesyProjection
+from src.algorithms.batch import BatchResult, Solver, default_solver, solve_corpus
+
+
+# Append-only JSONL results of a batch run, one line per solved geode, written and flushed as soon as the
+# geode is solved. A run started again with the same file skips the geodes that already have a successful
+# result for the same solver version, keyed by geode index and content hash, so an interrupted run resumes
+# where it stopped. Timeouts and errors are written as well but solved again on the next run.
+
+DEFAULT_SOLVER_VERSION = 'local_search/1'  # change it when the default solver gives different results
+
+
+def content_hash(gp: GeodesyProjection) -> str:
+    digest = hashlib.sha256(f'{gp.height}x{gp.width}|'.encode())
+    digest.update(bytes(gp.grid.cells))
+    return digest.hexdigest()
+
+
+def to_record(result: BatchResult, index: int, digest: str, solver_version: str) -> dict:
+    # index is the one of the geode, not the position in the batch that solved it
+    record = {'index': index, 'hash': digest, 'solver_version': solver_version, 'elapsed': result.elapsed}
+    if result.solution is None:
+        record['status'] = 'timeout' if result.timed_out else 'error'
+        if result.error is not None:
+            record['error'] = result.error
+        return record
+    solution = result.solution
+    record.update({
+        'status': 'ok',
+        'groups_count': solution.score.groups_count,
+        'sticky_material': solution.score.sticky_material,
+        'optimal': solution.optimal,
+        'solver': solution.solver,
+        'layout': [[st.value for st in row] for row in solution.cluster.layout],
+    })
+    return record
+
+
+class ResultsLog:
+    def __init__(self, path: str, solver_version: str = DEFAULT_SOLVER_VERSION):
+        self.path = path
+        self.solver_version = solver_version
+        self.done: t.Dict[t.Tuple[int, str], dict] = dict()  # (index, hash) -> record, this solver version
+        if os.path.exists(path):
+            self._load()
+
+    def _load(self):
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        lines = data.split(b'\n')
+        if lines[-1]:
+            # the last write was interrupted, the partial line is cut off so that the next one starts clean
+            with open(self.path, 'r+b') as f:
+                f.truncate(len(data) - len(lines[-1]))
+        for line in lines[:-1]:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record.get('status') == 'ok' and record.get('solver_version') == self.solver_version:
+                self.done[record['index'], record['hash']] = record
+
+    def is_done(self, index: int, digest: str) -> bool:
+        return (index, digest) in self.done
+
+    def append(self, record: dict):
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(record) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        if record['status'] == 'ok' and record['solver_version'] == self.solver_version:
+            self.done[record['index'], record['hash']] = record
+
+
+def solve_resumable(projections: t.Iterable[GeodesyProjection],
+                    path: str,
+                    solver: Solver = default_solver,
+                    solver_version: str = DEFAULT_SOLVER_VERSION,
+                    workers: t.Optional[int] = None,
+                    timeout: t.Optional[float] = None,
+                    on_record: t.Callable[[dict], None] = None) -> t.List[dict]:
+    # Solves the projections without a result in `path` yet (see solve_corpus for the other arguments) and
+    # returns the records of every projection in input order, the ones of earlier runs included.
+    # on_record is called with every new record right after it was written.
+    projections = list(projections)
+    log = ResultsLog(path, solver_version)
+    digests = [content_hash(gp) for gp in projections]
+    pending = [i for i, digest in enumerate(digests) if not log.is_done(i, digest)]
+
+    records = dict()
+
+    def on_result(result: BatchResult):
+        index = pending[result.index]
+        record = to_record(result, index, digests[index], solver_version)
+        log.append(record)
+        records[index] = record
+        if on_record is not None:
+            on_record(record)
+
+    solve_corpus([projections[i] for i in pending], solver, workers, timeout, on_result)
+    return [records.get(i, log.done.get((i, digest))) for i, digest in enumerate(digests)]
@@ -0,0 +1,25 @@
+import typing as t
+from src.v1.classes import Cluster, StickyScore
+
+
+class Solution:
+    def __init__(self, cluster: Cluster, score: StickyScore, optimal: bool = False, solver: str = None):
+        self.cluster = cluster
+        self.score = score
+        self.optimal = optimal  # True only if the solver proved that nothing better exists
+        self.solver = solver
+
+    @classmethod
+    def of_cluster(cls, cluster: Cluster, optimal: bool = False, solver: str = None) -> 'Solution':
+        return cls(cluster, StickyScore(cluster), optimal=optimal, solver=solver)
+
+    def key(self) -> t.Tuple[int, int]:
+        # smaller is better, consistent with StickyScore.is_better_than
+        return self.score.groups_count, self.score.sticky_material
+
+    def is_better_than(self, other: t.Optional['Solution']) -> bool:
+        return other is None or self.score.is_better_than(other.score)
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.solver=} {self.optimal=} ' \
+               f'{self.score.groups_count=} {self.score.sticky_material=})'
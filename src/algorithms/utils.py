@@ -0,0 +1,30 @@
+import typing as t
+from src.grid import neighbour_table
+from src.v1.classes import GeodesyProjection, GeodesyProjectionType
+
+
+def neighbour_indexes(height: int, width: int) -> t.Sequence[t.Tuple[int, ...]]:
+    # manhattan neighbours of every cell of a row major flat grid, shared by everything of that shape
+    return neighbour_table(height, width).by_index
+
+
+def find_connectors(gp: GeodesyProjection, reach: t.Optional[int],
+                    neighbours: t.Sequence[t.Tuple[int, ...]] = None) -> t.List[bool]:
+    # EMPTY cells at most `reach` steps (through EMPTY cells) away from a shard, reach=None means any distance
+    projection = gp.grid.cells
+    if neighbours is None:
+        neighbours = neighbour_indexes(gp.height, gp.width)
+    empty = GeodesyProjectionType.EMPTY.value
+    distance = [0 if v == GeodesyProjectionType.SHARD.value else None for v in projection]
+    frontier = [i for i, d in enumerate(distance) if d == 0]
+    step = 0
+    while frontier and (reach is None or step < reach):
+        step += 1
+        next_frontier = list()
+        for i in frontier:
+            for n in neighbours[i]:
+                if distance[n] is None and projection[n] == empty:
+                    distance[n] = step
+                    next_frontier.append(n)
+        frontier = next_frontier
+    return [projection[i] == empty and distance[i] is not None for i in range(len(projection))]
@@ -0,0 +1,175 @@
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import typing as t
+from src.v1.classes import Cluster, GeodesyProjection, StickyScore, StickyType
+from src.v1.mock_geodes import MockGeodeGenerator
+from src.v1.resources_utils import RESOURCE_GEODES, read_resource_geodes
+from src.algorithms import branch_and_bound, frontier_dp, greedy, local_search
+from src.algorithms.pipeline import project_geode
+
+
+SEED = 0
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.2  # a benchmark more than 20% slower than the baseline is a regression
+
+# a benchmark gets the shared workload and returns the function to time
+Benchmark = t.Callable[['Workload'], t.Callable[[], object]]
+BENCHMARKS: t.Dict[str, Benchmark] = dict()
+
+
+def benchmark(name: str):
+    def register(f: Benchmark) -> Benchmark:
+        BENCHMARKS[name] = f
+        return f
+    return register
+
+
+class Workload:
+    # Fixed inputs shared by the benchmarks, built once and outside of the timed code.
+    # Everything random uses SEED, so two runs time exactly the same work.
+
+    def __init__(self, path: str = RESOURCE_GEODES, geodes: int = 50):
+        self.path = path
+        self.projections: t.List[GeodesyProjection] = read_resource_geodes(path)[:geodes]
+        rng = random.Random(SEED)
+        self.clusters: t.List[Cluster] = [Cluster.of_cells(gp.height, gp.width, greedy.greedy_cells(gp, None, rng))
+                                          for gp in self.projections]
+
+
+@benchmark('parse.read_resource_geodes')
+def bench_parse(workload: Workload):
+    return lambda: read_resource_geodes(workload.path)
+
+
+@benchmark('score.sticky_score')
+def bench_sticky_score(workload: Workload):
+    return lambda: [StickyScore(cluster) for cluster in workload.clusters]
+
+
+@benchmark('verify.is_valid_cluster')
+def bench_is_valid_cluster(workload: Workload):
+    pairs = list(zip(workload.projections, workload.clusters))
+    return lambda: [gp.is_valid_cluster(cluster) for gp, cluster in pairs]
+
+
+@benchmark('groups.set_and_remove')
+def bench_group_manager(workload: Workload):
+    gp = workload.projections[0]
+    rng = random.Random(SEED)
+    values = (StickyType.EMTPY, StickyType.SLIME, StickyType.HONEY)
+    updates = [((rng.randrange(gp.height), rng.randrange(gp.width)), rng.choice(values)) for _ in range(5000)]
+
+    def run():
+        cluster = Cluster(height=gp.height, width=gp.width)
+        for coord, value in updates:
+            cluster.set_elem_tuple(coord, value)
+        return cluster
+    return run
+
+
+@benchmark('mock.generate_and_project')
+def bench_mock(workload: Workload):
+    generator = MockGeodeGenerator(seed=SEED)
+    return lambda: [project_geode(geode) for geode in generator.batch(200)]
+
+
+@benchmark('solve.greedy')
+def bench_greedy(workload: Workload):
+    return lambda: [greedy.solve(gp, seed=SEED) for gp in workload.projections[:20]]
+
+
+@benchmark('solve.local_search')
+def bench_local_search(workload: Workload):
+    # an iteration budget instead of a time budget, so that a faster search shows up as a shorter time
+    return lambda: [local_search.solve(gp, iterations=2000, time_limit=None, seed=SEED)
+                    for gp in workload.projections[:5]]
+
+
+@benchmark('solve.branch_and_bound')
+def bench_branch_and_bound(workload: Workload):
+    return lambda: [branch_and_bound.solve(gp, node_limit=20000, time_limit=None) for gp in workload.projections[:3]]
+
+
+@benchmark('solve.frontier_dp')
+def bench_frontier_dp(workload: Workload):
+    return lambda: [frontier_dp.solve(gp, max_states=50) for gp in workload.projections[:2]]
+
+
+def time_benchmark(run: t.Callable[[], object], repeat: int) -> t.Dict[str, float]:
+    # the minimum is the least noisy estimate of the cost, the median shows how noisy the machine was
+    times = list()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return {'min': min(times), 'median': statistics.median(times), 'repeat': repeat}
+
+
+def run_benchmarks(names: t.Iterable[str] = None, repeat: int = DEFAULT_REPEAT,
+                   workload: Workload = None) -> t.Dict[str, t.Any]:
+    names = list(BENCHMARKS) if names is None else list(names)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        raise ValueError(f'Unknown benchmarks {unknown}, known: {list(BENCHMARKS)}')
+    workload = Workload() if workload is None else workload
+    results = dict()
+    for name in names:
+        results[name] = time_benchmark(BENCHMARKS[name](workload), repeat)
+    return {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'seed': SEED,
+        'results': results,
+    }
+
+
+def compare(current: t.Dict[str, t.Any], baseline: t.Dict[str, t.Any],
+            threshold: float = DEFAULT_THRESHOLD) -> t.List[t.Tuple[str, float, float, float, bool]]:
+    # (name, baseline seconds, current seconds, ratio, is a regression) for the benchmarks present in both runs
+    ret = list()
+    for name, result in current['results'].items():
+        if name not in baseline['results']:
+            continue
+        before = baseline['results'][name]['min']
+        after = result['min']
+        ratio = after / before if before > 0 else float('inf')
+        ret.append((name, before, after, ratio, ratio > 1 + threshold))
+    return ret
+
+
+def main(argv: t.Sequence[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='time the hot paths on fixed workloads')
+    parser.add_argument('names', nargs='*', help=f'benchmarks to run, default: all of {list(BENCHMARKS)}')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--baseline', help='JSON file of an earlier run to compare with')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='allowed slowdown against the baseline, 0.2 means 20%%')
+    args = parser.parse_args(argv)
+
+    current = run_benchmarks(args.names or None, args.repeat)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(current, f, indent=2)
+    if not args.baseline:
+        for name, result in current['results'].items():
+            print(f'{name:32} {result["min"] * 1000:10.2f} ms')
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = 0
+    for name, before, after, ratio, regression in compare(current, baseline, args.threshold):
+        regressions += regression
+        print(f'{name:32} {before * 1000:10.2f} ms -> {after * 1000:10.2f} ms  x{ratio:5.2f}'
+              f'{"  REGRESSION" if regression else ""}')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+import functools
+import typing as t
+
+
+# Grids as python int bitboards, one bit per cell. Every row is followed by one padding bit that is always 0,
+# so shifting a board by one to the left or right never carries a cell into the next row. Cell (h, w) is bit
+# h * stride + w with stride = width + 1.
+
+if hasattr(int, 'bit_count'):
+    def popcount(mask: int) -> int:
+        return mask.bit_count()
+else:
+    def popcount(mask: int) -> int:
+        return bin(mask).count('1')
+
+
+class BoardShape:
+    __slots__ = ('height', 'width', 'stride', 'full', '_tables')
+
+    def __init__(self, height: int, width: int):
+        self.height = height
+        self.width = width
+        self.stride = width + 1
+        row = (1 << width) - 1
+        self.full = sum(row << (h * self.stride) for h in range(height))  # every cell, no padding
+        self._tables: t.Dict[t.Tuple[int, ...], bytes] = dict()
+
+    def bit(self, h: int, w: int) -> int:
+        return 1 << (h * self.stride + w)
+
+    def _table(self, values: t.Tuple[int, ...]) -> bytes:
+        # translates a cell value to b'1' if it is one of `values`, to b'0' otherwise
+        table = self._tables.get(values)
+        if table is None:
+            table = bytes(ord('1') if v in values else ord('0') for v in range(256))
+            self._tables[values] = table
+        return table
+
+    def mask_of(self, cells: t.ByteString, *values: int) -> int:
+        # the cells of a flat row major layout that hold one of `values`
+        if not cells:
+            return 0
+        width = self.width
+        table = self._table(values)
+        digits = b'0'.join(bytes(cells[h * width:(h + 1) * width]) for h in range(self.height)).translate(table)
+        return int(digits[::-1], 2)
+
+    def cells_of(self, masks: t.Iterable[t.Tuple[int, int]]) -> bytearray:
+        # the flat row major layout with `value` in the cells of every (mask, value)
+        cells = bytearray(self.height * self.width)
+        for mask, value in masks:
+            for i in self.indexes(mask):
+                cells[i] = value
+        return cells
+
+    def indexes(self, mask: int) -> t.Iterator[int]:
+        # row major flat indexes of the cells of the mask
+        stride, width = self.stride, self.width
+        while mask:
+            low = mask & -mask
+            h, w = divmod(low.bit_length() - 1, stride)
+            yield h * width + w
+            mask ^= low
+
+    def neighbours(self, mask: int) -> int:
+        # every cell next to a cell of the mask
+        stride = self.stride
+        return ((mask << 1) | (mask >> 1) | (mask << stride) | (mask >> stride)) & self.full
+
+    def flood_fill(self, seed: int, within: int) -> int:
+        # the cells of `within` connected to the seed, a whole ring of the region grows per iteration
+        region = seed & within
+        stride = self.stride
+        while True:
+            grown = (region | (region << 1) | (region >> 1) | (region << stride) | (region >> stride)) & within
+            if grown == region:
+                return region
+            region = grown
+
+    def components(self, mask: int) -> t.Iterator[int]:
+        # the 4-connected components of the mask, ordered by their first cell in row major order
+        while mask:
+            component = self.flood_fill(mask & -mask, mask)
+            yield component
+            mask ^= component
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.height}x{self.width})'
+
+
+@functools.lru_cache(maxsize=1024)
+def board_shape(height: int, width: int) -> BoardShape:
+    return BoardShape(height, width)
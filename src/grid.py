@@ -0,0 +1,154 @@
+import enum
+import functools
+import typing as t
+from array import array
+
+
+GENERIC_ENUM = t.TypeVar("GENERIC_ENUM", bound=enum.Enum)
+NEIGHBOUR_TABLE_CACHE_SIZE = 1024
+
+
+class NeighbourTable:
+    # The manhattan neighbours of every cell of a height x width row major grid, ordered up, left, right, down.
+    # CSR layout: the neighbours of cell i are indexes[offsets[i]:offsets[i + 1]]. by_index (flat indexes) and
+    # coordinates ((h, w) pairs) hold the same per cell as tuples and frozensets for python loops.
+    # Tables are shared by every grid of the shape, never modify them.
+    __slots__ = ('height', 'width', 'offsets', 'indexes', 'by_index', 'coordinates')
+
+    def __init__(self, height: int, width: int):
+        self.height = height
+        self.width = width
+        self.offsets = array('I', [0])
+        self.indexes = array('I')
+        by_index = list()
+        for i in range(height * width):
+            h, w = divmod(i, width)
+            neigh = list()
+            if h > 0:
+                neigh.append(i - width)
+            if w > 0:
+                neigh.append(i - 1)
+            if w < width - 1:
+                neigh.append(i + 1)
+            if h < height - 1:
+                neigh.append(i + width)
+            self.indexes.extend(neigh)
+            self.offsets.append(len(self.indexes))
+            by_index.append(tuple(neigh))
+        self.by_index: t.Tuple[t.Tuple[int, ...], ...] = tuple(by_index)
+        self.coordinates: t.Tuple[t.FrozenSet[t.Tuple[int, int]], ...] = tuple(
+            frozenset(divmod(n, width) for n in neigh) for neigh in by_index)
+
+    def of_coordinate(self, h: int, w: int) -> t.FrozenSet[t.Tuple[int, int]]:
+        return self.coordinates[h * self.width + w]
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.height}x{self.width})'
+
+
+@functools.lru_cache(maxsize=NEIGHBOUR_TABLE_CACHE_SIZE)
+def neighbour_table(height: int, width: int) -> NeighbourTable:
+    return NeighbourTable(height, width)
+
+
+class CompactGrid(t.Generic[GENERIC_ENUM]):
+    # Stores a height x width grid of enum members as one flat bytearray, one byte per cell.
+    # The byte is the value of the member, so the enums used here need the values 0..n-1.
+    __slots__ = ('height', 'width', 'members', 'cells', 'counts')
+
+    _members_cache: t.Dict[t.Type[enum.Enum], t.Tuple[enum.Enum, ...]] = dict()
+
+    def __init__(self, height: int, width: int, enum_type: t.Type[GENERIC_ENUM], cells: bytearray = None):
+        self.height = height
+        self.width = width
+        self.members: t.Tuple[GENERIC_ENUM, ...] = CompactGrid.members_of(enum_type)
+        self.cells = bytearray(height * width) if cells is None else cells
+        if len(self.cells) != height * width:
+            raise ValueError(f'Expected {height * width} cells, got {len(self.cells)}')
+        self.counts: t.List[int] = [self.cells.count(value) for value in range(len(self.members))]
+
+    @staticmethod
+    def members_of(enum_type: t.Type[GENERIC_ENUM]) -> t.Tuple[GENERIC_ENUM, ...]:
+        # members ordered by value, so that members[byte] decodes a cell
+        members = CompactGrid._members_cache.get(enum_type)
+        if members is None:
+            members = tuple(sorted(enum_type, key=lambda m: m.value))
+            if [m.value for m in members] != list(range(len(members))):
+                raise ValueError(f'{enum_type} values must be 0..{len(members) - 1}')
+            CompactGrid._members_cache[enum_type] = members
+        return members
+
+    @classmethod
+    def of_rows(cls, rows: t.Sequence[t.Sequence[GENERIC_ENUM]], enum_type: t.Type[GENERIC_ENUM]) -> 'CompactGrid':
+        height = len(rows)
+        width = 0 if height == 0 else len(rows[0])
+        cells = bytearray(height * width)
+        i = 0
+        for row in rows:
+            if len(row) != width:
+                raise ValueError('All rows of a grid must have the same width')
+            for member in row:
+                cells[i] = member.value
+                i += 1
+        return cls(height, width, enum_type, cells)
+
+    @property
+    def enum_type(self) -> t.Type[GENERIC_ENUM]:
+        return type(self.members[0])
+
+    def index(self, h: int, w: int) -> int:
+        return h * self.width + w
+
+    def coordinate(self, index: int) -> t.Tuple[int, int]:
+        return divmod(index, self.width)
+
+    def get(self, h: int, w: int) -> GENERIC_ENUM:
+        return self.members[self.cells[h * self.width + w]]
+
+    def get_index(self, index: int) -> GENERIC_ENUM:
+        return self.members[self.cells[index]]
+
+    def set(self, h: int, w: int, member: GENERIC_ENUM) -> GENERIC_ENUM:
+        return self.set_index(h * self.width + w, member)
+
+    def set_index(self, index: int, member: GENERIC_ENUM) -> GENERIC_ENUM:
+        # returns the member that was replaced
+        old_value = self.cells[index]
+        new_value = member.value
+        if old_value != new_value:
+            self.cells[index] = new_value
+            self.counts[old_value] -= 1
+            self.counts[new_value] += 1
+        return self.members[old_value]
+
+    def count(self, member: GENERIC_ENUM) -> int:
+        return self.counts[member.value]
+
+    def indexes_of(self, member: GENERIC_ENUM) -> t.Iterator[int]:
+        value = member.value
+        return (i for i, v in enumerate(self.cells) if v == value)
+
+    def row(self, h: int) -> t.List[GENERIC_ENUM]:
+        members = self.members
+        return [members[v] for v in self.cells[h * self.width:(h + 1) * self.width]]
+
+    def rows(self) -> t.List[t.List[GENERIC_ENUM]]:
+        return [self.row(h) for h in range(self.height)]
+
+    def copy(self) -> 'CompactGrid':
+        return CompactGrid(self.height, self.width, self.enum_type, bytearray(self.cells))
+
+    def crop(self, top: int, bottom: int, left: int, right: int) -> 'CompactGrid':
+        # keeps rows top..bottom-1 and columns left..right-1
+        cells = bytearray()
+        for h in range(top, bottom):
+            start = h * self.width
+            cells += self.cells[start + left:start + right]
+        return CompactGrid(bottom - top, right - left, self.enum_type, cells)
+
+    def __eq__(self, other):
+        return isinstance(other, CompactGrid) and self.members == other.members \
+               and self.height == other.height and self.width == other.width and self.cells == other.cells
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.height}x{self.width} {self.enum_type.__name__})'
@@ -0,0 +1,116 @@
+import contextlib
+import json
+import os
+import threading
+import time
+import typing as t
+from collections import Counter, defaultdict
+
+
+# Opt-in counters and phase timers for the solvers.
+#   with instrumentation.recording() as recorder:
+#       solve(gp)
+#   recorder.write_report('report.json') or recorder.write_chrome_trace('trace.json')
+# Outside of `recording` the current recorder is a NullRecorder whose methods do nothing, so instrumented
+# code only pays for a global lookup and an empty call. Hot loops should count locally and report once.
+
+# counter names used across the project
+NODES_EXPANDED = 'nodes_expanded'
+PRUNED = 'pruned'  # suffixed with the reason, e.g. pruned.bound
+MERGE_GROUPS = 'merge_groups'
+SCORE_EVALUATIONS = 'score_evaluations'
+CACHE_HITS = 'cache_hits'
+CACHE_MISSES = 'cache_misses'
+INVALID_RESULTS = 'invalid_results'  # a solver returned a cluster that breaks the projection
+
+# phase names
+PARSE = 'parse'
+PRESOLVE = 'presolve'
+SEARCH = 'search'
+VERIFY = 'verify'
+SOLVE = 'solve'  # one whole solve of a geode in a batch
+
+
+class Recorder:
+    enabled = True
+
+    def __init__(self):
+        self.counters: t.Counter[str] = Counter()
+        self.phase_seconds: t.Dict[str, float] = defaultdict(float)
+        self.phase_calls: t.Counter[str] = Counter()
+        self.events: t.List[dict] = list()  # chrome trace complete events
+        self.origin = time.perf_counter()
+
+    def count(self, name: str, n: int = 1):
+        self.counters[name] += n
+
+    def prune(self, reason: str, n: int = 1):
+        self.counters[f'{PRUNED}.{reason}'] += n
+
+    @contextlib.contextmanager
+    def phase(self, name: str, **args):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self.phase_seconds[name] += end - start
+            self.phase_calls[name] += 1
+            self.events.append({'name': name, 'ph': 'X', 'ts': (start - self.origin) * 1e6,
+                                'dur': (end - start) * 1e6, 'pid': os.getpid(), 'tid': threading.get_ident(),
+                                'args': args})
+
+    def report(self) -> dict:
+        return {
+            'counters': dict(sorted(self.counters.items())),
+            'phases': {name: {'seconds': seconds, 'calls': self.phase_calls[name]}
+                       for name, seconds in sorted(self.phase_seconds.items())},
+        }
+
+    def chrome_trace(self) -> dict:
+        # loads in chrome://tracing and Perfetto, the counters are shown as one counter track at the end
+        end = (time.perf_counter() - self.origin) * 1e6
+        counters = {'name': 'counters', 'ph': 'C', 'ts': end, 'pid': os.getpid(), 'args': dict(self.counters)}
+        return {'traceEvents': self.events + [counters], 'displayTimeUnit': 'ms'}
+
+    def write_report(self, path: str):
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+
+    def write_chrome_trace(self, path: str):
+        with open(path, 'w') as f:
+            json.dump(self.chrome_trace(), f)
+
+
+class NullRecorder:
+    enabled = False
+    _no_phase = contextlib.nullcontext()
+
+    def count(self, name: str, n: int = 1):
+        pass
+
+    def prune(self, reason: str, n: int = 1):
+        pass
+
+    def phase(self, name: str, **args):
+        return self._no_phase
+
+
+NULL_RECORDER = NullRecorder()
+_current: t.Union[Recorder, NullRecorder] = NULL_RECORDER
+
+
+def current() -> t.Union[Recorder, NullRecorder]:
+    return _current
+
+
+@contextlib.contextmanager
+def recording(recorder: Recorder = None) -> t.Iterator[Recorder]:
+    # makes `recorder` (a new one by default) the current recorder until the block ends
+    global _current
+    previous = _current
+    _current = Recorder() if recorder is None else recorder
+    try:
+        yield _current
+    finally:
+        _current = previous
@@ -0,0 +1,329 @@
+import asyncio
+import json
+import os
+import sys
+import threading
+import typing as t
+import multiprocessing
+from src.grid import CompactGrid
+from src.v1.classes import GeodesyProjection, GeodesyProjectionType
+from src.v1.resources_utils import geod_projection_from_string
+from src.algorithms import branch_and_bound, colouring, greedy, local_search
+from src.algorithms.batch import Solver, _solve_one, _to_result
+
+
+# A long running solve service, so that tools calling the solver many times pay the interpreter start-up and
+# the imports once. One JSON object per line in both directions, answers carry the id of their request and
+# may arrive out of order:
+#   {"id": 1, "rows": ["  ..##..", ...]}                  a projection in the resources/geodes.txt format
+#   {"id": 2, "layout": [[0, 2, 1], ...], "solver": "greedy", "deadline": 2.5}
+#   {"cancel": 1}
+# -> {"id": 1, "status": "ok", "layout": [[0, 1, 2], ...], "groups_count": 4, "sticky_material": 17,
+#     "optimal": false, "solver": "local_search", "elapsed": 0.31}
+# The status is one of ok, timeout, cancelled, busy (the queue is full, retry later) and error.
+# The deadline (seconds since the request arrived, DEFAULT_DEADLINE if missing) covers the time in the queue
+# as well. Every solve runs in a child process of its own, at most `workers` at a time, so a timeout or a
+# cancel terminates the solve instead of leaving it running in a shared pool.
+
+SOLVERS: t.Dict[str, Solver] = {
+    'greedy': greedy.solve,
+    'colouring': colouring.solve,
+    'local_search': local_search.solve,
+    'branch_and_bound': branch_and_bound.solve,
+}
+DEFAULT_SOLVER = 'local_search'
+DEFAULT_DEADLINE = 10.0
+DEFAULT_QUEUE_SIZE = 64
+DEADLINE_GRACE = 1.0  # seconds a solve gets past the deadline to stop on its own before it is terminated
+
+
+class RequestError(Exception):
+    pass
+
+
+class Request:
+    def __init__(self, request_id, gp: GeodesyProjection, solver: str, deadline: float,
+                 send: t.Callable[[dict], t.Awaitable[None]]):
+        self.id = request_id
+        self.gp = gp
+        self.solver = solver
+        self.deadline = deadline  # loop time
+        self.send = send
+        self.key = (send, request_id)  # ids are chosen by the clients, so they are only unique per client
+        self.cancelled = False
+        self.queued = True  # waiting in the queue, counts against queue_size
+        self.task: t.Optional[asyncio.Task] = None  # set while a worker solves it
+
+
+def _solve_in_child(sender, solver: Solver, gp: GeodesyProjection, timeout: float):
+    sender.send(_solve_one(solver, 0, gp, timeout))
+    sender.close()
+
+
+def _is_hashable(value) -> bool:
+    # ids come from JSON, lists and objects can not be keys of pending
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
+
+
+async def _discard(message: dict):
+    pass
+
+
+def parse_projection(message: dict) -> GeodesyProjection:
+    if 'rows' in message:
+        return geod_projection_from_string(list(message['rows']))
+    if 'layout' in message:
+        rows = message['layout']
+        width = len(rows[0]) if rows else 0
+        if any(len(row) != width for row in rows):
+            raise RequestError('all rows of a layout must have the same width')
+        try:
+            cells = bytearray(GeodesyProjectionType(v).value for row in rows for v in row)
+        except (TypeError, ValueError) as e:
+            raise RequestError(f'invalid layout: {e}')
+        return GeodesyProjection(grid=CompactGrid(len(rows), width, GeodesyProjectionType, cells))
+    raise RequestError('a request needs "rows" or "layout"')
+
+
+class SolveServer:
+    def __init__(self, workers: t.Optional[int] = None, queue_size: int = DEFAULT_QUEUE_SIZE,
+                 default_deadline: float = DEFAULT_DEADLINE):
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.queue_size = queue_size
+        self.default_deadline = default_deadline
+        self.context = multiprocessing.get_context()
+        # the queue itself is unbounded, cancelled requests stay in it until a dispatcher drops them, only the
+        # live ones waiting in it count against queue_size
+        self.queue: t.Optional[asyncio.Queue] = None
+        self.queued = 0
+        self.pending: t.Dict[t.Tuple[t.Callable, t.Any], Request] = dict()  # queued or running, by key
+        self.answered: t.Optional[asyncio.Condition] = None  # notified whenever a request leaves pending
+        self.dispatchers: t.List[asyncio.Task] = list()
+
+    async def start(self):
+        self.queue = asyncio.Queue()
+        self.answered = asyncio.Condition()
+        self.dispatchers = [asyncio.create_task(self._dispatch()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self.dispatchers:
+            task.cancel()
+        await asyncio.gather(*self.dispatchers, return_exceptions=True)
+
+    async def __aenter__(self) -> 'SolveServer':
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    async def submit(self, message: dict, send: t.Callable[[dict], t.Awaitable[None]]):
+        # handles one message of a client, the answer goes through `send` once it is ready. A client can only
+        # cancel its own requests.
+        if 'cancel' in message:
+            if not _is_hashable(message['cancel']):
+                await send({'id': None, 'status': 'error', 'error': 'the id to cancel must be a string or a number'})
+                return
+            request = self.pending.get((send, message['cancel']))
+            if request is None:
+                return
+            request.cancelled = True
+            if request.task is not None:
+                request.task.cancel()  # answered by the dispatcher
+            else:
+                # still queued, the dispatcher drops it
+                request.queued = False
+                self.queued -= 1
+                await self._remove(request)
+                await request.send({'id': request.id, 'status': 'cancelled'})
+            return
+        request_id = message.get('id')
+        try:
+            if not _is_hashable(request_id):
+                raise RequestError('the id of a request must be a string or a number')
+            if (send, request_id) in self.pending:
+                raise RequestError(f'request {request_id!r} is already pending')
+            solver = message.get('solver', DEFAULT_SOLVER)
+            if solver not in SOLVERS:
+                raise RequestError(f'unknown solver {solver!r}, one of {sorted(SOLVERS)}')
+            gp = parse_projection(message)
+            deadline = float(message.get('deadline', self.default_deadline))
+        except (RequestError, ValueError, TypeError) as e:
+            await send({'id': request_id, 'status': 'error', 'error': str(e)})
+            return
+        if self.queued >= self.queue_size:
+            await send({'id': request_id, 'status': 'busy'})
+            return
+        request = Request(request_id, gp, solver, asyncio.get_running_loop().time() + deadline, send)
+        self.queue.put_nowait(request)
+        self.queued += 1
+        self.pending[request.key] = request
+
+    async def _remove(self, request: Request):
+        if self.pending.get(request.key) is request:
+            del self.pending[request.key]
+        async with self.answered:
+            self.answered.notify_all()
+
+    def has_pending(self, send: t.Callable[[dict], t.Awaitable[None]]) -> bool:
+        return any(key[0] is send for key in self.pending)
+
+    def cancel_all(self, send: t.Callable[[dict], t.Awaitable[None]]):
+        # a client went away, its requests are dropped without an answer
+        for request in list(self.pending.values()):
+            if request.key[0] is send:
+                request.cancelled = True
+                request.send = _discard
+                if request.task is not None:
+                    request.task.cancel()
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            request: Request = await self.queue.get()
+            if request.queued:
+                request.queued = False
+                self.queued -= 1
+            try:
+                if not request.cancelled:
+                    await request.send(await self._run(loop, request))
+            except (ConnectionError, OSError):
+                pass  # the client is gone
+            finally:
+                await self._remove(request)
+                self.queue.task_done()
+
+    async def _run(self, loop: asyncio.AbstractEventLoop, request: Request) -> dict:
+        start = loop.time()
+        remaining = request.deadline - start
+        if remaining <= 0:
+            return {'id': request.id, 'status': 'timeout', 'elapsed': 0.0}
+        receiver, sender = self.context.Pipe(duplex=False)
+        process = self.context.Process(target=_solve_in_child,
+                                       args=(sender, SOLVERS[request.solver], request.gp, remaining), daemon=True)
+        process.start()
+        sender.close()
+        readable = loop.create_future()
+        loop.add_reader(receiver.fileno(), lambda: readable.done() or readable.set_result(None))
+        request.task = asyncio.ensure_future(asyncio.wait_for(readable, remaining + DEADLINE_GRACE))
+        try:
+            await request.task
+            raw = receiver.recv()
+        except asyncio.CancelledError:
+            if not request.cancelled:
+                raise  # the server stops
+            return {'id': request.id, 'status': 'cancelled'}
+        except asyncio.TimeoutError:
+            return {'id': request.id, 'status': 'timeout', 'elapsed': loop.time() - start}
+        except EOFError:
+            return {'id': request.id, 'status': 'error', 'error': 'the solver process ended without a result'}
+        finally:
+            loop.remove_reader(receiver.fileno())
+            receiver.close()
+            if process.is_alive():
+                process.terminate()
+            await loop.run_in_executor(None, process.join)
+        result = _to_result(request.gp, raw)
+        if result.timed_out:
+            return {'id': request.id, 'status': 'timeout', 'elapsed': result.elapsed}
+        if result.solution is None:
+            return {'id': request.id, 'status': 'error', 'error': result.error}
+        solution = result.solution
+        return {
+            'id': request.id,
+            'status': 'ok',
+            'layout': [[st.value for st in row] for row in solution.cluster.layout],
+            'groups_count': solution.score.groups_count,
+            'sticky_material': solution.score.sticky_material,
+            'optimal': solution.optimal,
+            'solver': solution.solver,
+            'elapsed': result.elapsed,
+        }
+
+    async def serve_stream(self, reader: asyncio.StreamReader, write: t.Callable[[bytes], None],
+                           drain: t.Callable[[], t.Awaitable[None]] = None,
+                           closed: t.Awaitable = None):
+        # one client: reads messages until the end of the stream and waits for all of its answers, unless
+        # `closed` (the connection is gone) finishes first
+        lock = asyncio.Lock()
+
+        async def send(message: dict):
+            async with lock:
+                write(json.dumps(message).encode() + b'\n')
+                if drain is not None:
+                    await drain()
+
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            if not line.strip():
+                continue
+            try:
+                message = json.loads(line)
+                if not isinstance(message, dict):
+                    raise ValueError('a request must be a JSON object')
+            except ValueError as e:
+                await send({'id': None, 'status': 'error', 'error': f'invalid request: {e}'})
+                continue
+            await self.submit(message, send)
+
+        async def answered():
+            async with self.answered:
+                await self.answered.wait_for(lambda: not self.has_pending(send))
+
+        waits = [asyncio.ensure_future(answered())]
+        if closed is not None:
+            waits.append(asyncio.ensure_future(closed))
+        try:
+            await asyncio.wait(waits, return_when=asyncio.FIRST_COMPLETED)
+            if self.has_pending(send):
+                self.cancel_all(send)
+        finally:
+            for task in waits:
+                task.cancel()
+
+    async def serve_unix(self, path: str):
+        async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+            try:
+                await self.serve_stream(reader, writer.write, writer.drain, writer.wait_closed())
+            except ConnectionError:
+                pass
+            finally:
+                writer.close()
+
+        server = await asyncio.start_unix_server(handle, path=path)
+        async with server:
+            await server.serve_forever()
+
+    async def serve_stdio(self):
+        # stdin is read by a thread, so that files and terminals work as well as pipes
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader()
+
+        def read():
+            for line in sys.stdin.buffer:
+                loop.call_soon_threadsafe(reader.feed_data, line)
+            loop.call_soon_threadsafe(reader.feed_eof)
+
+        threading.Thread(target=read, daemon=True).start()
+
+        def write(data: bytes):
+            sys.stdout.buffer.write(data)
+            sys.stdout.buffer.flush()
+
+        await self.serve_stream(reader, write)
+
+
+async def serve(socket_path: str = None, workers: t.Optional[int] = None, queue_size: int = DEFAULT_QUEUE_SIZE,
+                default_deadline: float = DEFAULT_DEADLINE):
+    # serves a Unix socket forever, or stdin until it is closed
+    async with SolveServer(workers, queue_size, default_deadline) as server:
+        if socket_path is None:
+            await server.serve_stdio()
+        else:
+            await server.serve_unix(socket_path)
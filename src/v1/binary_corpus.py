@@ -0,0 +1,119 @@
+import mmap
+import struct
+import typing as t
+from src.grid import CompactGrid
+from src.v1.classes import GeodesyProjection, GeodesyProjectionType
+from src.v1.resources_utils import RESOURCE_GEODES, iter_resource_geodes
+
+
+# File layout, all little endian:
+#   header:  magic b'GEOB', version u16, reserved u16, geode count u32
+#   index:   per geode (data offset u64, height u16, width u16)
+#   data:    per geode ceil(height * width / 4) bytes, 2 bits per cell in row major order,
+#            cell k lives in byte k // 4 at bit (k % 4) * 2
+MAGIC = b'GEOB'
+VERSION = 1
+HEADER = struct.Struct('<4sHHI')
+INDEX_ENTRY = struct.Struct('<QHH')
+CELLS_PER_BYTE = 4
+
+
+def pack_cells(cells: t.ByteString) -> bytes:
+    # the 4 cells of every byte are packed at once through big int shifts
+    length = -(-len(cells) // CELLS_PER_BYTE)
+    padded = bytes(cells) + bytes(length * CELLS_PER_BYTE - len(cells))
+    packed = 0
+    for k in range(CELLS_PER_BYTE):
+        packed |= int.from_bytes(padded[k::CELLS_PER_BYTE], 'little') << (2 * k)
+    return packed.to_bytes(length, 'little')
+
+
+def unpack_cells(packed: t.ByteString, count: int) -> bytearray:
+    length = len(packed)
+    value = int.from_bytes(packed, 'little')
+    mask = int.from_bytes(b'\x03' * length, 'little')
+    cells = bytearray(length * CELLS_PER_BYTE)
+    for k in range(CELLS_PER_BYTE):
+        cells[k::CELLS_PER_BYTE] = ((value >> (2 * k)) & mask).to_bytes(length, 'little')
+    del cells[count:]
+    return cells
+
+
+def write_corpus(projections: t.Iterable[GeodesyProjection], path: str) -> int:
+    # returns the number of geodes written
+    entries = list()
+    data = bytearray()
+    for gp in projections:
+        entries.append((len(data), gp.height, gp.width))
+        data += pack_cells(gp.grid.cells)
+    data_start = HEADER.size + INDEX_ENTRY.size * len(entries)
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, len(entries)))
+        for offset, height, width in entries:
+            f.write(INDEX_ENTRY.pack(data_start + offset, height, width))
+        f.write(data)
+    return len(entries)
+
+
+def convert(text_path: str = RESOURCE_GEODES, binary_path: str = 'resources/geodes.bin') -> int:
+    return write_corpus(iter_resource_geodes(text_path), binary_path)
+
+
+class PackedCorpus(t.Sequence[GeodesyProjection]):
+    # Memory maps a packed corpus, a projection is only decoded when it is asked for by index.
+    # Worker processes that open the same file share its pages through the page cache.
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, self.count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f'{path} is not a packed geode corpus of version {VERSION}')
+
+    def shape(self, index: int) -> t.Tuple[int, int]:
+        _, height, width = self._entry(index)
+        return height, width
+
+    def _entry(self, index: int) -> t.Tuple[int, int, int]:
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError(f'geode {index} is out of range, the corpus has {self.count}')
+        return INDEX_ENTRY.unpack_from(self._map, HEADER.size + INDEX_ENTRY.size * index)
+
+    def get_grid(self, index: int) -> CompactGrid[GeodesyProjectionType]:
+        offset, height, width = self._entry(index)
+        count = height * width
+        packed = self._map[offset:offset + -(-count // CELLS_PER_BYTE)]
+        return CompactGrid(height, width, GeodesyProjectionType, unpack_cells(packed, count))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.count))]
+        return GeodesyProjection(grid=self.get_grid(index))
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __getstate__(self):
+        # a corpus sent to a worker process opens the file again there instead of copying it
+        return {'path': self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state['path'])
+
+
+if __name__ == '__main__':
+    print(f'{convert()} geodes written')
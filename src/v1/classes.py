@@ -1,10 +1,12 @@
 import enum
 import typing as t
 from collections import Counter
-from copy import deepcopy
 from src.v1.constants import PUNCH_LIMIT
 from collections import defaultdict
 from src.v1.utils import GridUtils
+from src.grid import CompactGrid, neighbour_table
+from src.bitboard import BoardShape, board_shape
+from src import instrumentation
 
 
 class GeodesyProjectionType(enum.Enum):
@@ -36,6 +38,8 @@ class StickyType(enum.Enum):
 
 
 class Group:
+    _no_bars: t.FrozenSet = frozenset()
+
     def __init__(self, group_id, sticky_type: StickyType):
         self.coordinates: t.Set[t.Tuple[int, int]] = set()
         self.group_id: int = group_id
@@ -50,12 +54,24 @@ class Group:
     def has_bars(self) -> bool:
         return len(self.coord_2_bars) > 0
 
-    def create_bar_from_coordinates(self, c1: t.Tuple, c2: t.Tuple, c3: t.Tuple) -> t.Tuple[t.Tuple, t.Tuple, t.Tuple]:
-        # TODO in order to guarantee the saving and removing, the order is the bars needs to be always the same
+    def bars_through(self, coord_tuple: tuple) -> t.Set[t.Tuple[t.Tuple, t.Tuple, t.Tuple]]:
+        # O(1) time, the returned set must not be modified
+        return self.coord_2_bars.get(coord_tuple, Group._no_bars)
+
+    @staticmethod
+    def create_bar_from_coordinates(c1: t.Tuple, c2: t.Tuple, c3: t.Tuple) -> t.Tuple[t.Tuple, t.Tuple, t.Tuple]:
+        # bars are always sorted, so the same three coordinates always make the same bar
         return tuple(sorted([c1, c2, c3]))
 
+    @staticmethod
+    def candidate_bars(coord_tuple: tuple) -> t.Iterator[t.Tuple[t.Tuple, t.Tuple, t.Tuple]]:
+        # the 6 horizontal and vertical bars that contain the coordinate, already sorted
+        h, w = coord_tuple
+        for start in (-2, -1, 0):
+            yield (h, w + start), (h, w + start + 1), (h, w + start + 2)
+            yield (h + start, w), (h + start + 1, w), (h + start + 2, w)
+
     def save_bar(self, bar: t.Tuple[t.Tuple, t.Tuple, t.Tuple]):
-        # TODO in order to guarantee the saving and removing, the order is the bars needs to be always the same
         self.bars.add(bar)
         for coord in bar:
             self.coord_2_bars[coord].add(bar)
@@ -82,16 +98,16 @@ class Group:
     def add_coordinate_tuple(self, coord_tuple: tuple):
         # O(1) time
         self.coordinates.add(coord_tuple)
-        # TODO
-        # if self.creates_a_bars(coord_tuple):
-        #    self.save_bar()
+        coordinates = self.coordinates
+        for bar in Group.candidate_bars(coord_tuple):
+            if bar[0] in coordinates and bar[1] in coordinates and bar[2] in coordinates:
+                self.save_bar(bar)
 
     def remove_coordinate_tuple(self, coord_tuple: tuple):
         # O(1) time
         self.coordinates.remove(coord_tuple)
-        # TODO
-        # if self.breaks_bars(coord_tuple):
-        #    self.remove_bar()
+        for bar in tuple(self.coord_2_bars.get(coord_tuple, ())):
+            self.remove_bar(bar)
 
     def has_coordinates_tuple(self, coord_tuple: tuple):
         # O(1) time
@@ -102,12 +118,21 @@ class Group:
 
 
 class GroupManager:
+    # Keeps the same type 4-connected groups of a cluster exact under set, clear and type change.
+    # Merges move the smaller group into the larger one and a removal that may disconnect a group runs
+    # interleaved searches from the remaining neighbours, so only the smaller pieces are visited and moved.
+    # Both keep the work proportional to the smaller side, which is amortised logarithmic per cell.
+    # While a checkpoint is open every change is written to the trail as (undo function, *args), so rollback
+    # restores exactly the earlier state (the same group objects and ids) in time proportional to the changes.
     def __init__(self, cluster: 'Cluster'):
         self.new_group_id = 0
         self.cluster = cluster
         self.id_2_group: t.Dict[int, Group] = dict()  # group_id to group
         self.coord_2_group: t.Dict[t.Tuple[int, int], Group] = dict()  # coord (h, w) to group
         self.sticky_type_2_group: t.Dict[StickyType, t.Set[Group]] = defaultdict(set)  # sticky_type
+        self.neighbours = neighbour_table(cluster.height, cluster.width).coordinates
+        self.trail: t.Optional[t.List[tuple]] = None  # None while no checkpoint is open
+        self.marks: t.List[int] = list()  # trail length at every open checkpoint, outermost first
 
     def group_count(self):
         return len(self.id_2_group)
@@ -118,45 +143,187 @@ class GroupManager:
     def get_group_by_group_id(self, group_id: int) -> t.Optional[Group]:
         return self.id_2_group.get(group_id)
 
-    def set_coordinate_tuple(self, coord: t.Tuple[int, int], st: StickyType) -> Group:
-        if coord in self.coord_2_group and self.coord_2_group[coord] != st:
+    def get_bars_through(self, coord: t.Tuple[int, int]) -> t.Set[t.Tuple[t.Tuple, t.Tuple, t.Tuple]]:
+        group = self.coord_2_group.get(coord)
+        return Group._no_bars if group is None else group.bars_through(coord)
+
+    def get_neighbours(self, coord: t.Tuple[int, int]) -> t.FrozenSet[t.Tuple[int, int]]:
+        return self.neighbours[coord[0] * self.cluster.width + coord[1]]
+
+    def create_group(self, st: StickyType) -> Group:
+        group = Group(group_id=self.new_group_id, sticky_type=st)
+        self.new_group_id += 1
+        self._register_group(group)
+        if self.trail is not None:
+            self.trail.append((self._forget_group, group))
+        return group
+
+    def drop_group(self, group: Group):
+        del self.id_2_group[group.group_id]
+        self.sticky_type_2_group[group.sticky_type].remove(group)
+        if self.trail is not None:
+            self.trail.append((self._register_group, group))
+
+    def _register_group(self, group: Group):
+        self.id_2_group[group.group_id] = group
+        self.sticky_type_2_group[group.sticky_type].add(group)
+
+    def _forget_group(self, group: Group):
+        # undoes create_group
+        self.drop_group(group)
+        self.new_group_id = group.group_id
+
+    def _add_coordinate(self, group: Group, coord: t.Tuple[int, int]):
+        group.add_coordinate_tuple(coord)
+        if self.trail is not None:
+            self.trail.append((self._remove_coordinate, group, coord))
+
+    def _remove_coordinate(self, group: Group, coord: t.Tuple[int, int]):
+        group.remove_coordinate_tuple(coord)
+        if self.trail is not None:
+            self.trail.append((self._add_coordinate, group, coord))
+
+    def _set_group_of(self, coord: t.Tuple[int, int], group: t.Optional[Group]):
+        previous = self.coord_2_group.pop(coord, None)
+        if group is not None:
+            self.coord_2_group[coord] = group
+        if self.trail is not None:
+            self.trail.append((self._set_group_of, coord, previous))
+
+    def checkpoint(self) -> int:
+        # returns the depth of the new checkpoint, the outermost one is 0
+        if self.trail is None:
+            self.trail = list()
+        self.marks.append(len(self.trail))
+        return len(self.marks) - 1
+
+    def _close(self, checkpoint: int):
+        # closes the checkpoint and the ones nested in it, the trail is dropped with the outermost one
+        del self.marks[checkpoint:]
+        if not self.marks:
+            self.trail = None
+
+    def rollback(self, checkpoint: int):
+        # undoes every change made since the checkpoint, newest first, and closes it
+        trail = self.trail
+        self.trail = None
+        mark = self.marks[checkpoint]
+        while len(trail) > mark:
+            undo, *args = trail.pop()
+            undo(*args)
+        self.trail = trail
+        self._close(checkpoint)
+
+    def commit(self, checkpoint: int):
+        # keeps the changes made since the checkpoint and closes it. An outer checkpoint can still roll them
+        # back, so the trail is only dropped with the outermost one.
+        self._close(checkpoint)
+
+    def set_coordinate_tuple(self, coord: t.Tuple[int, int], st: StickyType) -> t.Optional[Group]:
+        if st is StickyType.EMTPY:
+            self.remove_coordinate_tuple(coord)
+            return None
+        current = self.coord_2_group.get(coord)
+        if current is not None:
+            if current.sticky_type is st:
+                return current
             self.remove_coordinate_tuple(coord)
 
-        neigh = GridUtils.get_manhattan_neighbour_coordinates(max_height=self.cluster.height,
-                                                              max_width=self.cluster.width,
-                                                              curr_height=coord[0],
-                                                              curr_width=coord[1])
-        # try to add to a group
-        parent_group: t.Optional[Group] = None
-        for n in neigh:
-            if n in self.coord_2_group:
-                neigh_group = self.coord_2_group.get(n)
-                if parent_group:
-                    self.merge_groups(parent_group, neigh_group)
-                else:
-                    neigh_group.add_coordinate_tuple(n)
-                    parent_group = neigh_group
-
-        # if no group found, create a group
-        if not parent_group:
-            parent_group = Group(group_id=self.new_group_id, sticky_type=st)
-            self.new_group_id += 1
-            parent_group.add_coordinate_tuple(coord)
-            self.id_2_group[parent_group.group_id] = parent_group
-            self.coord_2_group[coord] = parent_group
-            self.sticky_type_2_group[st].add(parent_group)
-
+        # only groups of the same sticky type stick together
+        neigh_groups: t.Dict[int, Group] = dict()
+        for n in self.get_neighbours(coord):
+            neigh_group = self.coord_2_group.get(n)
+            if neigh_group is not None and neigh_group.sticky_type is st:
+                neigh_groups[neigh_group.group_id] = neigh_group
+
+        if not neigh_groups:
+            parent_group = self.create_group(st)
+        else:
+            parent_group = max(neigh_groups.values(), key=lambda g: g.size)
+            del neigh_groups[parent_group.group_id]
+        self._add_coordinate(parent_group, coord)
+        self._set_group_of(coord, parent_group)
+        for neigh_group in neigh_groups.values():
+            parent_group = self.merge_groups(parent_group, neigh_group)
         return parent_group
 
     def remove_coordinate_tuple(self, coord: t.Tuple[int, int]):
         # means this coordinate will be StickyType.EMTPY
-        if coord in self.coord_2_group:
-            group = self.coord_2_group.get(coord)
-            group.remove_coordinate_tuple(coord)
-            del self.coord_2_group[coord]
-            self.sticky_type_2_group[group.sticky_type].remove(group)
-            if group.size == 0:
-                del self.id_2_group[group.group_id]
+        group = self.coord_2_group.get(coord)
+        if group is None:
+            return
+        self._set_group_of(coord, None)
+        self._remove_coordinate(group, coord)
+        if group.size == 0:
+            self.drop_group(group)
+            return
+        starts = [n for n in self.get_neighbours(coord) if self.coord_2_group.get(n) is group]
+        if len(starts) > 1:
+            self.split_group(group, starts)
+
+    def split_group(self, group: Group, starts: t.List[t.Tuple[int, int]]):
+        # Interleaved searches, one per start. Searches that meet are joined, a search that runs out of cells
+        # has found a whole piece. We stop as soon as at most one search is still running, that one keeps the
+        # group, every finished piece is moved into a new group.
+        piece_of: t.Dict[t.Tuple[int, int], int] = dict()
+        pieces: t.Dict[int, t.Tuple[t.List[t.Tuple[int, int]], t.Set[t.Tuple[int, int]]]] = dict()  # frontier, cells
+        joined_into: t.Dict[int, int] = dict()
+
+        def root_of(piece_id):
+            while piece_id in joined_into:
+                piece_id = joined_into[piece_id]
+            return piece_id
+
+        for i, start in enumerate(starts):
+            if start in piece_of:
+                continue
+            piece_of[start] = i
+            pieces[i] = ([start], {start})
+        running = set(pieces)
+        finished: t.Set[int] = set()
+        while len(running) > 1:
+            for piece_id in list(running):
+                if piece_id not in running:
+                    continue
+                frontier, cells = pieces[piece_id]
+                if not frontier:
+                    running.remove(piece_id)
+                    finished.add(piece_id)
+                    continue
+                current = frontier.pop()
+                for n in self.get_neighbours(current):
+                    if self.coord_2_group.get(n) is not group:
+                        continue
+                    other = piece_of.get(n)
+                    if other is None:
+                        piece_of[n] = piece_id
+                        cells.add(n)
+                        frontier.append(n)
+                        continue
+                    other = root_of(other)
+                    if other != piece_id:
+                        # the searches met, keep the bigger one
+                        big, small = (piece_id, other) if len(cells) >= len(pieces[other][1]) else (other, piece_id)
+                        pieces[big][0].extend(pieces[small][0])
+                        pieces[big][1].update(pieces[small][1])
+                        joined_into[small] = big
+                        del pieces[small]
+                        running.discard(small)
+                        finished.discard(small)
+                        running.add(big)
+                        piece_id = big
+                        frontier, cells = pieces[big]
+
+        if not running:
+            # every piece is complete, the largest one stays in the group
+            running.add(max(finished, key=lambda p: len(pieces[p][1])))
+            finished -= running
+        for piece_id in finished:
+            new_group = self.create_group(group.sticky_type)
+            for c in pieces[piece_id][1]:
+                self._remove_coordinate(group, c)
+                self._add_coordinate(new_group, c)
+                self._set_group_of(c, new_group)
 
     @staticmethod
     def is_merging_groups_within_punch_limit(group1: Group, group2: Group) -> bool:
@@ -166,45 +333,64 @@ class GroupManager:
     def is_group_valid_for_flying_machine(group: Group):
         return 2 <= group.size <= PUNCH_LIMIT
 
-    def merge_groups(self, group1: Group, group2: Group):
+    def merge_groups(self, group1: Group, group2: Group) -> Group:
+        # moves the smaller group into the larger one and returns the group that survived
+        instrumentation.current().count(instrumentation.MERGE_GROUPS)
+        if group1.size < group2.size:
+            group1, group2 = group2, group1
         for coord in group2.coordinates:
-            self.coord_2_group[coord] = group1
-            group1.add_coordinate_tuple(coord)
-            # group2.remove_coordinate_tuple(coord)  # probably unnecessary, because the group is dropped
-        del self.id_2_group[group2.group_id]
-        self.sticky_type_2_group[group2.sticky_type].remove(group2)
+            self._set_group_of(coord, group1)
+            self._add_coordinate(group1, coord)
+        self.drop_group(group2)
+        return group1
 
 
 class Cluster:
     def __init__(self, layout: t.List[t.List[StickyType]] = None,
                  height: int = None,
                  width: int = None):
-        self.layout = [[StickyType.EMTPY for _ in range(width)] for _ in range(height)]
-        self.sticky_counter = sum(map(Counter, self.layout), Counter())
+        if layout is not None:
+            height = len(layout)
+            width = 0 if height == 0 else len(layout[0])
+        elif height is None or width is None:
+            raise RuntimeError("Wrong init for Cluster")
+        self.grid: CompactGrid[StickyType] = CompactGrid(height, width, StickyType)
         self.height = height
         self.width = width
         self.group_manager = GroupManager(self)
-    # def __init__(self, layout: t.List[t.List[StickyType]] = None,
-    #              height: int = None,
-    #              width: int = None):
-    #     if layout:
-    #         self.layout: t.List[t.List[StickyType]] = layout
-    #         self.sticky_counter = sum(map(Counter, layout), Counter())
-    #         self.height = len(layout)
-    #         self.width = 0 if len(layout) == 0 else len(layout[0])
-    #     elif height is not None and width is not None:
-    #         self.layout = [[StickyType.EMTPY] * width] * height
-    #         self.sticky_counter: t.Dict[StickyType] = Counter()
-    #         self.height = height
-    #         self.width = width
-    #     else:
-    #         raise RuntimeError("Wrong init for StickyLayout")
+        if layout is not None:
+            for h, row in enumerate(layout):
+                for w, st in enumerate(row):
+                    if st is not StickyType.EMTPY:
+                        self.set_elem_tuple((h, w), st)
+
+    @classmethod
+    def of_cells(cls, height: int, width: int, cells: t.ByteString) -> 'Cluster':
+        # builds a cluster from a flat row major layout of StickyType values
+        cluster = cls(height=height, width=width)
+        for i, value in enumerate(cells):
+            if value:
+                cluster.set_elem_tuple(divmod(i, width), cluster.grid.members[value])
+        return cluster
+
+    @property
+    def layout(self) -> t.List[t.List[StickyType]]:
+        # materialised rows, only meant for printing and debugging
+        return self.grid.rows()
+
+    @property
+    def sticky_counter(self) -> t.Counter[StickyType]:
+        return Counter({st: self.grid.count(st) for st in StickyType})
 
     def get_slime_count(self) -> int:
-        return self.sticky_counter[StickyType.SLIME]
+        return self.grid.count(StickyType.SLIME)
 
     def get_honey_count(self) -> int:
-        return self.sticky_counter[StickyType.HONEY]
+        return self.grid.count(StickyType.HONEY)
+
+    def get_score(self) -> 'StickyScore':
+        # the group manager keeps the groups exact, so this needs no flood fill
+        return StickyScore.of_values(self.group_manager.group_count(), self.get_slime_count(), self.get_honey_count())
 
     def get_height(self):
         return self.height
@@ -213,7 +399,7 @@ class Cluster:
         return self.width
 
     def get_elem(self, h, w) -> StickyType:
-        return self.layout[h][w]
+        return self.grid.get(h, w)
 
     def get_elem_tuple(self, coord) -> StickyType:
         return self.get_elem(coord[0], coord[1])
@@ -222,58 +408,74 @@ class Cluster:
         self.set_elem_tuple((h, w), st)
 
     def set_elem_tuple(self, coord, st: StickyType):
-        h, w = coord
-        self.sticky_counter[self.layout[h][w]] -= 1
-        self.sticky_counter[st] += 1
-        self.layout[h][w] = st
+        old = self.grid.set(coord[0], coord[1], st)
+        trail = self.group_manager.trail
+        if trail is not None and old is not st:
+            trail.append((self._set_grid, coord, old))
         self.group_manager.set_coordinate_tuple(coord, st)
 
+    def _set_grid(self, coord, st: StickyType):
+        # undoes the layout part of set_elem_tuple, the groups are restored by their own trail entries
+        self.grid.set(coord[0], coord[1], st)
+
+    def checkpoint(self) -> int:
+        # Starts recording the changes of the layout, the counts and the groups, nested checkpoints are fine.
+        # A backtracking search calls rollback(checkpoint) instead of copying the cluster. Every checkpoint
+        # ends with either rollback or commit.
+        return self.group_manager.checkpoint()
+
+    def rollback(self, checkpoint: int):
+        self.group_manager.rollback(checkpoint)
+
+    def commit(self, checkpoint: int):
+        self.group_manager.commit(checkpoint)
+
     def __repr__(self):
-        r = list()
-        for row in self.layout:
-            r.append(repr(row))
-        return '\n'.join(r)
+        return '\n'.join(repr(self.grid.row(h)) for h in range(self.height))
 
 
 class StickyScore:
     def __init__(self, cluster: Cluster):
+        instrumentation.current().count(instrumentation.SCORE_EVALUATIONS)
         self.groups_count = 0
         self.groups_matrix = None
         self.slime_material = cluster.get_slime_count()
         self.honey_material = cluster.get_honey_count()
         self.calculate_groups(cluster)
 
+    @classmethod
+    def of_values(cls, groups_count: int, slime_material: int, honey_material: int) -> 'StickyScore':
+        # a score that was calculated elsewhere, e.g. by a batch scorer or a solver
+        score = cls.__new__(cls)
+        score.groups_count = groups_count
+        score.groups_matrix = None
+        score.slime_material = slime_material
+        score.honey_material = honey_material
+        return score
+
     @property
     def sticky_material(self):
         return self.slime_material + self.honey_material
 
     @staticmethod
-    def get_manhattan_neighbour_coordinates(max_height, max_width, curr_height, curr_width) -> t.Set[t.Tuple]:
-        ret = ((curr_height+1, curr_width), (curr_height-1, curr_width), (curr_height, curr_width+1), (curr_height, curr_width-1))
-        return {coord for coord in ret if 0 <= coord[0] < max_height and 0 <= coord[1] < max_width}
+    def get_manhattan_neighbour_coordinates(max_height, max_width, curr_height, curr_width) -> t.FrozenSet[t.Tuple]:
+        return GridUtils.get_manhattan_neighbour_coordinates(max_height, max_width, curr_height, curr_width)
 
     def calculate_groups(self, cluster: Cluster):
-        self.groups_matrix = [[0] * cluster.get_width() for _ in range(cluster.get_height())]
-        for h in range(cluster.get_height()):
-            for w in range(cluster.get_width()):
-                curr_type = cluster.get_elem(h, w)
-                if curr_type != StickyType.EMTPY and self.groups_matrix[h][w] == 0:
-                    self.groups_count += 1
-                    coordinates_to_check = [(h, w)]
-                    # mark groups with bfs
-                    while coordinates_to_check:
-                        coord = coordinates_to_check.pop()
-                        if cluster.get_elem(coord[0], coord[1]) == curr_type and self.groups_matrix[coord[0]][coord[1]] == 0:
-                            self.groups_matrix[coord[0]][coord[1]] = self.groups_count
-
-                            neigh_coords = StickyScore.get_manhattan_neighbour_coordinates(cluster.get_height(),
-                                                                                           cluster.get_width(),
-                                                                                           coord[0],
-                                                                                           coord[1])
-
-                            for nc in neigh_coords:
-                                if cluster.get_elem(nc[0], nc[1]) == curr_type and self.groups_matrix[nc[0]][nc[1]] == 0:
-                                    coordinates_to_check.append(nc)
+        # groups are numbered by their first cell in row major order, every group is one bitboard flood fill
+        width = cluster.get_width()
+        self.groups_matrix = [[0] * width for _ in range(cluster.get_height())]
+        shape = board_shape(cluster.get_height(), width)
+        slime = shape.mask_of(cluster.grid.cells, StickyType.SLIME.value)
+        honey = shape.mask_of(cluster.grid.cells, StickyType.HONEY.value)
+        remaining = slime | honey
+        while remaining:
+            first = remaining & -remaining
+            group = shape.flood_fill(first, slime if first & slime else honey)
+            remaining ^= group
+            self.groups_count += 1
+            for i in shape.indexes(group):
+                self.groups_matrix[i // width][i % width] = self.groups_count
 
     def is_better_than(self, other: 'StickyScore') -> bool:
         # better is defined by firstly having less island, secondly by having less overall blocks
@@ -288,68 +490,88 @@ class StickyScore:
 
 
 class GeodesyProjection:
-    def __init__(self, layout: t.List[t.List[GeodesyProjectionType]]):
-        self.initial_layout = deepcopy(layout)
-        self.layout: t.List[t.List[GeodesyProjectionType]] = deepcopy(layout)
+    def __init__(self, layout: t.List[t.List[GeodesyProjectionType]] = None,
+                 grid: CompactGrid[GeodesyProjectionType] = None):
+        if grid is None:
+            grid = CompactGrid.of_rows(layout, GeodesyProjectionType)
+        self.initial_grid: CompactGrid[GeodesyProjectionType] = grid
+        self.grid: CompactGrid[GeodesyProjectionType] = grid
         self.h_offset = 0
         self.w_offset = 0
         #self.reduce_empty_rows()
-        self.height = len(self.layout)
-        self.width = 0 if len(self.layout) == 0 else len(self.layout[0])
+        self.height = self.grid.height
+        self.width = self.grid.width
         self.buds_coordinates = set()
         self.shards_coordinates = set()
         self.empty_coordinates = set()
         self.find_all_coordinates()
 
+    @property
+    def layout(self) -> t.List[t.List[GeodesyProjectionType]]:
+        return self.grid.rows()
+
+    @property
+    def initial_layout(self) -> t.List[t.List[GeodesyProjectionType]]:
+        return self.initial_grid.rows()
+
     def get_elem(self, h, w) -> GeodesyProjectionType:
-        return self.layout[h][w]
+        return self.grid.get(h, w)
 
     def is_valid_cluster(self, cluster: Cluster) -> bool:
-        for bud_coord in self.buds_coordinates:
-            if cluster.get_elem_tuple(bud_coord) != StickyType.EMTPY:
-                return False
-        for shard_coord in self.shards_coordinates:
-            if cluster.get_elem_tuple(shard_coord) == StickyType.EMTPY:
-                return False
-        return True
+        # no sticky block on a bud and one on every shard, as two bitboard tests
+        sticky = self.board_shape.mask_of(cluster.grid.cells, StickyType.SLIME.value, StickyType.HONEY.value)
+        return not sticky & self.bud_mask and not self.shard_mask & ~sticky
 
     def find_all_coordinates(self):
+        self.buds_coordinates.clear()
+        self.shards_coordinates.clear()
+        self.empty_coordinates.clear()
         self.find_coordinates_of(GeodesyProjectionType.BUD)
         self.find_coordinates_of(GeodesyProjectionType.SHARD)
         self.find_coordinates_of(GeodesyProjectionType.EMPTY)
+        self.board_shape: BoardShape = board_shape(self.grid.height, self.grid.width)
+        self.bud_mask = self.board_shape.mask_of(self.grid.cells, GeodesyProjectionType.BUD.value)
+        self.shard_mask = self.board_shape.mask_of(self.grid.cells, GeodesyProjectionType.SHARD.value)
 
     def find_coordinates_of(self, gpt: GeodesyProjectionType):
-        for h in range(self.height):
-            for w in range(self.width):
-                if self.get_elem(h, w).value == gpt.value:
-                    if gpt.value == gpt.BUD.value:
-                        self.buds_coordinates.add((h, w))
-                    elif gpt.value == gpt.SHARD.value:
-                        self.shards_coordinates.add((h, w))
-                    elif gpt.value == gpt.EMPTY.value:
-                        self.empty_coordinates.add((h, w))
+        if gpt is GeodesyProjectionType.BUD:
+            coordinates = self.buds_coordinates
+        elif gpt is GeodesyProjectionType.SHARD:
+            coordinates = self.shards_coordinates
+        else:
+            coordinates = self.empty_coordinates
+        coordinates.update(self.grid.coordinate(i) for i in self.grid.indexes_of(gpt))
 
     def reduce_empty_rows(self):
-        while self.row_is_all_empty(0):
-            self.h_offset += 1
-            self.layout.pop(0)
-        while self.row_is_all_empty(len(self.layout)-1):
-            self.layout.pop()
-        while self.column_is_all_empty(0):
-            self.w_offset += 1
-            for row in self.layout:
-                row.pop(0)
-        while self.column_is_all_empty(len(self.layout[0])-1):
-            for row in self.layout:
-                row.pop(len(self.layout[0])-1)
+        top, bottom = 0, self.grid.height
+        left, right = 0, self.grid.width
+        while top < bottom and self.row_is_all_empty(top):
+            top += 1
+        while bottom > top and self.row_is_all_empty(bottom - 1):
+            bottom -= 1
+        while left < right and self.column_is_all_empty(left):
+            left += 1
+        while right > left and self.column_is_all_empty(right - 1):
+            right -= 1
+        if top == bottom or left == right:
+            top = bottom = left = right = 0
+        if (top, bottom, left, right) != (0, self.grid.height, 0, self.grid.width):
+            self.grid = self.grid.crop(top, bottom, left, right)
+            self.h_offset += top
+            self.w_offset += left
+            self.height = self.grid.height
+            self.width = self.grid.width
+            self.find_all_coordinates()
         if self.h_offset or self.w_offset:
             print(f'Cluster was reduced {self.h_offset=} {self.w_offset=}')
 
     def row_is_all_empty(self, row_number: int) -> bool:
-        return all(e.value == GeodesyProjectionType.EMPTY.value for e in self.layout[row_number])
+        row = self.grid.cells[row_number * self.grid.width:(row_number + 1) * self.grid.width]
+        return row.count(GeodesyProjectionType.EMPTY.value) == len(row)
 
     def column_is_all_empty(self, column_number: int) -> bool:
-        return all(row[column_number].value == GeodesyProjectionType.EMPTY.value for row in self.layout)
+        column = self.grid.cells[column_number::self.grid.width]
+        return column.count(GeodesyProjectionType.EMPTY.value) == len(column)
 
     _repr_mapping = {
         GeodesyProjectionType.BUD: '#',
@@ -358,7 +580,5 @@ class GeodesyProjection:
     }
 
     def __repr__(self):
-        r = list()
-        for row in self.layout:
-            r.append(''.join(GeodesyProjection._repr_mapping[elem] for elem in row))
-        return '\n'.join(r)
+        return '\n'.join(''.join(GeodesyProjection._repr_mapping[elem] for elem in self.grid.row(h))
+                         for h in range(self.height))
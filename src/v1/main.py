@@ -1,34 +1,73 @@
-from classes import *
-from itertools import product
+from src.v1.classes import *
+from src.v1.scoring import BatchStickyScorer
+from src import instrumentation
+from src.algorithms import branch_and_bound
+from itertools import product, islice
 from tests import layouts
 import typing as t
 
 
+BRUTE_FORCE_BATCH_SIZE = 2048
+
+
 def main():
-    calculate_brute_force(GeodesyProjection(layout=layouts.projection_layout_5))
+    solution = branch_and_bound.solve(GeodesyProjection(layout=layouts.projection_layout_5))
+    print(solution)
+    print(solution.cluster)
 
 
-def calculate_brute_force(geodesy_projection: GeodesyProjection):
-    best: t.Optional[Cluster] = None
+def calculate_brute_force(geodesy_projection: GeodesyProjection,
+                          batch_size: int = BRUTE_FORCE_BATCH_SIZE) -> t.Optional[Cluster]:
+    # enumerates all 3^(h*w) layouts, only usable as a reference on tiny projections,
+    # use src.algorithms.branch_and_bound for real geodes
+    height, width = geodesy_projection.height, geodesy_projection.width
+    recorder = instrumentation.current()
+    scorer = BatchStickyScorer(height, width)
+    best_cells: t.Optional[bytes] = None
     best_scoring: t.Optional[StickyScore] = None
+    scored = 0
 
-    for cluster_layout in variations(StickyType, geodesy_projection.height, geodesy_projection.width):
-        cluster = Cluster(layout=cluster_layout)
-        if geodesy_projection.is_valid_cluster(cluster):
-            if best is None:
-                print(f"Found first \n{cluster}\n")
-                best = cluster
-                best_scoring = StickyScore(cluster)
-            else:
-                curr = StickyScore(cluster)
-                if curr.is_better_than(best_scoring):
-                    print(f"Found better \n{cluster}\n")
-                    best = cluster
+    candidates = (cells for cells in cell_variations(height, width)
+                  if is_valid_cells(geodesy_projection, cells))
+    with recorder.phase(instrumentation.SEARCH, solver='brute_force'):
+        while True:
+            batch = list(islice(candidates, batch_size))
+            if not batch:
+                break
+            scored += len(batch)
+            for cells, curr in zip(batch, scorer.score_cells(batch)):
+                if best_scoring is None:
+                    print(f"Found first \n{Cluster.of_cells(height, width, cells)}\n")
+                    best_cells = cells
                     best_scoring = curr
+                elif curr.is_better_than(best_scoring):
+                    print(f"Found better \n{Cluster.of_cells(height, width, cells)}\n")
+                    best_cells = cells
+                    best_scoring = curr
+    # counted once at the end, the enumeration itself stays free of instrumentation
+    recorder.count(instrumentation.NODES_EXPANDED, 3 ** (height * width))
+    recorder.prune('projection', 3 ** (height * width) - scored)
 
+    best = None if best_cells is None else Cluster.of_cells(height, width, best_cells)
+    if best is not None and recorder.enabled:
+        with recorder.phase(instrumentation.VERIFY, solver='brute_force'):
+            if not geodesy_projection.is_valid_cluster(best):
+                recorder.count(instrumentation.INVALID_RESULTS)
     print('best:')
     print(best_scoring)
     print(best)
+    return best
+
+
+def is_valid_cells(geodesy_projection: GeodesyProjection, cells: t.ByteString) -> bool:
+    # same as GeodesyProjection.is_valid_cluster, but on a flat layout
+    for h, w in geodesy_projection.buds_coordinates:
+        if cells[h * geodesy_projection.width + w] != StickyType.EMTPY.value:
+            return False
+    for h, w in geodesy_projection.shards_coordinates:
+        if cells[h * geodesy_projection.width + w] == StickyType.EMTPY.value:
+            return False
+    return True
 
 
 def variations(items, height, width):
@@ -36,6 +75,13 @@ def variations(items, height, width):
         yield [list(one[i*width:(i+1)*width]) for i in range(height)]
 
 
+def cell_variations(height, width) -> t.Iterator[bytes]:
+    # the same enumeration as variations(StickyType, ...), as flat layouts for the batch scorer
+    values = [st.value for st in StickyType]
+    for one in product(values, repeat=width*height):
+        yield bytes(one)
+
+
 if __name__ == '__main__':
     main()
     #for mtx in variations(StickyType, 2, 2):
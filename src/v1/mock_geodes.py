@@ -0,0 +1,81 @@
+import random
+import typing as t
+from src.grid import CompactGrid
+from src.v1.utils import Axis, GeodBlockType, GeodeMockUtils
+
+
+BUD = GeodBlockType.BUDDING_AMETHYST.value
+AIR = GeodBlockType.AIR.value
+
+
+class MockGeode:
+    # A generated geode as a flat x-major volume (index (x * y_size + y) * z_size + z) of GeodBlockType values,
+    # with its three projections, which are shaped like the ones of GeodeMockUtils.get_projection:
+    #   X: y rows and z columns, Y: x rows and z columns, Z: x rows and y columns
+    __slots__ = ('x_size', 'y_size', 'z_size', 'buds', 'volume', 'projections')
+
+    def __init__(self, x_size: int, y_size: int, z_size: int, buds: t.Iterable[t.Tuple[int, int, int]]):
+        self.x_size = x_size
+        self.y_size = y_size
+        self.z_size = z_size
+        self.volume = bytearray([AIR]) * (x_size * y_size * z_size)
+        px = bytearray([AIR]) * (y_size * z_size)
+        py = bytearray([AIR]) * (x_size * z_size)
+        pz = bytearray([AIR]) * (x_size * y_size)
+        # the buds are sparse, so one pass over them fills the volume and reduces it on all three axes
+        self.buds = list()
+        for x, y, z in buds:
+            if not (0 <= x < x_size and 0 <= y < y_size and 0 <= z < z_size):
+                continue
+            self.buds.append((x, y, z))
+            self.volume[(x * y_size + y) * z_size + z] = BUD
+            px[y * z_size + z] = BUD
+            py[x * z_size + z] = BUD
+            pz[x * y_size + y] = BUD
+        self.projections: t.Dict[Axis, CompactGrid[GeodBlockType]] = {
+            Axis.X: CompactGrid(y_size, z_size, GeodBlockType, px),
+            Axis.Y: CompactGrid(x_size, z_size, GeodBlockType, py),
+            Axis.Z: CompactGrid(x_size, y_size, GeodBlockType, pz),
+        }
+
+    @property
+    def shape(self) -> t.Tuple[int, int, int]:
+        return self.x_size, self.y_size, self.z_size
+
+    def get(self, x: int, y: int, z: int) -> GeodBlockType:
+        return GeodBlockType(self.volume[(x * self.y_size + y) * self.z_size + z])
+
+    def to_nested(self) -> t.List[t.List[t.List[GeodBlockType]]]:
+        # the layout of GeodeMockUtils.generate_mock_geode
+        members = (GeodBlockType.BUDDING_AMETHYST, GeodBlockType.AIR)
+        yz = self.y_size * self.z_size
+        return [[[members[v] for v in self.volume[x * yz + y * self.z_size:x * yz + (y + 1) * self.z_size]]
+                 for y in range(self.y_size)] for x in range(self.x_size)]
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.x_size}x{self.y_size}x{self.z_size} buds={len(self.buds)})'
+
+
+class MockGeodeGenerator:
+    # Reproducible mock geodes with the distribution of GeodeMockUtils. Geode `index` of a seed only depends on
+    # the seed and the index, so any part of a corpus can be generated again on its own (or in another process).
+
+    def __init__(self, seed: int = 0,
+                 min_x: int = GeodeMockUtils.MIN_X, min_y: int = GeodeMockUtils.MIN_Y, min_z: int = GeodeMockUtils.MIN_Z,
+                 max_x: int = GeodeMockUtils.MAX_X, max_y: int = GeodeMockUtils.MAX_Y, max_z: int = GeodeMockUtils.MAX_Z):
+        self.seed = seed
+        self.bounds = (min_x, min_y, min_z, max_x, max_y, max_z)
+
+    def rng(self, index: int) -> random.Random:
+        return random.Random(f'{self.seed}:{index}')
+
+    def generate(self, index: int) -> MockGeode:
+        x, y, z, buds = GeodeMockUtils.generate_mock_buds(*self.bounds, rng=self.rng(index))
+        return MockGeode(x, y, z, buds)
+
+    def iter_batch(self, count: int, start: int = 0) -> t.Iterator[MockGeode]:
+        for index in range(start, start + count):
+            yield self.generate(index)
+
+    def batch(self, count: int, start: int = 0) -> t.List[MockGeode]:
+        return list(self.iter_batch(count, start))
@@ -1,39 +1,96 @@
 import typing as t
+from src.grid import CompactGrid
+from src import instrumentation
 from src.v1.classes import GeodesyProjectionType, GeodesyProjection
 
 
+RESOURCE_GEODES = 'resources/geodes.txt'
+
 test_resources_mapping = {
     '#': GeodesyProjectionType.BUD,
     '.': GeodesyProjectionType.SHARD,
     ' ': GeodesyProjectionType.EMPTY,
 }
 
+# byte translation table: a cell character to its GeodesyProjectionType value, 255 for anything else.
+# The line break decodes to one more EMPTY cell, like it always did.
+_INVALID_CELL = 255
+_decode_table = bytearray([_INVALID_CELL]) * 256
+for _char, _gpt in test_resources_mapping.items():
+    _decode_table[ord(_char)] = _gpt.value
+_decode_table[ord('\n')] = GeodesyProjectionType.EMPTY.value
+_DECODE_TABLE = bytes(_decode_table)
+
 
 def is_line_empty(line: str):
     # return line.replace(' ', '').replace('\n', '') == ''
     return line == '\n'
 
 
+def decode_line(line: str) -> bytes:
+    # every cell is two characters wide, so one slice and one translate decode the whole row
+    if not line.endswith('\n'):
+        line += '\n'
+    row = line.encode('ascii')[0::2].translate(_DECODE_TABLE)
+    if _INVALID_CELL in row:
+        raise ValueError(f'Unknown cell in geode line {line!r}')
+    return row
+
+
 def geod_projection_from_string(geod: t.List[str]) -> GeodesyProjection:
-    layout: t.List[t.List[GeodesyProjectionType]] = list()
-    for line in geod:
-        line = line.replace('..', '.')
-        line = line.replace('##', '#')
-        line = line.replace('  ', ' ')
-        line = line.replace('\n', ' ')
-        layout.append([test_resources_mapping[c] for c in line])
-    return GeodesyProjection(layout=layout)
-
-
-def read_resource_geodes() -> t.List[GeodesyProjection]:
-    with open('resources/geodes.txt', 'r') as f:
-        gp_list = list()
+    rows = [decode_line(line) for line in geod]
+    width = len(rows[0]) if rows else 0
+    if any(len(row) != width for row in rows):
+        raise ValueError('All lines of a geode must have the same width')
+    grid = CompactGrid(len(rows), width, GeodesyProjectionType, bytearray().join(rows))
+    return GeodesyProjection(grid=grid)
+
+
+def iter_geode_blocks(path: str = RESOURCE_GEODES) -> t.Iterator[t.List[str]]:
+    # yields the raw lines of every geode, reading the file incrementally and decoding nothing
+    with open(path, 'r') as f:
         geod = list()
-        for line in f.readlines():
+        for line in f:
             if not is_line_empty(line):
                 geod.append(line)
-            if is_line_empty(line) and geod:
-                gp_list.append(geod_projection_from_string(geod))
+            elif geod:
+                yield geod
                 geod = list()
-        return gp_list
+        if geod:
+            yield geod
+
+
+def iter_resource_geodes(path: str = RESOURCE_GEODES,
+                         indexes: t.Union[slice, t.Iterable[int], None] = None,
+                         where: t.Callable[[GeodesyProjection], bool] = None) -> t.Iterator[GeodesyProjection]:
+    # Lazily yields the projections of the file. Only the geodes selected by `indexes` (a slice or the
+    # positions in the file) are decoded, and reading stops after the last selected one.
+    # `where` filters the decoded projections.
+    is_selected, last = _index_selector(indexes)
+    for i, block in enumerate(iter_geode_blocks(path)):
+        if last is not None and i > last:
+            return
+        if not is_selected(i):
+            continue
+        with instrumentation.current().phase(instrumentation.PARSE, geode=i):
+            gp = geod_projection_from_string(block)
+        if where is None or where(gp):
+            yield gp
+
+
+def _index_selector(indexes: t.Union[slice, t.Iterable[int], None]) -> t.Tuple[t.Callable[[int], bool],
+                                                                                t.Optional[int]]:
+    # (is the geode at this position selected, last selected position or None if it runs to the end)
+    if indexes is None:
+        return lambda i: True, None
+    if isinstance(indexes, slice):
+        start, stop, step = indexes.start or 0, indexes.stop, indexes.step or 1
+        if start < 0 or stop is not None and stop < 0 or step < 0:
+            raise ValueError('Negative slices need the whole file, use read_resource_geodes')
+        return lambda i: i >= start and (i - start) % step == 0, None if stop is None else stop - 1
+    selected = set(indexes)
+    return selected.__contains__, max(selected, default=-1)
+
 
+def read_resource_geodes(path: str = RESOURCE_GEODES) -> t.List[GeodesyProjection]:
+    return list(iter_resource_geodes(path))
@@ -2,11 +2,14 @@ import typing as t
 import random
 import enum
 import math
+from src.grid import neighbour_table
 
 
 class GridUtils:
     @staticmethod
-    def get_manhattan_neighbour_coordinates(max_height, max_width, curr_height, curr_width) -> t.Set[t.Tuple]:
+    def get_manhattan_neighbour_coordinates(max_height, max_width, curr_height, curr_width) -> t.FrozenSet[t.Tuple]:
+        if 0 <= curr_height < max_height and 0 <= curr_width < max_width:
+            return neighbour_table(max_height, max_width).coordinates[curr_height * max_width + curr_width]
         ret = ((curr_height + 1, curr_width), (curr_height - 1, curr_width), (curr_height, curr_width + 1),
                (curr_height, curr_width - 1))
         return {coord for coord in ret if 0 <= coord[0] < max_height and 0 <= coord[1] < max_width}
@@ -37,10 +40,21 @@ class GeodeMockUtils:
 
     @staticmethod
     def generate_mock_geode(min_x=MIN_X, min_y=MIN_Y, min_z=MIN_Z,
-                            max_x=MAX_X, max_y=MAX_Y, max_z=MAX_Z):
-        x = random.randint(min_x, max_x)
-        y = random.randint(min_y, max_y)
-        z = random.randint(min_z, max_z)
+                            max_x=MAX_X, max_y=MAX_Y, max_z=MAX_Z, rng=random):
+        x, y, z, buds_coords = GeodeMockUtils.generate_mock_buds(min_x, min_y, min_z, max_x, max_y, max_z, rng)
+        geode = [[[GeodBlockType.AIR for _ in range(z)] for _ in range(y)] for _ in range(x)]
+        for x, y, z in buds_coords:
+            geode[x][y][z] = GeodBlockType.BUDDING_AMETHYST
+
+        return geode
+
+    @staticmethod
+    def generate_mock_buds(min_x=MIN_X, min_y=MIN_Y, min_z=MIN_Z,
+                           max_x=MAX_X, max_y=MAX_Y, max_z=MAX_Z, rng=random):
+        # the size of a mock geode and the coordinates of its buds, without building the geode
+        x = rng.randint(min_x, max_x)
+        y = rng.randint(min_y, max_y)
+        z = rng.randint(min_z, max_z)
         volume = x * y * z
         max_volume = GeodeMockUtils.MAX_X * GeodeMockUtils.MAX_Y * GeodeMockUtils.MAX_Z
         min_volume = GeodeMockUtils.MIN_X * GeodeMockUtils.MIN_Y * GeodeMockUtils.MIN_Z
@@ -48,28 +62,22 @@ class GeodeMockUtils:
                                  * (GeodeMockUtils.BUD_SPAWN_SUCCESS_RATE_MAX - GeodeMockUtils.BUD_SPAWN_SUCCESS_RATE_MIN)
         bud_spawn_success_rate += GeodeMockUtils.BUD_SPAWN_SUCCESS_RATE_MIN
 
-        geode = [[[GeodBlockType.AIR for _ in range(z)] for _ in range(y)] for _ in range(x)]
-
         geode_centre = (x//2, y//2, z//2)
         bud_radius = (x - geode_centre[0]) // (1 / GeodeMockUtils.BUD_DISTANCE_FROM_CENTRE)
 
-        buds_coords = [GeodeMockUtils.get_random_point_on_a_sphere(geode_centre, bud_radius)
+        buds_coords = [GeodeMockUtils.get_random_point_on_a_sphere(geode_centre, bud_radius, rng)
                        for _ in range(GeodeMockUtils.BUD_SPAWN_ATTEMPTS)
-                       if random.random() < bud_spawn_success_rate]
-
-        for x, y, z in buds_coords:
-            geode[x][y][z] = GeodBlockType.BUDDING_AMETHYST
-
-        return geode
+                       if rng.random() < bud_spawn_success_rate]
+        return x, y, z, buds_coords
 
     @staticmethod
-    def get_random_point_on_a_sphere(centre, radius):
-        theta = random.random() * math.pi * random.choice((-1, 1))
-        phi = random.random() * math.pi * random.choice((-1, 1))
+    def get_random_point_on_a_sphere(centre, radius, rng=random):
+        theta = rng.random() * math.pi * rng.choice((-1, 1))
+        phi = rng.random() * math.pi * rng.choice((-1, 1))
         return (
-            round(centre[0] + radius * math.sin(theta) * math.cos(phi) * (random.random()*0.2+0.9)),
-            round(centre[1] + radius * math.sin(theta) * math.sin(phi) * (random.random()*0.2+0.9)),
-            round(centre[2] + radius * math.cos(theta) * (random.random()*0.2+0.9))
+            round(centre[0] + radius * math.sin(theta) * math.cos(phi) * (rng.random()*0.2+0.9)),
+            round(centre[1] + radius * math.sin(theta) * math.sin(phi) * (rng.random()*0.2+0.9)),
+            round(centre[2] + radius * math.cos(theta) * (rng.random()*0.2+0.9))
         )
 
     @staticmethod
@@ -101,25 +109,26 @@ class GeodeMockUtils:
         return projection
 
 
-size = 15
-g = GeodeMockUtils.generate_mock_geode(min_x=size, min_y=size, min_z=size, max_x=size, max_y=size, max_z=size)
-px = GeodeMockUtils.get_projection(g, Axis.X)
-py = GeodeMockUtils.get_projection(g, Axis.Y)
-pz = GeodeMockUtils.get_projection(g, Axis.Z)
+if __name__ == '__main__':
+    size = 15
+    g = GeodeMockUtils.generate_mock_geode(min_x=size, min_y=size, min_z=size, max_x=size, max_y=size, max_z=size)
+    px = GeodeMockUtils.get_projection(g, Axis.X)
+    py = GeodeMockUtils.get_projection(g, Axis.Y)
+    pz = GeodeMockUtils.get_projection(g, Axis.Z)
 
-m = {
-    GeodBlockType.BUDDING_AMETHYST: '#',
-    GeodBlockType.AIR: ' ',
-}
+    m = {
+        GeodBlockType.BUDDING_AMETHYST: '#',
+        GeodBlockType.AIR: ' ',
+    }
 
-for row in px:
-    print(''.join([m.get(elem) for elem in row]))
+    for row in px:
+        print(''.join([m.get(elem) for elem in row]))
 
-for row in py:
-    print(''.join([m.get(elem) for elem in row]))
+    for row in py:
+        print(''.join([m.get(elem) for elem in row]))
 
-for row in pz:
-    print(''.join([m.get(elem) for elem in row]))
+    for row in pz:
+        print(''.join([m.get(elem) for elem in row]))
 
 
-print()
+    print()
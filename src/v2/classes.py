@@ -1,31 +1,54 @@
 from __future__ import annotations
 from .enums import GeodeProjectionType, StickyType, CellType, GENERIC_CELL_TYPE
 import typing as t
-from collections import defaultdict
+from src.grid import CompactGrid, neighbour_table
 
 
 GENERIC_CELL = t.TypeVar("GENERIC_CELL", bound='Cell')
 
 
 class Cell:
-    def __init__(self, h: int, w: int, parent: 'GridLike', _type: GENERIC_CELL_TYPE):
+    # A lightweight view on one position of a GridLike, the type itself lives in the grid storage.
+    # Views are created on demand and compare equal when they point at the same position.
+    __slots__ = ('h', 'w', 'parent')
+    cell_type: t.Type[CellType] = None
+
+    def __init__(self, h: int, w: int, parent: 'GridLike', _type: GENERIC_CELL_TYPE = None):
         self.h = h
         self.w = w
-        self.type = _type
         self.parent = parent
+        if _type is not None:
+            parent.set_elem_type(h, w, _type)
+
+    @property
+    def type(self) -> GENERIC_CELL_TYPE:
+        return self.parent.get_elem_type(self.h, self.w)
+
+    @type.setter
+    def type(self, _type: GENERIC_CELL_TYPE):
+        self.parent.set_elem_type(self.h, self.w, _type)
 
     def get_neighbors(self) -> t.Set[GENERIC_CELL]:
         return self.parent.get_neighbors_by_cell(self)
 
+    def __eq__(self, other):
+        return isinstance(other, Cell) and self.parent is other.parent and self.h == other.h and self.w == other.w
+
+    def __hash__(self):
+        return hash((id(self.parent), self.h, self.w))
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.h}, {self.w}, {self.type!r})'
+
 
 class ProjectionCell(Cell):
-    def __init__(self, h: int, w: int, parent: 'GridLike', _type: GeodeProjectionType = GeodeProjectionType.EMPTY):
-        super().__init__(h, w, parent, _type)
+    __slots__ = ()
+    cell_type = GeodeProjectionType
 
 
 class StickyCell(Cell):
-    def __init__(self, h: int, w: int, parent: 'GridLike', _type: StickyType = StickyType.EMTPY):
-        super().__init__(h, w, parent, _type)
+    __slots__ = ()
+    cell_type = StickyType
 
 
 class Group:
@@ -39,13 +62,10 @@ class GroupManager:
 
 class GridLike(t.Generic[GENERIC_CELL]):
     def __init__(self, height: int, width: int):
-        cell_type = self._get_model_type()
-        self.grid: t.List[t.List[GENERIC_CELL]] = [[cell_type(h=h, w=w, parent=self) for w in range(width)] for h in range(height)]
+        self.cell_class: t.Type[GENERIC_CELL] = self._get_model_type()
+        self.storage: CompactGrid = CompactGrid(height, width, self.cell_class.cell_type)
         self.height = height
         self.width = width
-        self.cells: t.Tuple[GENERIC_CELL] = tuple(cell for row in self.grid for cell in row)
-        self.neighbours: t.Dict[GENERIC_CELL, t.Set[GENERIC_CELL]] = self.create_neighbours()
-        self.type_to_cell: t.Dict[CellType, t.Set[GENERIC_CELL]] = self.populate_type_to_cell()
 
     @classmethod
     def _get_model_type(cls) -> t.Type[GENERIC_CELL]:
@@ -54,49 +74,40 @@ class GridLike(t.Generic[GENERIC_CELL]):
 
     @classmethod
     def of_grid(cls, grid: t.List[t.List[CellType]]) -> GridLike:
-        height = len(grid)
-        width = len(grid[0])
-        gl = cls(height, width)
-        for h in range(height):
-            for w in range(width):
-                gl.set_elem_type(h, w, grid[h][w])
+        gl = cls(0, 0)
+        gl.storage = CompactGrid.of_rows(grid, gl.cell_class.cell_type)
+        gl.height = gl.storage.height
+        gl.width = gl.storage.width
         return gl
 
-    def populate_type_to_cell(self):
-        type_to_cell = defaultdict(set)
-        for cell in self.cells:
-            type_to_cell[cell.type].add(cell)
-        return type_to_cell
-
-    def create_neighbours(self):
-        neighbours = dict()
-        for cell in self.cells:
-            h = cell.h
-            w = cell.w
-            current_cell = self.get_elem(h, w)
-            neigh = [(h-1, w), (h+1, w), (h, w-1), (h, w+1)]
-            neigh = [n for n in neigh if 0 <= n[0] < self.height and 0 <= n[1] < self.width]
-            neighbours[current_cell] = {self.get_elem(*n) for n in neigh}
-        return neighbours
+    @property
+    def cells(self) -> t.Tuple[GENERIC_CELL, ...]:
+        return tuple(self.cell_class(h, w, self) for h in range(self.height) for w in range(self.width))
 
     def get_elem(self, h, w) -> GENERIC_CELL:
-        return self.grid[h][w]
+        if not (0 <= h < self.height and 0 <= w < self.width):
+            raise IndexError(f'({h}, {w}) is outside of the grid')
+        return self.cell_class(h, w, self)
+
+    def get_elem_type(self, h, w) -> CellType:
+        return self.storage.get(h, w)
 
     def set_elem_type(self, h, w, _type: CellType):
-        current_cell = self.grid[h][w]
-        current_type = current_cell.type
-        self.type_to_cell[current_type].remove(current_cell)
-        self.grid[h][w].type = _type
-        self.type_to_cell[_type].add(current_cell)
+        self.storage.set(h, w, _type)
 
     def count_cell_with_type(self, _type: CellType):
-        return len(self.type_to_cell[_type])
+        return self.storage.count(_type)
 
     def get_neighbors_by_coordinate(self, h, w) -> t.Set[GENERIC_CELL]:
-        return self.get_neighbors_by_cell(self.get_elem(h, w))
+        if 0 <= h < self.height and 0 <= w < self.width:
+            neigh = neighbour_table(self.height, self.width).of_coordinate(h, w)
+        else:
+            neigh = [n for n in ((h-1, w), (h+1, w), (h, w-1), (h, w+1))
+                     if 0 <= n[0] < self.height and 0 <= n[1] < self.width]
+        return {self.cell_class(n[0], n[1], self) for n in neigh}
 
     def get_neighbors_by_cell(self, cell: GENERIC_CELL) -> t.Set[GENERIC_CELL]:
-        return self.neighbours[cell]
+        return self.get_neighbors_by_coordinate(cell.h, cell.w)
 
 
 class Geode(GridLike[ProjectionCell]):
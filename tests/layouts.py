@@ -1,4 +1,6 @@
-from src import StickyType as St, GeodesyProjectionType as Gpt
+import random
+import typing as t
+from src import StickyType as St, GeodesyProjectionType as Gpt, GeodesyProjection
 
 layout1 = [
     [St.HONEY, St.HONEY, St.HONEY, St.EMTPY,],
@@ -37,4 +39,14 @@ projection_layout_5 = [
     [Gpt.BUD, Gpt.SHARD,  Gpt.BUD, Gpt.SHARD, ],
     [Gpt.BUD, Gpt.SHARD,  Gpt.BUD, Gpt.SHARD, ],
     [Gpt.BUD, Gpt.SHARD,  Gpt.BUD, Gpt.SHARD, ],
-]
\ No newline at end of file
+]
+
+
+def random_projection(rng: random.Random, height: int, width: int,
+                      weights: t.Sequence[float] = None) -> GeodesyProjection:
+    # every cell drawn from (EMPTY, BUD, SHARD), uniformly or with the given weights
+    types = list(Gpt)
+    if weights is None:
+        return GeodesyProjection(layout=[[rng.choice(types) for _ in range(width)] for _ in range(height)])
+    return GeodesyProjection(layout=[[rng.choices(types, weights=weights)[0] for _ in range(width)]
+                                     for _ in range(height)])
@@ -0,0 +1,35 @@
+import concurrent.futures
+import functools
+from src.v1.classes import GeodesyProjection
+from src.v1.resources_utils import read_resource_geodes
+from src.algorithms import greedy, local_search
+from src.algorithms.batch import largest_first, solve_corpus
+from tests import layouts
+
+
+def test_results_in_input_order():
+    projections = [GeodesyProjection(layout=layouts.projection_layout_1)] + read_resource_geodes()[:3]
+    assert largest_first(projections)[-1] == 0
+    results = solve_corpus(projections, solver=greedy.solve, workers=2)
+    assert [r.index for r in results] == [0, 1, 2, 3]
+    for gp, result in zip(projections, results):
+        assert not result.timed_out
+        assert gp.is_valid_cluster(result.solution.cluster)
+        assert result.solution.key() == greedy.solve(gp).key()
+
+
+def test_timeout():
+    gp = read_resource_geodes()[0]
+    solver = functools.partial(local_search.solve, time_limit=5)
+    results = solve_corpus([gp], solver=solver, workers=1, timeout=0.2)
+    assert results[0].timed_out
+    assert results[0].solution is None
+    assert results[0].elapsed < 1
+
+
+def test_inline_outside_the_main_thread():
+    gp = read_resource_geodes()[0]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        results = executor.submit(solve_corpus, [gp], greedy.solve, 1, 0.5).result()
+    assert results[0].error is None
+    assert results[0].solution.key() == greedy.solve(gp).key()
@@ -0,0 +1,25 @@
+import json
+from src.benchmark import BENCHMARKS, Workload, compare, main, run_benchmarks
+
+
+def test_run_and_compare(tmp_path):
+    workload = Workload(geodes=3)
+    current = run_benchmarks(['score.sticky_score', 'verify.is_valid_cluster'], repeat=1, workload=workload)
+    assert set(current['results']) == {'score.sticky_score', 'verify.is_valid_cluster'}
+    assert all(result['min'] > 0 for result in current['results'].values())
+
+    faster = json.loads(json.dumps(current))
+    for result in faster['results'].values():
+        result['min'] /= 10
+    assert all(regression for *_, regression in compare(current, faster))
+    assert not any(regression for *_, regression in compare(current, current))
+
+
+def test_main_fails_on_regression(tmp_path):
+    output = tmp_path / 'run.json'
+    assert main(['score.sticky_score', '--repeat', '1', '--output', str(output)]) == 0
+    baseline = json.loads(output.read_text())
+    baseline['results']['score.sticky_score']['min'] /= 1000
+    (tmp_path / 'baseline.json').write_text(json.dumps(baseline))
+    assert main(['score.sticky_score', '--repeat', '1', '--baseline', str(tmp_path / 'baseline.json')]) == 1
+    assert 'solve.local_search' in BENCHMARKS
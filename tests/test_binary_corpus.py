@@ -0,0 +1,29 @@
+import pickle
+import random
+from src.v1.binary_corpus import PackedCorpus, pack_cells, unpack_cells, write_corpus
+from src.v1.resources_utils import iter_resource_geodes
+
+
+def test_pack_cells():
+    rng = random.Random(2)
+    for count in range(0, 30):
+        cells = bytes(rng.randrange(3) for _ in range(count))
+        packed = pack_cells(cells)
+        assert len(packed) == -(-count // 4)
+        assert unpack_cells(packed, count) == cells
+
+
+def test_packed_corpus(tmp_path):
+    geodes = list(iter_resource_geodes(indexes=slice(0, 50)))
+    path = str(tmp_path / 'geodes.bin')
+    assert write_corpus(geodes, path) == 50
+    with PackedCorpus(path) as corpus:
+        assert len(corpus) == 50
+        assert corpus.shape(7) == (geodes[7].height, geodes[7].width)
+        assert corpus[7].grid == geodes[7].grid
+        assert corpus[-1].grid == geodes[-1].grid
+        assert corpus[7].shards_coordinates == geodes[7].shards_coordinates
+        assert [gp.grid for gp in corpus[10:13]] == [gp.grid for gp in geodes[10:13]]
+        copy = pickle.loads(pickle.dumps(corpus))
+        assert copy[3].grid == geodes[3].grid
+        copy.close()
@@ -0,0 +1,52 @@
+import random
+from src.bitboard import board_shape, popcount
+from src.v1.classes import Cluster, StickyScore, StickyType
+from src.v1.resources_utils import iter_resource_geodes
+from src.algorithms import greedy
+from src.algorithms.bitboard_state import BitBoard
+from tests import layouts
+
+
+def test_mask_round_trip():
+    shape = board_shape(3, 4)
+    cells = bytes([0, 1, 2, 1, 1, 1, 0, 0, 2, 0, 0, 1])
+    mask = shape.mask_of(cells, 1)
+    assert popcount(mask) == 5
+    assert not mask & ~shape.full
+    assert list(shape.indexes(mask)) == [1, 3, 4, 5, 11]
+    assert shape.cells_of([(shape.mask_of(cells, 1), 1), (shape.mask_of(cells, 2), 2)]) == cells
+
+
+def test_components_do_not_wrap_rows():
+    shape = board_shape(2, 3)
+    # (0, 2) and (1, 0) are next to each other in memory but not on the grid
+    mask = shape.mask_of(bytes([0, 0, 1, 1, 0, 0]), 1)
+    assert len(list(shape.components(mask))) == 2
+    assert shape.neighbours(shape.bit(0, 2)) == shape.bit(0, 1) | shape.bit(1, 2)
+
+
+def test_groups_match_sticky_score():
+    rng = random.Random(20)
+    for _ in range(100):
+        height, width = rng.randint(1, 7), rng.randint(1, 7)
+        cluster = Cluster(layout=[[rng.choice(list(StickyType)) for _ in range(width)] for _ in range(height)])
+        gp = layouts.random_projection(rng, height, width)
+        board = BitBoard.of_projection(gp, cluster)
+        assert board.groups_count() == cluster.get_score().groups_count == StickyScore(cluster).groups_count
+        assert sorted(board.group_sizes()) == sorted(g.size for g in cluster.group_manager.id_2_group.values())
+        assert board.score().sticky_material == cluster.get_score().sticky_material
+        assert board.cells() == cluster.grid.cells
+        assert board.is_valid() == gp.is_valid_cluster(cluster)
+
+
+def test_resource_geode():
+    gp = next(iter_resource_geodes())
+    cluster = greedy.solve(gp).cluster
+    board = BitBoard.of_projection(gp, cluster)
+    assert board.is_valid() and gp.is_valid_cluster(cluster)
+    copy = board.copy()
+    h, w = next(iter(gp.shards_coordinates))
+    copy.set(h, w, StickyType.EMTPY)
+    assert not copy.is_valid() and board.is_valid()
+    assert copy.get(h, w) is StickyType.EMTPY and board.get(h, w) is not StickyType.EMTPY
+    assert board.to_cluster().grid == cluster.grid
@@ -0,0 +1,48 @@
+import random
+from src.v1.classes import Cluster, GeodesyProjection, GeodesyProjectionType, StickyType
+from src.v1.resources_utils import iter_resource_geodes
+from src.algorithms import branch_and_bound, local_search
+from src.algorithms.bounds import INFEASIBLE, lower_bound
+from tests import layouts
+
+
+def test_bound_is_admissible():
+    rng = random.Random(13)
+    for punch_limit in (None, 2, 3):
+        for _ in range(40):
+            gp = layouts.random_projection(rng, rng.randint(1, 4), rng.randint(1, 4))
+            solution = branch_and_bound.solve(gp, punch_limit=punch_limit, connector_reach=None, time_limit=None)
+            assert lower_bound(gp, punch_limit=punch_limit) <= solution.key()
+            # any partial assignment of the optimum still bounds it
+            cells = bytearray(solution.cluster.grid.cells)
+            for i in rng.sample(range(len(cells)), len(cells) // 2):
+                cells[i] = StickyType.EMTPY.value
+            partial = Cluster.of_cells(gp.height, gp.width, cells)
+            assert lower_bound(gp, partial, punch_limit=punch_limit) <= solution.key()
+
+
+def test_bound_of_regions():
+    gp = GeodesyProjection(layout=layouts.projection_layout_5)
+    assert lower_bound(gp) == (2, 6)
+    assert lower_bound(gp, punch_limit=2) == (4, 6)
+
+
+def test_forced_alternation():
+    B, S, E = GeodesyProjectionType.BUD, GeodesyProjectionType.SHARD, GeodesyProjectionType.EMPTY
+    gp = GeodesyProjection(layout=[[S, S, S], [B, B, B]])
+    cells = bytearray([StickyType.SLIME.value, 0, StickyType.HONEY.value, 0, 0, 0])
+    assert lower_bound(gp, Cluster.of_cells(2, 3, cells), punch_limit=1) == INFEASIBLE
+    assert lower_bound(gp, Cluster.of_cells(2, 3, cells), punch_limit=2) == (2, 3)
+    # five cells in one region need three groups of at most two
+    gp = GeodesyProjection(layout=[[S, S, S, S, S], [E, B, B, B, B]])
+    cells = bytearray([StickyType.SLIME.value, 0, 0, 0, StickyType.SLIME.value] + [0] * 5)
+    assert lower_bound(gp, Cluster.of_cells(2, 5, cells), punch_limit=2) == (3, 5)
+
+
+def test_solvers_stop_at_bound():
+    gp = GeodesyProjection(layout=layouts.projection_layout_5)
+    solution = local_search.solve(gp, time_limit=10.0)
+    assert solution.optimal
+    assert solution.key() == lower_bound(gp)
+    gp = next(iter_resource_geodes())
+    assert lower_bound(gp) <= local_search.solve(gp).key()
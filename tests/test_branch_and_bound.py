@@ -0,0 +1,98 @@
+import contextlib
+import io
+import random
+from src.v1.classes import GeodesyProjection, GeodesyProjectionType, StickyScore
+from src.v1.main import calculate_brute_force
+from src.v1.resources_utils import read_resource_geodes
+from src.algorithms import greedy
+from src.algorithms.branch_and_bound import BranchAndBoundSolver, solve
+from tests import layouts
+
+
+def brute_force_key(gp: GeodesyProjection):
+    with contextlib.redirect_stdout(io.StringIO()):
+        score = StickyScore(calculate_brute_force(gp))
+    return score.groups_count, score.sticky_material
+
+
+def test_matches_brute_force():
+    rng = random.Random(3)
+    projections = [GeodesyProjection(layout=layouts.projection_layout_1),
+                   GeodesyProjection(layout=layouts.projection_layout_2),
+                   GeodesyProjection(layout=layouts.projection_layout_5)]
+    for _ in range(30):
+        height, width = rng.choice([(2, 2), (2, 3), (3, 3), (2, 4)])
+        projections.append(layouts.random_projection(rng, height, width))
+    for gp in projections:
+        solution = solve(gp, punch_limit=None, connector_reach=None)
+        assert solution.optimal
+        assert gp.is_valid_cluster(solution.cluster)
+        assert solution.key() == brute_force_key(gp)
+
+
+def test_punch_limit():
+    gp = GeodesyProjection(layout=layouts.projection_layout_3)
+    assert solve(gp, punch_limit=None).key() == (1, 6)
+    assert solve(gp, punch_limit=3).key() == (2, 6)
+
+
+def test_resource_geode_within_budget():
+    gp = read_resource_geodes()[0]
+    solution = solve(gp, time_limit=0.5)
+    assert gp.is_valid_cluster(solution.cluster)
+    score = StickyScore(solution.cluster)
+    assert solution.key() == (score.groups_count, score.sticky_material)
+
+
+def test_propagation_keeps_the_optimum():
+    rng = random.Random(21)
+    nodes = {True: 0, False: 0}
+    for _ in range(30):
+        height, width = rng.randint(2, 5), rng.randint(2, 5)
+        gp = layouts.random_projection(rng, height, width, weights=[1, 1, 4])
+        keys = set()
+        for propagate in (True, False):
+            solver = BranchAndBoundSolver(gp, punch_limit=3, connector_reach=None, time_limit=None,
+                                          propagate=propagate)
+            solution = solver.solve()
+            assert solution.optimal and gp.is_valid_cluster(solution.cluster)
+            keys.add(solution.key())
+            nodes[propagate] += solver.nodes
+        assert len(keys) == 1
+    assert nodes[True] < nodes[False]
+
+
+def test_propagation_forces_types():
+    B, S = GeodesyProjectionType.BUD, GeodesyProjectionType.SHARD
+    # a full slime group forces the shard below its end to honey
+    gp = GeodesyProjection(layout=[[S, S, B], [B, S, B]])
+    solver = BranchAndBoundSolver(gp, punch_limit=2, time_limit=None)
+    for k, value in enumerate((1, 1)):
+        assert solver._assign(k, value)
+    assert solver.domain[4] == 1 << 2
+    assert solver.stats[6] == 1
+    assert solver.lower_bound() == (2, 3)
+    # a single slime cell next to a group of three forces the shard between them to honey
+    gp = GeodesyProjection(layout=[[B, S], [B, S], [B, S], [S, S]])
+    solver = BranchAndBoundSolver(gp, punch_limit=4, time_limit=None)
+    for k in range(4):
+        assert solver._assign(k, 1)
+    assert solver.domain[7] == 1 << 2
+
+
+def test_connector_reach_is_no_proof():
+    S, E = GeodesyProjectionType.SHARD, GeodesyProjectionType.EMPTY
+    gp = GeodesyProjection(layout=[[S, E, E, E, S]])
+    restricted = solve(gp, time_limit=None)
+    assert restricted.key() == (2, 2)
+    assert not restricted.optimal
+    exact = solve(gp, connector_reach=None, time_limit=None)
+    assert exact.key() == (1, 5)
+    assert exact.optimal
+
+
+def test_starts_from_greedy():
+    gp = read_resource_geodes()[0]
+    solution = solve(gp, node_limit=1)
+    assert solution.key() <= greedy.solve(gp).key()
+    assert gp.is_valid_cluster(solution.cluster)
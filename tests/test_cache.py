@@ -0,0 +1,123 @@
+import functools
+from src.v1.classes import Cluster, GeodesyProjection
+from src.v1.resources_utils import read_resource_geodes
+from src.algorithms import branch_and_bound, greedy
+from src.algorithms.batch import solve_corpus
+from src.algorithms.cache import CachedSolver, SolutionCache, SYMMETRIES, canonical_key, solver_namespace, \
+    transform_cells
+from src.algorithms.presolve import solve_decomposed
+from src.algorithms.solution import Solution
+from tests import layouts
+
+
+def _transformed(gp: GeodesyProjection, symmetry) -> GeodesyProjection:
+    height, width, cells = transform_cells(gp.grid.cells, gp.height, gp.width, symmetry)
+    grid = gp.grid.__class__(height, width, gp.grid.enum_type, bytearray(cells))
+    return GeodesyProjection(grid=grid)
+
+
+def test_canonical_key_is_symmetry_invariant():
+    gp = GeodesyProjection(layout=layouts.projection_layout_1)
+    keys = {canonical_key(_transformed(gp, symmetry)) for symmetry in SYMMETRIES}
+    assert len(keys) == 1
+    assert canonical_key(GeodesyProjection(layout=layouts.projection_layout_2)) not in keys
+
+
+def test_hit_maps_back_through_symmetry(tmp_path):
+    cache = SolutionCache(str(tmp_path / 'cache.sqlite'))
+    gp = GeodesyProjection(layout=layouts.projection_layout_1)
+    solution = branch_and_bound.solve(gp, connector_reach=None, time_limit=None)
+    assert cache.put(gp, solution)
+    assert not cache.put(gp, solution)
+    for symmetry in SYMMETRIES:
+        other = _transformed(gp, symmetry)
+        hit = cache.get(other)
+        assert hit is not None and hit.key() == solution.key() and hit.optimal
+        assert other.is_valid_cluster(hit.cluster)
+        assert hit.cluster.get_score().groups_count == solution.score.groups_count
+    assert cache.hits == len(SYMMETRIES)
+
+
+def test_lru_eviction(tmp_path):
+    cache = SolutionCache(str(tmp_path / 'cache.sqlite'), max_entries=2)
+    projections = [GeodesyProjection(layout=layout) for layout in
+                   (layouts.projection_layout_1, layouts.projection_layout_2, layouts.projection_layout_4)]
+    solutions = [branch_and_bound.solve(gp, time_limit=None) for gp in projections]
+    cache.put(projections[0], solutions[0])
+    cache.put(projections[1], solutions[1])
+    cache.get(projections[0])
+    cache.put(projections[2], solutions[2])
+    assert len(cache) == 2
+    assert cache.get(projections[1]) is None
+    assert cache.get(projections[0]) is not None
+
+
+def test_cached_solver_in_decomposition(tmp_path):
+    solver = CachedSolver(functools.partial(branch_and_bound.solve, time_limit=None), str(tmp_path / 'c.sqlite'))
+    gp = GeodesyProjection(layout=layouts.projection_layout_5)
+    solution = solve_decomposed(gp, solver)
+    assert gp.is_valid_cluster(solution.cluster)
+    # the two regions of the layout are mirror images, the second one is a hit
+    assert solver.cache.hits >= 1
+
+
+def test_only_a_better_key_replaces(tmp_path):
+    cache = SolutionCache(str(tmp_path / 'cache.sqlite'))
+    gp = GeodesyProjection(layout=layouts.projection_layout_1)
+    best = branch_and_bound.solve(gp, connector_reach=None, time_limit=None)
+    checkerboard = Cluster.of_cells(gp.height, gp.width, greedy.checkerboard_cells(gp))
+    worse = Solution.of_cluster(checkerboard, optimal=True)  # a false claim
+    assert worse.key() > best.key()
+    assert cache.put(gp, Solution(best.cluster, best.score, optimal=False))
+    assert not cache.put(gp, worse)
+    assert cache.get(gp).key() == best.key() and not cache.get(gp).optimal
+    assert cache.put(gp, best)  # the same key, now proven
+    assert not cache.put(gp, Solution(best.cluster, best.score, optimal=False))
+    assert cache.get(gp).optimal
+
+
+def test_unproven_hit_is_solved_again(tmp_path):
+    path = str(tmp_path / 'cache.sqlite')
+    gp = GeodesyProjection(layout=layouts.projection_layout_1)
+    heuristic = CachedSolver(greedy.solve, path, namespace='shared')
+    exact = CachedSolver(functools.partial(branch_and_bound.solve, connector_reach=None, time_limit=None), path,
+                         namespace='shared')
+    assert not heuristic(gp).optimal
+    solution = exact(gp)
+    assert solution.optimal and solution.key() <= greedy.solve(gp).key()
+    assert exact.cache.get(gp).optimal
+    reused = CachedSolver(greedy.solve, path, namespace='other', rerun_unproven=False)
+    reused.cache.put(gp, Solution(solution.cluster, solution.score, optimal=False))
+    assert reused(gp).key() == solution.key()
+
+
+def test_solvers_do_not_share_entries(tmp_path):
+    path = str(tmp_path / 'cache.sqlite')
+    namespaces = {solver_namespace(greedy.solve), solver_namespace(branch_and_bound.solve),
+                  solver_namespace(functools.partial(branch_and_bound.solve, connector_reach=None))}
+    assert len(namespaces) == 3
+    gp = GeodesyProjection(layout=layouts.projection_layout_1)
+    CachedSolver(greedy.solve, path)(gp)
+    exact = CachedSolver(functools.partial(branch_and_bound.solve, time_limit=None), path)
+    exact(gp)
+    assert exact.cache.hits == 0 and exact.cache.misses == 1
+
+
+def test_hits_do_not_commit(tmp_path):
+    cache = SolutionCache(str(tmp_path / 'cache.sqlite'))
+    gp = GeodesyProjection(layout=layouts.projection_layout_1)
+    cache.put(gp, greedy.solve(gp))
+    for _ in range(3):
+        assert cache.get(gp) is not None
+        assert not cache.connection.in_transaction
+    assert len(cache.touched) == 1
+    cache.close()
+
+
+def test_corpus_run_again_is_served_from_the_cache(tmp_path):
+    projections = read_resource_geodes()[:3]
+    solver = CachedSolver(greedy.solve, str(tmp_path / 'cache.sqlite'), rerun_unproven=False)
+    first = solve_corpus(projections, solver, workers=2)
+    second = solve_corpus(projections, solver, workers=1)
+    assert solver.cache.misses == 0 and solver.cache.hits == len(projections)
+    assert [r.solution.key() for r in first] == [r.solution.key() for r in second]
@@ -0,0 +1,45 @@
+import random
+from src.v1.classes import GeodesyProjection, GeodesyProjectionType
+from src.v1.constants import PUNCH_LIMIT
+from src.v1.resources_utils import read_resource_geodes
+from src.algorithms import colouring
+from src.algorithms.colouring import HONEY, SLIME, dsatur_colour, two_colour
+from tests import layouts
+
+
+def test_two_colour():
+    path = [{1}, {0, 2}, {1}]
+    assert two_colour(path) == [SLIME, HONEY, SLIME]
+    triangle = [{1, 2}, {0, 2}, {0, 1}]
+    assert two_colour(triangle) is None
+
+
+def test_odd_cycle_merges_or_conflicts():
+    triangle = [{1, 2}, {0, 2}, {0, 1}]
+    types, conflicts = dsatur_colour(triangle, [2, 2, 2], punch_limit=4)
+    assert conflicts == []
+    assert sorted(types).count(SLIME) in (1, 2)
+    _, conflicts = dsatur_colour(triangle, [3, 3, 3], punch_limit=4)
+    assert conflicts
+
+
+def test_solve_is_valid():
+    rng = random.Random(3)
+    projections = read_resource_geodes()[:3]
+    for _ in range(20):
+        height, width = rng.randint(1, 6), rng.randint(1, 6)
+        projections.append(layouts.random_projection(rng, height, width))
+    for gp in projections:
+        for punch_limit in (1, 3, PUNCH_LIMIT):
+            solution = colouring.solve(gp, punch_limit=punch_limit, attempts=4)
+            assert gp.is_valid_cluster(solution.cluster)
+            assert all(g.size <= punch_limit for g in solution.cluster.group_manager.id_2_group.values())
+
+
+def test_partition_of_covered_cells():
+    gp = GeodesyProjection(layout=[[GeodesyProjectionType.SHARD, GeodesyProjectionType.EMPTY,
+                                    GeodesyProjectionType.SHARD]])
+    assert colouring.partition(gp) == [[0], [2]]
+    assert colouring.partition(gp, covered=[0, 1, 2]) == [[0, 1, 2]]
+    solution = colouring.solve(gp, covered=[0, 1, 2])
+    assert solution.key() == (1, 3)
@@ -0,0 +1,38 @@
+import random
+from src.v1.classes import GeodesyProjection, GeodesyProjectionType, StickyScore
+from src.v1.constants import PUNCH_LIMIT
+from src.v1.resources_utils import read_resource_geodes
+from src.algorithms import branch_and_bound, frontier_dp
+from tests import layouts
+
+
+def test_matches_branch_and_bound():
+    rng = random.Random(5)
+    for _ in range(60):
+        height, width = rng.randint(1, 5), rng.randint(1, 5)
+        punch_limit = rng.choice([None, 1, 2, 3, 13])
+        gp = layouts.random_projection(rng, height, width)
+        expected = branch_and_bound.solve(gp, punch_limit=punch_limit, connector_reach=None, time_limit=None)
+        solution = frontier_dp.solve(gp, punch_limit=punch_limit, connector_reach=None)
+        assert solution.optimal
+        assert solution.key() == expected.key()
+        assert gp.is_valid_cluster(solution.cluster)
+        score = StickyScore(solution.cluster)
+        assert solution.key() == (score.groups_count, score.sticky_material)
+
+
+def test_beam_on_resource_geode():
+    gp = read_resource_geodes()[0]
+    solution = frontier_dp.solve(gp, max_states=50)
+    assert not solution.optimal
+    assert gp.is_valid_cluster(solution.cluster)
+    assert all(g.size <= PUNCH_LIMIT for g in solution.cluster.group_manager.id_2_group.values())
+
+
+def test_connector_reach_is_no_proof():
+    S, E = GeodesyProjectionType.SHARD, GeodesyProjectionType.EMPTY
+    gp = GeodesyProjection(layout=[[S, E, E, E, S]])
+    restricted = frontier_dp.solve(gp)
+    assert restricted.key() == (2, 2)
+    assert not restricted.optimal
+    assert frontier_dp.solve(gp, connector_reach=None).key() == (1, 5)
@@ -0,0 +1,51 @@
+from src.grid import CompactGrid, neighbour_table
+from src.v1.classes import Cluster, GeodesyProjection, GeodesyProjectionType, StickyType
+from tests.layouts import layout1, projection_layout_4
+
+
+def test_compact_grid():
+    grid = CompactGrid(2, 3, StickyType)
+    assert len(grid.cells) == 6
+    assert grid.count(StickyType.EMTPY) == 6
+    assert grid.set(1, 2, StickyType.HONEY) is StickyType.EMTPY
+    assert grid.get(1, 2) is StickyType.HONEY
+    assert grid.get_index(5) is StickyType.HONEY
+    assert grid.count(StickyType.HONEY) == 1
+    assert grid.count(StickyType.EMTPY) == 5
+    assert grid.rows() == [[StickyType.EMTPY] * 3, [StickyType.EMTPY, StickyType.EMTPY, StickyType.HONEY]]
+    assert grid.crop(1, 2, 1, 3).rows() == [[StickyType.EMTPY, StickyType.HONEY]]
+    assert CompactGrid.of_rows(grid.rows(), StickyType) == grid
+
+
+def test_cluster_storage():
+    cluster = Cluster(layout=layout1)
+    assert cluster.height == 3
+    assert cluster.width == 4
+    assert cluster.get_slime_count() == 2
+    assert cluster.get_honey_count() == 3
+    assert cluster.layout == layout1
+    cluster.set_elem(0, 0, StickyType.EMTPY)
+    assert cluster.get_honey_count() == 2
+    assert cluster.sticky_counter[StickyType.EMTPY] == 8
+
+
+def test_projection_reduce_empty_rows():
+    gp = GeodesyProjection(layout=projection_layout_4)
+    gp.reduce_empty_rows()
+    assert (gp.height, gp.width) == (2, 3)
+    assert (gp.h_offset, gp.w_offset) == (1, 1)
+    assert gp.get_elem(0, 0) is GeodesyProjectionType.BUD
+    assert gp.shards_coordinates == {(0, 2), (1, 0), (1, 1), (1, 2)}
+    assert len(gp.initial_layout) == 5
+
+
+def test_neighbour_table():
+    table = neighbour_table(3, 4)
+    assert table is neighbour_table(3, 4)
+    assert table.by_index[0] == (1, 4)
+    assert table.by_index[5] == (1, 4, 6, 9)
+    assert table.of_coordinate(2, 3) == {(1, 3), (2, 2)}
+    for i, neigh in enumerate(table.by_index):
+        assert tuple(table.indexes[table.offsets[i]:table.offsets[i + 1]]) == neigh
+        assert table.coordinates[i] == {divmod(n, 4) for n in neigh}
+    assert neighbour_table(0, 0).by_index == ()
@@ -1,7 +1,7 @@
-import pytest
+import random
+from src.v1.classes import Cluster, GroupManager, StickyScore, StickyType
 
 
-@pytest.mark.skip(reason="Legacy tests")
 def test_group_manager():
     cluster = Cluster(height=5, width=5)
     gm = GroupManager(cluster)
@@ -13,6 +13,113 @@ def test_group_manager():
 
     gm.set_coordinate_tuple((0, 1), StickyType.SLIME)
     assert gm.group_count() == 1
+    assert gm.get_group_by_coordinate_tuple((0, 1)).size == 3
 
-    #gm.remove_coordinate_tuple((0, 1))
-    #assert gm.group_count() == 2
+    gm.remove_coordinate_tuple((0, 1))
+    assert gm.group_count() == 2
+
+
+def test_group_manager_types_and_splits():
+    cluster = Cluster(height=3, width=3)
+    for w in range(3):
+        cluster.set_elem(1, w, StickyType.SLIME)
+    cluster.set_elem(0, 1, StickyType.HONEY)
+    gm = cluster.group_manager
+    assert gm.group_count() == 2
+    assert gm.get_group_by_coordinate_tuple((1, 0)).size == 3
+
+    # removing the middle splits the row in two
+    cluster.set_elem(1, 1, StickyType.EMTPY)
+    assert gm.group_count() == 3
+    assert gm.get_group_by_coordinate_tuple((1, 0)) is not gm.get_group_by_coordinate_tuple((1, 2))
+
+    # changing the type reconnects it
+    cluster.set_elem(1, 1, StickyType.HONEY)
+    assert gm.group_count() == 3
+    assert gm.get_group_by_coordinate_tuple((1, 1)) is gm.get_group_by_coordinate_tuple((0, 1))
+    cluster.set_elem(1, 1, StickyType.SLIME)
+    assert gm.group_count() == 2
+    assert gm.get_group_by_coordinate_tuple((1, 2)).size == 3
+
+    score = cluster.get_score()
+    expected = StickyScore(cluster)
+    assert (score.groups_count, score.sticky_material) == (expected.groups_count, expected.sticky_material)
+
+
+def expected_bars(group):
+    return {bar for coord in group.coordinates for bar in group.candidate_bars(coord)
+            if all(c in group.coordinates for c in bar)}
+
+
+def test_bars():
+    cluster = Cluster(height=4, width=4)
+    gm = cluster.group_manager
+    cluster.set_elem(0, 0, StickyType.SLIME)
+    cluster.set_elem(0, 2, StickyType.SLIME)
+    assert not gm.get_group_by_coordinate_tuple((0, 0)).has_bars()
+
+    # joins the two groups and creates a bar
+    cluster.set_elem(0, 1, StickyType.SLIME)
+    group = gm.get_group_by_coordinate_tuple((0, 1))
+    assert group.bars == {((0, 0), (0, 1), (0, 2))}
+    assert gm.get_bars_through((0, 0)) == {((0, 0), (0, 1), (0, 2))}
+
+    cluster.set_elem(1, 1, StickyType.SLIME)
+    cluster.set_elem(2, 1, StickyType.SLIME)
+    assert len(gm.get_bars_through((0, 1))) == 2
+
+    cluster.set_elem(1, 1, StickyType.HONEY)
+    assert gm.get_bars_through((1, 1)) == set()
+    assert gm.get_group_by_coordinate_tuple((0, 1)).bars == {((0, 0), (0, 1), (0, 2))}
+    assert not gm.get_group_by_coordinate_tuple((2, 1)).has_bars()
+
+
+def test_bars_random_updates():
+    rng = random.Random(11)
+    cluster = Cluster(height=6, width=6)
+    gm = cluster.group_manager
+    for _ in range(500):
+        coord = (rng.randrange(6), rng.randrange(6))
+        cluster.set_elem_tuple(coord, rng.choice([StickyType.EMTPY, StickyType.SLIME, StickyType.SLIME, StickyType.HONEY]))
+        for group in gm.id_2_group.values():
+            assert group.bars == expected_bars(group)
+            assert set(group.coord_2_bars) == {c for bar in group.bars for c in bar}
+
+
+def _cluster_state(cluster: Cluster):
+    gm = cluster.group_manager
+    return (bytes(cluster.grid.cells), cluster.sticky_counter, gm.new_group_id,
+            {coord: g.group_id for coord, g in gm.coord_2_group.items()},
+            {gid: (g.sticky_type, frozenset(g.coordinates), frozenset(g.bars)) for gid, g in gm.id_2_group.items()},
+            {st: frozenset(g.group_id for g in groups) for st, groups in gm.sticky_type_2_group.items() if groups})
+
+
+def test_checkpoint_rollback():
+    rng = random.Random(19)
+    cluster = Cluster(height=6, width=6)
+    coordinates = [(h, w) for h in range(6) for w in range(6)]
+    for _ in range(30):
+        cluster.set_elem_tuple(rng.choice(coordinates), rng.choice(list(StickyType)))
+    for _ in range(50):
+        before = _cluster_state(cluster)
+        outer = cluster.checkpoint()
+        for _ in range(rng.randint(1, 10)):
+            cluster.set_elem_tuple(rng.choice(coordinates), rng.choice(list(StickyType)))
+        middle = _cluster_state(cluster)
+        inner = cluster.checkpoint()
+        for _ in range(rng.randint(1, 10)):
+            cluster.set_elem_tuple(rng.choice(coordinates), rng.choice(list(StickyType)))
+        cluster.rollback(inner)
+        assert _cluster_state(cluster) == middle
+        # a committed nested checkpoint can still be rolled back by the outer one
+        inner = cluster.checkpoint()
+        for _ in range(rng.randint(1, 10)):
+            cluster.set_elem_tuple(rng.choice(coordinates), rng.choice(list(StickyType)))
+        cluster.commit(inner)
+        if rng.random() < 0.5:
+            cluster.rollback(outer)
+            assert _cluster_state(cluster) == before
+        else:
+            cluster.commit(outer)
+        assert cluster.group_manager.trail is None
+        assert cluster.get_score().groups_count == StickyScore(cluster).groups_count
@@ -0,0 +1,46 @@
+import json
+from src import instrumentation
+from src.v1.classes import Cluster, GeodesyProjection, StickyScore, StickyType
+from src.v1.main import calculate_brute_force
+from src.algorithms import branch_and_bound, earthquake
+from tests import layouts
+
+
+def test_disabled_by_default():
+    assert not instrumentation.current().enabled
+    with instrumentation.current().phase(instrumentation.SEARCH):
+        instrumentation.current().count(instrumentation.NODES_EXPANDED)
+
+
+def test_brute_force_counters():
+    gp = GeodesyProjection(layout=layouts.projection_layout_1)
+    with instrumentation.recording() as recorder:
+        calculate_brute_force(gp)
+    report = recorder.report()
+    assert report['counters'][instrumentation.NODES_EXPANDED] == 3 ** (gp.height * gp.width)
+    assert report['counters'][f'{instrumentation.PRUNED}.projection'] > 0
+    assert report['counters'][instrumentation.SCORE_EVALUATIONS] > 0
+    assert instrumentation.INVALID_RESULTS not in report['counters']
+    assert set(report['phases']) == {instrumentation.SEARCH, instrumentation.VERIFY}
+    assert not instrumentation.current().enabled
+
+
+def test_earthquake_and_branch_and_bound(tmp_path):
+    gp = GeodesyProjection(layout=layouts.projection_layout_5)
+    with instrumentation.recording() as recorder:
+        cluster = earthquake.solve(gp)
+        StickyScore(cluster)
+        S, E = StickyType.SLIME, StickyType.EMTPY
+        Cluster(layout=[[S, E, S], [S, S, S]])
+        branch_and_bound.solve(gp, time_limit=None)
+    counters = recorder.report()['counters']
+    assert counters[instrumentation.MERGE_GROUPS] == 1
+    assert counters[instrumentation.SCORE_EVALUATIONS] == 1
+    assert counters[instrumentation.NODES_EXPANDED] > gp.height * gp.width
+
+    recorder.write_chrome_trace(str(tmp_path / 'trace.json'))
+    trace = json.loads((tmp_path / 'trace.json').read_text())
+    names = [event['name'] for event in trace['traceEvents'] if event['ph'] == 'X']
+    assert names.count(instrumentation.SEARCH) == 2
+    recorder.write_report(str(tmp_path / 'report.json'))
+    assert json.loads((tmp_path / 'report.json').read_text())['phases'][instrumentation.SEARCH]['calls'] == 2
@@ -0,0 +1,27 @@
+from src.v1.classes import GeodesyProjection, StickyScore
+from src.v1.constants import PUNCH_LIMIT
+from src.v1.resources_utils import read_resource_geodes
+from src.algorithms import greedy, local_search
+from tests import layouts
+
+
+def test_small_layouts():
+    gp = GeodesyProjection(layout=layouts.projection_layout_5)
+    assert local_search.solve(gp, iterations=500, time_limit=None).key() == (2, 6)
+    gp = GeodesyProjection(layout=layouts.projection_layout_3)
+    assert local_search.solve(gp, iterations=500, time_limit=None, punch_limit=3).key() == (2, 6)
+
+
+def test_resource_geode():
+    gp = read_resource_geodes()[0]
+    start = greedy.solve(gp)
+    solution = local_search.solve(gp, initial=start.cluster, iterations=2000, time_limit=None, seed=1)
+    assert gp.is_valid_cluster(solution.cluster)
+    assert all(g.size <= PUNCH_LIMIT for g in solution.cluster.group_manager.id_2_group.values())
+    score = StickyScore(solution.cluster)
+    assert solution.key() == (score.groups_count, score.sticky_material)
+    assert not start.is_better_than(solution)
+
+    # seeded runs with an iteration budget are reproducible
+    again = local_search.solve(gp, initial=start.cluster, iterations=2000, time_limit=None, seed=1)
+    assert again.cluster.grid == solution.cluster.grid
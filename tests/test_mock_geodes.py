@@ -0,0 +1,32 @@
+import random
+import subprocess
+import sys
+from src.v1.mock_geodes import MockGeodeGenerator
+from src.v1.utils import Axis, GeodeMockUtils
+
+
+def test_import_has_no_output():
+    out = subprocess.run([sys.executable, '-c', 'import src.v1.utils'], capture_output=True, text=True, check=True)
+    assert out.stdout == ''
+
+
+def test_generator_is_reproducible():
+    first = MockGeodeGenerator(seed=3).batch(20)
+    again = MockGeodeGenerator(seed=3).batch(10, start=10)
+    assert [g.volume for g in first[10:]] == [g.volume for g in again]
+    assert [g.volume for g in first] != [g.volume for g in MockGeodeGenerator(seed=4).batch(20)]
+    assert any(g.buds for g in first)
+
+
+def test_projections_match_mock_utils():
+    for geode in MockGeodeGenerator(seed=5).batch(10):
+        nested = geode.to_nested()
+        for axis in Axis:
+            assert geode.projections[axis].rows() == GeodeMockUtils.get_projection(nested, axis)
+
+
+def test_same_distribution_as_mock_utils():
+    x, y, z, buds = GeodeMockUtils.generate_mock_buds(rng=random.Random('7:0'))
+    geode = MockGeodeGenerator(seed=7).generate(0)
+    assert geode.shape == (x, y, z)
+    assert geode.buds == [b for b in buds if all(0 <= c < s for c, s in zip(b, (x, y, z)))]
@@ -0,0 +1,44 @@
+import functools
+from src.v1.classes import GeodesyProjectionType
+from src.v1.mock_geodes import MockGeodeGenerator
+from src.v1.utils import Axis, GeodBlockType, GridUtils
+from src.algorithms import local_search
+from src.algorithms.pipeline import estimate_axes, project_buds, project_geode, solve_best_axis
+
+
+def test_shards_around_buds():
+    projections = project_buds((3, 3, 4), [(0, 1, 1), (2, 1, 1)])
+    B, S, E = GeodesyProjectionType.BUD, GeodesyProjectionType.SHARD, GeodesyProjectionType.EMPTY
+    assert projections[Axis.X].layout == [[E, S, E, E], [S, B, S, E], [E, S, E, E]]
+    assert projections[Axis.Z].layout == [[S, B, S], [E, S, E], [S, B, S]]
+    assert (projections[Axis.Y].height, projections[Axis.Y].width) == (3, 4)
+
+
+def test_projections_of_mock_geodes():
+    for geode in MockGeodeGenerator(seed=1).batch(5):
+        projections = project_geode(geode)
+        for axis in Axis:
+            buds = [v == GeodBlockType.BUDDING_AMETHYST.value for v in geode.projections[axis].cells]
+            assert buds == [v == GeodesyProjectionType.BUD.value for v in projections[axis].grid.cells]
+            gp = projections[axis]
+            for h, w in gp.shards_coordinates:
+                assert any(gp.get_elem(*n) is GeodesyProjectionType.BUD
+                           for n in GridUtils.get_manhattan_neighbour_coordinates(gp.height, gp.width, h, w))
+
+
+def test_best_axis():
+    geode = MockGeodeGenerator(seed=2).generate(0)
+    projections = project_geode(geode)
+    estimates = estimate_axes(projections, workers=1)
+    assert [e.key() for e in estimates] == sorted(e.key() for e in estimates)
+    assert all(e.bound <= e.key() for e in estimates)
+    best = solve_best_axis(projections, functools.partial(local_search.solve, time_limit=0.2), workers=1)
+    assert best.key() <= estimates[0].key()
+    assert best.projection.is_valid_cluster(best.solution.cluster)
+
+
+def test_estimates_use_the_punch_limit():
+    geode = MockGeodeGenerator(seed=2).generate(0)
+    for estimate in estimate_axes(project_geode(geode), punch_limit=2):
+        groups = estimate.solution.cluster.group_manager.id_2_group.values()
+        assert all(g.size <= 2 for g in groups)
@@ -0,0 +1,68 @@
+import multiprocessing
+import random
+from src.v1.classes import GeodesyProjection, GeodesyProjectionType
+from src.v1.constants import PUNCH_LIMIT
+from src.v1.resources_utils import read_resource_geodes
+from src.algorithms import branch_and_bound, portfolio
+from src.algorithms.branch_and_bound import BranchAndBoundSolver
+from src.algorithms.portfolio import SharedIncumbent, default_strategies
+from tests import layouts
+
+
+def test_shared_incumbent_keeps_the_best():
+    incumbent = SharedIncumbent(3, multiprocessing.Lock())
+    try:
+        assert incumbent.offer((2, 3), b'\x01\x02\x01')
+        assert not incumbent.offer((2, 4), b'\x01\x01\x01')
+        assert incumbent.offer((1, 3), b'\x01\x01\x01')
+        assert incumbent.key() == (1, 3)
+        incumbent.prove()
+        assert incumbent.read()[2:] == (True, b'\x01\x01\x01')
+    finally:
+        incumbent.close()
+
+
+def test_branch_and_bound_prunes_against_the_incumbent():
+    gp = read_resource_geodes()[0]
+    alone = BranchAndBoundSolver(gp, node_limit=5000, time_limit=None)
+    alone.solve()
+    incumbent = SharedIncumbent(gp.height * gp.width, multiprocessing.Lock())
+    try:
+        incumbent.offer((1, 1), bytes(gp.height * gp.width))  # better than anything, cuts every branch
+        shared = BranchAndBoundSolver(gp, node_limit=5000, time_limit=None, incumbent=incumbent)
+        solution = shared.solve()
+    finally:
+        incumbent.close()
+    assert shared.nodes < alone.nodes
+    assert not shared.exhausted
+    assert not solution.optimal
+
+
+def test_portfolio_matches_branch_and_bound():
+    rng = random.Random(11)
+    for _ in range(3):
+        gp = layouts.random_projection(rng, 4, 5)
+        expected = branch_and_bound.solve(gp, connector_reach=None, time_limit=None)
+        strategies = [('greedy', {}), ('branch_and_bound', {'connector_reach': None})]
+        solution = portfolio.solve(gp, strategies=strategies, time_limit=2)
+        assert solution.optimal
+        assert solution.key() == expected.key()
+        assert gp.is_valid_cluster(solution.cluster)
+    gp = read_resource_geodes()[0]
+    solution = portfolio.solve(gp, workers=3, time_limit=0.3)
+    assert gp.is_valid_cluster(solution.cluster)
+    assert all(g.size <= PUNCH_LIMIT for g in solution.cluster.group_manager.id_2_group.values())
+
+
+def test_restricted_reach_is_no_proof():
+    S, E = GeodesyProjectionType.SHARD, GeodesyProjectionType.EMPTY
+    gp = GeodesyProjection(layout=[[S, E, E, E, S]])
+    solution = portfolio.solve(gp, workers=3, time_limit=0.3)
+    assert solution.key() == (2, 2)
+    assert not solution.optimal
+
+
+def test_default_strategies_honour_workers():
+    assert [name for name, _ in default_strategies(1)] == ['local_search']
+    assert [name for name, _ in default_strategies(2)] == ['local_search', 'branch_and_bound']
+    assert len(default_strategies(6)) == 6
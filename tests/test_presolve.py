@@ -0,0 +1,45 @@
+import functools
+import random
+from src.v1.classes import GeodesyProjection, StickyScore
+from src.v1.resources_utils import read_resource_geodes
+from src.algorithms import branch_and_bound, greedy
+from src.algorithms.presolve import crop, solve_decomposed, split_regions
+from tests import layouts
+
+
+def test_crop():
+    region = crop(GeodesyProjection(layout=layouts.projection_layout_4), margin=0)
+    assert (region.h_offset, region.w_offset) == (1, 1)
+    assert (region.projection.height, region.projection.width) == (2, 3)
+    region = crop(GeodesyProjection(layout=layouts.projection_layout_4), margin=1)
+    assert (region.projection.height, region.projection.width) == (4, 5)
+
+
+def test_split_regions():
+    gp = GeodesyProjection(layout=layouts.projection_layout_5)
+    regions = split_regions(gp, connector_reach=0)
+    assert len(regions) == 2
+    assert [(r.h_offset, r.w_offset) for r in regions] == [(0, 1), (0, 3)]
+    assert all(len(r.projection.shards_coordinates) == 3 for r in regions)
+
+
+def test_decomposed_matches_whole():
+    rng = random.Random(8)
+    for connector_reach in (0, 1, None):
+        solver = functools.partial(branch_and_bound.solve, connector_reach=connector_reach, time_limit=None)
+        for _ in range(40):
+            height, width = rng.randint(1, 5), rng.randint(1, 5)
+            gp = layouts.random_projection(rng, height, width)
+            solution = solve_decomposed(gp, solver, connector_reach)
+            whole = solver(gp)
+            assert solution.key() == whole.key()
+            assert solution.optimal == (connector_reach is None)
+            assert gp.is_valid_cluster(solution.cluster)
+
+
+def test_decomposed_resource_geode():
+    gp = read_resource_geodes()[0]
+    solution = solve_decomposed(gp, functools.partial(greedy.solve), connector_reach=0)
+    assert gp.is_valid_cluster(solution.cluster)
+    score = StickyScore(solution.cluster)
+    assert solution.key() == (score.groups_count, score.sticky_material)
@@ -0,0 +1,24 @@
+import pytest
+from src.v1.classes import GeodesyProjectionType
+from src.v1.resources_utils import geod_projection_from_string, iter_resource_geodes, read_resource_geodes
+
+
+def test_decode():
+    gp = geod_projection_from_string(['  ..##\n', '##..  \n'])
+    assert (gp.height, gp.width) == (2, 4)
+    assert gp.layout[0] == [GeodesyProjectionType.EMPTY, GeodesyProjectionType.SHARD,
+                            GeodesyProjectionType.BUD, GeodesyProjectionType.EMPTY]
+    assert gp.buds_coordinates == {(0, 2), (1, 0)}
+    with pytest.raises(ValueError):
+        geod_projection_from_string(['  xx\n'])
+
+
+def test_lazy_selection():
+    geodes = read_resource_geodes()
+    assert len(geodes) == 1000
+    selected = list(iter_resource_geodes(indexes=slice(2, 10, 3)))
+    assert [gp.grid for gp in selected] == [geodes[i].grid for i in (2, 5, 8)]
+    selected = list(iter_resource_geodes(indexes=[999, 3]))
+    assert [gp.grid for gp in selected] == [geodes[3].grid, geodes[999].grid]
+    big = list(iter_resource_geodes(where=lambda gp: len(gp.shards_coordinates) > 95))
+    assert [gp.grid for gp in big] == [gp.grid for gp in geodes if len(gp.shards_coordinates) > 95]
@@ -0,0 +1,33 @@
+import json
+import os
+import tempfile
+from src.v1.resources_utils import read_resource_geodes
+from src.algorithms import greedy
+from src.algorithms.results import ResultsLog, content_hash, solve_resumable
+
+
+def test_resume_skips_solved_geodes():
+    projections = read_resource_geodes()[:4]
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'results.jsonl')
+        streamed = list()
+        records = solve_resumable(projections[:2], path, solver=greedy.solve, solver_version='greedy/1',
+                                  workers=1, on_record=streamed.append)
+        assert [r['index'] for r in records] == [0, 1]
+        assert sorted(r['index'] for r in streamed) == [0, 1]
+        with open(path, 'a') as f:
+            f.write('{"index": 2, "hash": "interrupt')  # a write cut short
+
+        streamed.clear()
+        records = solve_resumable(projections, path, solver=greedy.solve, solver_version='greedy/1',
+                                  workers=1, on_record=streamed.append)
+        assert sorted(r['index'] for r in streamed) == [2, 3]
+        for gp, record in zip(projections, records):
+            assert record['status'] == 'ok'
+            assert record['hash'] == content_hash(gp)
+            assert (record['groups_count'], record['sticky_material']) == greedy.solve(gp).key()
+        with open(path) as f:
+            assert len([json.loads(line) for line in f]) == 4
+
+        assert len(ResultsLog(path, 'greedy/1').done) == 4
+        assert len(ResultsLog(path, 'greedy/2').done) == 0
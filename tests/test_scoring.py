@@ -0,0 +1,23 @@
+import random
+from src.v1.classes import Cluster, StickyScore
+from src.v1.scoring import BatchStickyScorer, score_batch
+from tests.layouts import layout1, layout2
+
+
+def test_score_batch():
+    scores = score_batch([Cluster(layout=layout1), Cluster(layout=layout2)])
+    assert (scores[0].groups_count, scores[0].sticky_material) == (2, 5)
+    assert (scores[1].groups_count, scores[1].sticky_material) == (4, 10)
+    assert scores[0].is_better_than(scores[1])
+
+
+def test_batch_matches_flood_fill():
+    rng = random.Random(7)
+    height, width = 6, 5
+    stack = [bytes(rng.choice((0, 1, 2)) for _ in range(height * width)) for _ in range(200)]
+    scores = BatchStickyScorer(height, width).score_cells(stack)
+    for cells, score in zip(stack, scores):
+        expected = StickyScore(Cluster.of_cells(height, width, cells))
+        assert score.groups_count == expected.groups_count
+        assert score.slime_material == expected.slime_material
+        assert score.honey_material == expected.honey_material
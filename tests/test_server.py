@@ -0,0 +1,159 @@
+import asyncio
+import json
+import os
+import tempfile
+from src.v1.resources_utils import read_resource_geodes
+from src.algorithms import greedy
+from src.server import SolveServer
+
+
+def _rows(gp):
+    return [[v for v in gp.grid.cells[h * gp.width:(h + 1) * gp.width]] for h in range(gp.height)]
+
+
+def test_solve_cancel_and_backpressure():
+    gp = read_resource_geodes()[0]
+
+    async def scenario():
+        answers = dict()
+
+        async def send(message):
+            answers[message['id']] = message
+
+        async with SolveServer(workers=1, queue_size=2) as server:
+            await server.submit({'id': 1, 'layout': _rows(gp), 'solver': 'local_search', 'deadline': 0.3}, send)
+            while server.pending[send, 1].task is None:
+                await asyncio.sleep(0.001)
+            await server.submit({'id': 2, 'layout': _rows(gp), 'solver': 'greedy'}, send)
+            await server.submit({'id': 3, 'layout': _rows(gp), 'solver': 'greedy'}, send)
+            await server.submit({'id': 4, 'layout': _rows(gp), 'solver': 'greedy'}, send)
+            await server.submit({'cancel': 3}, send)
+            await server.submit({'id': 5, 'layout': [[0, 1], [2]]}, send)
+            await server.queue.join()
+        return answers
+
+    answers = asyncio.run(scenario())
+    assert answers[1]['status'] == 'timeout'
+    assert answers[2]['status'] == 'ok'
+    assert (answers[2]['groups_count'], answers[2]['sticky_material']) == greedy.solve(gp).key()
+    assert answers[3]['status'] == 'cancelled'
+    assert answers[4]['status'] == 'busy'
+    assert answers[5]['status'] == 'error'
+
+
+def test_cancelled_requests_free_the_queue():
+    gp = read_resource_geodes()[0]
+
+    async def scenario():
+        answers = dict()
+
+        async def send(message):
+            answers[message['id']] = message
+
+        async with SolveServer(workers=1, queue_size=2) as server:
+            await server.submit({'id': 1, 'layout': _rows(gp), 'solver': 'local_search', 'deadline': 0.3}, send)
+            while server.pending[send, 1].task is None:
+                await asyncio.sleep(0.001)
+            for request_id in (2, 3):
+                await server.submit({'id': request_id, 'layout': _rows(gp), 'solver': 'greedy'}, send)
+                await server.submit({'cancel': request_id}, send)
+            await server.submit({'id': 4, 'layout': _rows(gp), 'solver': 'greedy'}, send)
+            await server.submit({'id': 5, 'layout': _rows(gp), 'solver': 'greedy'}, send)
+            await server.queue.join()
+        return answers
+
+    answers = asyncio.run(scenario())
+    assert [answers[i]['status'] for i in range(1, 6)] == ['timeout', 'cancelled', 'cancelled', 'ok', 'ok']
+
+
+def test_ids_are_per_client():
+    gp = read_resource_geodes()[0]
+
+    async def scenario():
+        answers = {'a': list(), 'b': list()}
+
+        async def send_a(message):
+            answers['a'].append(message)
+
+        async def send_b(message):
+            answers['b'].append(message)
+
+        async with SolveServer(workers=1) as server:
+            await server.submit({'id': 1, 'layout': _rows(gp), 'solver': 'local_search', 'deadline': 0.3}, send_a)
+            await server.submit({'id': 1, 'layout': _rows(gp), 'solver': 'greedy'}, send_b)
+            await server.submit({'cancel': 1}, send_b)  # only the request of b
+            await server.queue.join()
+        return answers
+
+    answers = asyncio.run(scenario())
+    assert [a['status'] for a in answers['a']] == ['timeout']
+    assert [a['status'] for a in answers['b']] == ['cancelled']
+
+
+def test_cancel_stops_the_running_solve():
+    gp = read_resource_geodes()[0]
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        answers = dict()
+
+        async def send(message):
+            answers[message['id']] = (message, loop.time())
+
+        async with SolveServer(workers=1) as server:
+            start = loop.time()
+            await server.submit({'id': 1, 'layout': _rows(gp), 'solver': 'branch_and_bound', 'deadline': 30}, send)
+            while server.pending[send, 1].task is None:
+                await asyncio.sleep(0.001)
+            await server.submit({'cancel': 1}, send)
+            await server.submit({'id': 2, 'layout': _rows(gp), 'solver': 'greedy'}, send)
+            await server.queue.join()
+        return answers, start
+
+    answers, start = asyncio.run(scenario())
+    assert answers[1][0]['status'] == 'cancelled'
+    assert answers[2][0]['status'] == 'ok'
+    assert answers[2][1] - start < 2  # the branch and bound alone would take its whole 5 s time limit
+
+
+def test_unhashable_ids_are_errors():
+    gp = read_resource_geodes()[1]
+
+    async def scenario():
+        answers = list()
+
+        async def send(message):
+            answers.append(message)
+
+        async with SolveServer(workers=1) as server:
+            await server.submit({'cancel': [1]}, send)
+            await server.submit({'id': {'a': 1}, 'layout': _rows(gp), 'solver': 'greedy'}, send)
+            await server.submit({'id': 1, 'layout': _rows(gp), 'solver': 'greedy'}, send)
+            await server.queue.join()
+        return answers
+
+    answers = asyncio.run(scenario())
+    assert [a['status'] for a in answers] == ['error', 'error', 'ok']
+    assert answers[1]['id'] == {'a': 1} and answers[2]['id'] == 1
+
+
+def test_unix_socket():
+    gp = read_resource_geodes()[1]
+
+    async def scenario(path):
+        async with SolveServer(workers=1) as server:
+            task = asyncio.create_task(server.serve_unix(path))
+            while not os.path.exists(path):
+                await asyncio.sleep(0.01)
+            reader, writer = await asyncio.open_unix_connection(path)
+            writer.write(json.dumps({'id': 'a', 'layout': _rows(gp), 'solver': 'greedy'}).encode() + b'\n')
+            await writer.drain()
+            answer = json.loads(await reader.readline())
+            writer.close()
+            task.cancel()
+        return answer
+
+    with tempfile.TemporaryDirectory() as directory:
+        answer = asyncio.run(scenario(os.path.join(directory, 'solver.sock')))
+    assert answer['id'] == 'a' and answer['status'] == 'ok'
+    assert len(answer['layout']) == gp.height